@@ -0,0 +1,342 @@
+import json
+import time
+import itertools
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import List, Optional
+
+
+class AgentError(Exception):
+    """The agent worker crashed or answered with a JSON-RPC error"""
+
+    def __init__(self, message, stderr=""):
+        super().__init__(message)
+        self.stderr = stderr
+
+
+class AgentTimeout(AgentError):
+    """The request did not finish within its timeout (the worker is recycled)"""
+
+
+class _Request:
+    __slots__ = ("id", "method", "params", "future", "deadline")
+
+    def __init__(self, request_id, method, params, deadline):
+        self.id = request_id
+        self.method = method
+        self.params = params
+        self.future = Future()
+        self.deadline = deadline
+
+
+class AgentWorker:
+    """One long-lived `node hedera_agent.js --worker` process speaking JSON-RPC over stdio"""
+
+    def __init__(self, pool, cmd, cwd, env):
+        self.pool = pool
+        self.proc = subprocess.Popen(
+            cmd, cwd=cwd, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, bufsize=1,
+        )
+        self.ready = False
+        self.current: Optional[_Request] = None
+        self.requests_served = 0
+        self.idle_since = time.monotonic()
+        self.started_at = time.monotonic()
+        self.stderr_tail = deque(maxlen=40)
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        self._stderr_reader.start()
+
+    def _read_stdout(self):
+        for line in self.proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # stray log output, not part of the protocol
+            self.pool._on_message(self, message)
+        self.pool._on_exit(self)
+
+    def _read_stderr(self):
+        for line in self.proc.stderr:
+            self.stderr_tail.append(line.rstrip())
+
+    def send(self, request: _Request):
+        self.current = request
+        payload = {"jsonrpc": "2.0", "id": request.id, "method": request.method, "params": request.params}
+        self.proc.stdin.write(json.dumps(payload) + "\n")
+        self.proc.stdin.flush()
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def stderr_text(self) -> str:
+        return "\n".join(self.stderr_tail)
+
+    def wait_for_stderr(self, timeout: float = 1.0):
+        """After exit: let the reader drain what the process printed last"""
+        self._stderr_reader.join(timeout)
+
+    def kill(self):
+        try:
+            self.proc.kill()
+        except Exception:
+            pass
+
+
+class AgentPool:
+    """Pool of persistent agent workers.
+
+    Requests are queued and dispatched to idle workers; each worker handles one
+    request at a time. A monitor thread enforces per-request timeouts, replaces
+    crashed or hung workers, pings workers that have been idle for a while and
+    recycles a worker after `max_requests` requests. submit() returns a
+    concurrent Future, so callers can block on it or await it from asyncio.
+
+    A worker that exits (or never reports ready) before serving anything is a
+    startup failure, e.g. a broken script or a missing dependency. The queued
+    requests fail right away with an AgentError carrying the worker's stderr,
+    and new workers are only spawned after a backoff that doubles with each
+    consecutive failure (`respawn_backoff` up to `max_respawn_backoff` seconds).
+    Until then submit() fails fast with the same error. The first worker that
+    reports ready resets the backoff.
+    """
+
+    def __init__(self, cmd: List[str], cwd: str, env_factory, size: int = 2, max_requests: int = 100,
+                 timeout: float = 120, ping_interval: float = 60, ping_timeout: float = 10,
+                 startup_timeout: float = 60, respawn_backoff: float = 0.5, max_respawn_backoff: float = 30):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.env_factory = env_factory
+        self.size = size
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.startup_timeout = startup_timeout
+        self.respawn_backoff = respawn_backoff
+        self.max_respawn_backoff = max_respawn_backoff
+        self._failures = 0
+        self._respawn_at = 0.0
+        self._startup_error: Optional[AgentError] = None
+        self._lock = threading.Lock()
+        self._workers: List[AgentWorker] = []
+        self._idle = deque()
+        self._queue = deque()
+        self._ids = itertools.count(1)
+        self._monitor = None
+        self.stats_counters = {"requests": 0, "completed": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "spawned": 0,
+                               "startupFailures": 0}
+
+    # --- public API ---
+
+    def submit(self, prompt: str, timeout: Optional[float] = None) -> Future:
+        """Queue a prompt; the Future resolves to the agent's JSON output"""
+        self._start()
+        timeout = self._timeout(timeout)
+        deadline = time.monotonic() + timeout if timeout else float("inf")
+        request = _Request(next(self._ids), "run", {"prompt": prompt}, deadline)
+        with self._lock:
+            self.stats_counters["requests"] += 1
+            if self._startup_error is not None and time.monotonic() < self._respawn_at:
+                # Workers keep failing to start; don't make the caller wait for a timeout
+                request.future.set_exception(self._startup_error)
+                return request.future
+            self._queue.append(request)
+            try:
+                self._ensure_workers()
+            except Exception:
+                self._queue.remove(request)
+                raise
+            self._dispatch()
+        return request.future
+
+    def call(self, prompt: str, timeout: Optional[float] = None):
+        """Run a prompt and wait for the output; raises AgentTimeout after `timeout` (default: the pool's)"""
+        timeout = self._timeout(timeout)
+        future = self.submit(prompt, timeout)
+        try:
+            # The monitor fails the future at its deadline; the extra second only guards against a stuck monitor
+            return future.result(timeout + 1 if timeout else None)
+        except FutureTimeout:
+            future.cancel()
+            raise AgentTimeout("Agent timed out") from None
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Per-request timeout in seconds; None uses the pool's (which may itself be None = no limit)"""
+        return self.timeout if timeout is None else timeout
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats_counters,
+                "respawnInSeconds": round(max(0.0, self._respawn_at - time.monotonic()), 1),
+                "size": self.size,
+                "workers": len(self._workers),
+                "idle": len(self._idle),
+                "queued": len(self._queue),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle.clear()
+        for worker in workers:
+            worker.kill()
+
+    # --- internals (called with self._lock held unless noted) ---
+
+    def _start(self):
+        with self._lock:
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._monitor_loop, name="agent-pool-monitor", daemon=True)
+                self._monitor.start()
+
+    def _ensure_workers(self):
+        if time.monotonic() < self._respawn_at:
+            return  # backing off after a failure; the monitor retries later
+        while len(self._workers) < self.size:
+            worker = AgentWorker(self, self.cmd, self.cwd, self.env_factory())
+            self._workers.append(worker)
+            self.stats_counters["spawned"] += 1
+
+    def _record_failure(self, error: Optional[AgentError] = None):
+        """Push the next respawn back (doubling per consecutive failure). With a startup
+        error, also fail everything queued: no worker is going to serve it soon."""
+        self._failures += 1
+        delay = min(self.max_respawn_backoff, self.respawn_backoff * 2 ** (self._failures - 1))
+        self._respawn_at = time.monotonic() + delay
+        if error is None:
+            return
+        self.stats_counters["startupFailures"] += 1
+        self._startup_error = error
+        while self._queue:
+            request = self._queue.popleft()
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _dispatch(self):
+        while self._queue and self._idle:
+            request = self._queue.popleft()
+            if request.future.done():
+                continue
+            worker = self._idle.popleft()
+            try:
+                worker.send(request)
+            except Exception as e:
+                request.future.set_exception(AgentError(f"Agent process failed: {e}", worker.stderr_text()))
+                self._retire(worker)
+
+    def _retire(self, worker: AgentWorker):
+        worker.kill()
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if worker in self._idle:
+            self._idle.remove(worker)
+
+    def _release(self, worker: AgentWorker):
+        worker.current = None
+        worker.idle_since = time.monotonic()
+        if self.max_requests and worker.requests_served >= self.max_requests:
+            self.stats_counters["recycled"] += 1
+            self._retire(worker)
+            self._ensure_workers()
+        else:
+            self._idle.append(worker)
+        self._dispatch()
+
+    def _on_message(self, worker: AgentWorker, message: dict):
+        """Reader-thread callback for every JSON line a worker prints"""
+        with self._lock:
+            if message.get("method") == "ready":
+                worker.ready = True
+                self._failures = 0
+                self._respawn_at = 0.0
+                self._startup_error = None
+                if worker in self._workers:
+                    self._release(worker)
+                return
+
+            request = worker.current
+            if request is None or message.get("id") != request.id:
+                return  # late answer for a request that already timed out
+
+            if request.method == "run":
+                worker.requests_served += 1
+                self.stats_counters["completed"] += 1
+            if not request.future.done():
+                if "error" in message:
+                    error = message["error"] or {}
+                    request.future.set_exception(AgentError(error.get("message", "Agent error")))
+                else:
+                    request.future.set_result(message.get("result"))
+            self._release(worker)
+
+    def _on_exit(self, worker: AgentWorker):
+        """Reader-thread callback when a worker's stdout closes (process exited)"""
+        worker.proc.wait()
+        worker.wait_for_stderr()
+        with self._lock:
+            if worker not in self._workers:
+                return
+            self.stats_counters["crashes"] += 1
+            request = worker.current
+            if request is not None and not request.future.done():
+                request.future.set_exception(AgentError("Agent process failed", worker.stderr_text()))
+            self._retire(worker)
+            if worker.ready:
+                self._record_failure()
+            else:
+                self._record_failure(AgentError(
+                    f"Agent process exited during startup (code {worker.proc.returncode})", worker.stderr_text()))
+            if self._queue:
+                self._ensure_workers()
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(0.5)
+            now = time.monotonic()
+            with self._lock:
+                # Requests still waiting for a worker
+                for request in list(self._queue):
+                    if now > request.deadline:
+                        self._queue.remove(request)
+                        self.stats_counters["timeouts"] += 1
+                        if not request.future.done():
+                            request.future.set_exception(AgentTimeout("Agent timed out"))
+
+                for worker in list(self._workers):
+                    request = worker.current
+                    if request is not None and now > request.deadline:
+                        # Hung request: fail it and replace the worker
+                        if request.method == "run":
+                            self.stats_counters["timeouts"] += 1
+                        if not request.future.done():
+                            request.future.set_exception(AgentTimeout("Agent timed out", worker.stderr_text()))
+                        self._retire(worker)
+                    elif not worker.ready and now - worker.started_at > self.startup_timeout:
+                        self._retire(worker)
+                        self._record_failure(AgentError(
+                            f"Agent process did not start within {self.startup_timeout:g}s", worker.stderr_text()))
+                    elif worker in self._idle and now - worker.idle_since > self.ping_interval:
+                        # Health check: idle workers must answer a ping
+                        self._idle.remove(worker)
+                        ping = _Request(next(self._ids), "ping", {}, now + self.ping_timeout)
+                        try:
+                            worker.send(ping)
+                        except Exception:
+                            self._retire(worker)
+
+                if self._queue:
+                    try:
+                        self._ensure_workers()
+                    except Exception as e:
+                        # e.g. node missing: fail the queue instead of letting it time out
+                        self._record_failure(AgentError(f"Could not start agent process: {e}"))
+                    self._dispatch()
@@ -0,0 +1,285 @@
+"""
+Async (ASGI) serving mode for the backend.
+
+The slow endpoints (generate-signal, backtest/run, news-context, agent-chat) await
+their Groq / NewsAPI / Node I/O on the event loop instead of holding a worker
+thread each, so one process can keep hundreds of requests in flight. Every other
+route is served by the regular Flask app mounted underneath, and the JSON request
+and response contracts are identical to index.py.
+
+Run with:  python asgi.py   (or: uvicorn asgi:app --host 0.0.0.0 --port 5000)
+"""
+
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import index
+from agent_pool import AgentError, AgentTimeout
+from http_pool import transports
+from metrics import outbound, timed
+from new import aget_news_lines
+from singleflight import AsyncSingleFlight
+
+signal_flight = AsyncSingleFlight("signal")
+backtest_flight = AsyncSingleFlight("backtest")
+
+
+class AsyncRateLimiter:
+    """Event-loop counterpart of index.RateLimiter: at most `rate` calls per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def cached_completion(messages):
+    for model in index.model_router.cache_models:
+        raw_output = index.llm_cache.get(index.llm_cache.make_key(model, index.LLM_TEMPERATURE, messages))
+        if raw_output is not None:
+            return raw_output
+    return None
+
+
+async def acomplete_cached(messages, estimated_tokens=None):
+    """Async chat completion through the shared LLM cache (its disk tier is read and written off the loop)"""
+    raw_output = await asyncio.to_thread(cached_completion, messages)
+    if raw_output is not None:
+        return raw_output
+
+    raw_output, model = await index.model_router.acomplete_with_model(messages, estimated_tokens)
+    await asyncio.to_thread(index.llm_cache.set, index.llm_cache.make_key(model, index.LLM_TEMPERATURE, messages),
+                            raw_output)
+    return raw_output
+
+
+async def aevaluate_question(question, backtest_context=None):
+    """Async variant of index.evaluate_question (same single-flight key)"""
+    return await signal_flight.do(index.signal_key(question, backtest_context), _aevaluate_question,
+                                  question, backtest_context)
+
+
+async def _aevaluate_question(question, backtest_context=None):
+    with timed("signal.news"):
+        news_lines = await aget_news_lines(question, max_items=2)
+    with timed("signal.prompt"):
+        # Similar-market retrieval reads saved predictions from SQLite
+        prompt = await asyncio.to_thread(index.build_signal_prompt, question, news_lines, backtest_context)
+    with timed("signal.llm"):
+        raw_output = await acomplete_cached(prompt.messages, prompt.tokens)
+    with timed("signal.parse"):
+        evaluation = index.parse_model_output(raw_output)
+    index.remember_evaluation(question, backtest_context, evaluation)
+    return evaluation
+
+
+async def agenerate_signal(question, data_sources, risk_level, market_price=0.65, backtest_context=None):
+    """Async variant of index.generate_signal"""
+    try:
+        with timed("generate_signal"):
+            confidence_yes, reason = await aevaluate_question(question, backtest_context)
+            return index.decide_signal(confidence_yes, reason, risk_level, market_price)
+    except Exception as e:
+        print(f"Error in generate_signal: {e}")
+        return index.fallback_signal(e, risk_level, market_price)
+
+
+async def apredict_market(market, limiter, semaphore):
+    async with semaphore:
+        await limiter.wait()
+        prices = market.get("impliedPrices")
+        try:
+            with index.groq_guard.background():
+                result = await agenerate_signal(
+                    question=market["question"],
+                    data_sources=[],
+                    risk_level="medium",
+                    market_price=prices[0] if prices else 0.5,
+                    backtest_context=None
+                )
+        except Exception as e:
+            print(f"Error predicting market {market.get('questionId')}: {e}")
+            return None
+        return None if result.get("degraded") else result
+
+
+async def arun_backtest(markets=None, initial_capital=1000, bet_size_percent=10, max_workers=None, max_rps=None):
+    """Async variant of index.run_backtest (same fan-out limits, result shape and coalescing)"""
+    market_key = None if markets is None else tuple(m["questionId"] for m in markets)
+    key = (market_key, initial_capital, bet_size_percent)
+    with timed("run_backtest"):
+        return await backtest_flight.do(key, _arun_backtest, markets, initial_capital, bet_size_percent, max_workers, max_rps)
+
+
+async def _arun_backtest(markets=None, initial_capital=1000, bet_size_percent=10, max_workers=None, max_rps=None):
+    if markets is None:
+        with timed("backtest.load_markets"):
+            if time.time() - index.market_store.last_attempt_at >= index.MARKET_SYNC_INTERVAL:
+                await asyncio.to_thread(index.sync_markets)
+            markets = await asyncio.to_thread(lambda: index.attach_pools(index.market_store.resolved_markets()))
+
+    if not markets:
+        return {
+            "success": False,
+            "error": "No resolved markets found for backtesting"
+        }
+
+    markets = markets[:index.BACKTEST_MARKET_LIMIT]
+    max_workers = max_workers or index.BACKTEST_MAX_WORKERS
+    limiter = AsyncRateLimiter(index.BACKTEST_MAX_RPS if max_rps is None else max_rps)
+    semaphore = asyncio.Semaphore(max_workers)
+
+    # gather keeps market order; compounding runs once every prediction is in
+    with timed("backtest.predict"):
+        predictions = await asyncio.gather(*[apredict_market(m, limiter, semaphore) for m in markets])
+
+    matrix = await asyncio.to_thread(index.save_predictions, markets, predictions)
+
+    with timed("backtest.simulate"):
+        result = await asyncio.to_thread(index.simulate_matrix, matrix, initial_capital, bet_size_percent)
+    result["summary"]["maxWorkers"] = max_workers
+    return result
+
+
+async def read_json(request):
+    """The JSON object in the request body, or None for an empty, invalid or non-object body"""
+    try:
+        data = await request.json()
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def api_generate_signal(request):
+    try:
+        data = await read_json(request)
+        if data is None:
+            return JSONResponse({"success": False, "error": "Request body must be a JSON object"}, status_code=400)
+
+        question = data.get('question', '')
+        data_sources = data.get('dataSources', [])
+        risk_level = data.get('riskLevel', 'medium')
+        market_price = data.get('marketPrice', 0.65)
+        include_backtest = data.get('includeBacktest', False)
+
+        if not question:
+            return JSONResponse({"success": False, "error": "Question is required"}, status_code=400)
+
+        # Both may read SQLite (insights snapshot, precomputed signals) on first use
+        backtest_context, snapshot = await asyncio.to_thread(index.load_backtest_context, include_backtest)
+
+        stored = await asyncio.to_thread(index.stored_signal, question, backtest_context)
+        if stored is not None:
+            result = index.serve_stored_signal(stored, risk_level, market_price)
+        else:
+            result = await agenerate_signal(question, data_sources, risk_level, market_price, backtest_context)
+
+        if result["success"]:
+            return JSONResponse(index.annotate_signal_result(result, include_backtest, backtest_context, snapshot))
+        return JSONResponse(result, status_code=500)
+
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def api_run_backtest(request):
+    try:
+        data = await read_json(request) or {}
+
+        params, error = index.validate_backtest_params(data)
+        if error:
+            return JSONResponse({"success": False, "error": error}, status_code=400)
+
+        return JSONResponse(await arun_backtest(**params))
+
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def api_news_context(request):
+    try:
+        if request.method == 'POST':
+            question, limit = index.read_news_params(await read_json(request) or {}, 'question')
+        else:
+            question, limit = index.read_news_params(request.query_params, 'q')
+
+        lines = await aget_news_lines(question, max_items=limit)
+
+        return JSONResponse({
+            "success": True,
+            "query": question,
+            "count": len(lines),
+            "lines": lines
+        })
+    except Exception as e:
+        print(f"Error in api_news_context: {e}")
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def api_agent_chat(request):
+    try:
+        data = await read_json(request) or {}
+        prompt = (data.get('prompt') or '').strip()
+        if not prompt:
+            return JSONResponse({"success": False, "error": "prompt is required"}, status_code=400)
+
+        if not os.path.exists(index.AGENT_PATH):
+            return JSONResponse({"success": False, "error": f"Agent file not found at {index.AGENT_PATH}"}, status_code=500)
+
+        # submit() may spawn worker processes; the future then resolves on a reader thread
+        with timed("agent_chat"), outbound("agent"):
+            future = await asyncio.to_thread(index.agent_pool.submit, prompt)
+            output = await asyncio.wrap_future(future)
+        return JSONResponse({"success": True, "agent": output})
+
+    except AgentTimeout:
+        return JSONResponse({"success": False, "error": "Agent timed out"}, status_code=504)
+    except AgentError as e:
+        return JSONResponse({"success": False, "error": str(e), "stderr": e.stderr}, status_code=500)
+    except FileNotFoundError as e:
+        # node not found
+        return JSONResponse({"success": False, "error": f"Node runtime not found: {str(e)}"}, status_code=500)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await index.model_router.aclose()
+    await transports.aclose()
+    index.agent_pool.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/generate-signal', api_generate_signal, methods=['POST']),
+        Route('/api/backtest/run', api_run_backtest, methods=['POST']),
+        Route('/api/news-context', api_news_context, methods=['GET', 'POST']),
+        Route('/api/agent-chat', api_agent_chat, methods=['POST']),
+        # Everything else (health, markets, insights, cache stats, ...) is served by Flask
+        Mount('/', app=WSGIMiddleware(index.app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the backend.
+
+Starts local stand-ins for Groq, NewsAPI and Envio (fake_services.py) with the
+given latency/error profiles, launches the backend against them (Flask, or
+ASGI with --asgi), drives the endpoints at a fixed concurrency and reports
+throughput and p50/p95/p99 latency per endpoint. No network access or API quota
+is needed, so runs are repeatable in CI and on laptops.
+
+Examples:
+  python benchmark.py
+  python benchmark.py --asgi --concurrency 32 --scenarios signal,news
+  python benchmark.py --groq "median=0.4,sigma=0.6,tail=3,tailRate=0.01,errors=0.02" --json bench.json
+  python benchmark.py --target http://localhost:5000 --scenarios markets   # an already running server
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from fake_services import FakeEnvio, FakeGroq, FakeNewsAPI, LatencyProfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BENCH_QUESTIONS = [
+    "Will Bitcoin reach ${n},000 by the end of the month?",
+    "Will Ethereum ETF inflows exceed ${n}M this week?",
+    "Will the incumbent lead poll number {n}?",
+    "Will the championship favourite win match {n}?",
+    "Will crypto market cap rise {n}% this quarter?",
+]
+
+
+def bench_question(i: int) -> str:
+    return BENCH_QUESTIONS[i % len(BENCH_QUESTIONS)].format(n=i)
+
+
+def signal_request(i, questions):
+    return "POST", "/api/generate-signal", {
+        "question": bench_question(i % questions),
+        "dataSources": [],
+        "riskLevel": "medium",
+        "marketPrice": 0.5,
+    }
+
+
+def news_request(i, questions):
+    return "POST", "/api/news-context", {"question": bench_question(i % questions), "limit": 3}
+
+
+def backtest_request(i, questions):
+    return "POST", "/api/backtest/run", {"initialCapital": 1000, "betSizePercent": 10}
+
+
+def markets_request(i, questions):
+    return "GET", "/api/backtest/markets", None
+
+
+def fallback_signal_response(body: dict) -> bool:
+    """A neutral HOLD returned because the LLM call failed (the request itself still succeeds)"""
+    return bool(body.get("degraded"))
+
+
+# name -> (request factory, default request count, degraded-response check)
+SCENARIOS: Dict[str, tuple] = {
+    "signal": (signal_request, 200, fallback_signal_response),
+    "news": (news_request, 200, None),
+    "markets": (markets_request, 100, None),
+    "backtest": (backtest_request, 10, None),
+}
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5 - 1e-9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_scenario(base_url: str, make_request: Callable, count: int, concurrency: int, questions: int,
+                 warmup: int = 0, timeout: float = 120, degraded: Optional[Callable[[dict], bool]] = None) -> dict:
+    """Send `count` requests with `concurrency` workers (each on a keep-alive session)"""
+    local = threading.local()
+    counter = iter(range(count))
+    counter_lock = threading.Lock()
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    degraded_count = [0]
+    results_lock = threading.Lock()
+
+    def send(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        method, path, body = make_request(i, questions)
+        started = time.perf_counter()
+        try:
+            response = local.session.request(method, base_url + path, json=body, timeout=timeout)
+            elapsed = time.perf_counter() - started
+            body = response.json()
+            ok = response.status_code == 200 and body.get("success", True) is not False
+            if not ok:
+                return elapsed, f"HTTP {response.status_code}", False
+            return elapsed, None, bool(degraded and degraded(body))
+        except Exception as e:
+            return time.perf_counter() - started, type(e).__name__, False
+
+    def worker():
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            elapsed, error, is_degraded = send(i)
+            with results_lock:
+                latencies.append(elapsed)
+                degraded_count[0] += is_degraded
+                if error:
+                    errors[error] = errors.get(error, 0) + 1
+
+    # Warm-up requests run before the clock starts
+    for i in range(warmup):
+        send(i)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    failed = sum(errors.values())
+    return {
+        "requests": len(ordered),
+        "errors": failed,
+        "errorKinds": errors,
+        "degraded": degraded_count[0],
+        "concurrency": concurrency,
+        "durationS": round(wall, 3),
+        "throughputRps": round(len(ordered) / wall, 2) if wall > 0 else 0.0,
+        "p50Ms": round(percentile(ordered, 50) * 1000, 1),
+        "p95Ms": round(percentile(ordered, 95) * 1000, 1),
+        "p99Ms": round(percentile(ordered, 99) * 1000, 1),
+        "maxMs": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackendProcess:
+    """The backend in a subprocess, pointed at the fake upstreams with throwaway state files"""
+
+    def __init__(self, groq_url: str, news_url: str, envio_url: str, asgi: bool = False):
+        self.port = free_port()
+        self.workdir = tempfile.mkdtemp(prefix="betai-bench-")
+        self.log_path = os.path.join(self.workdir, "server.log")
+        env = dict(os.environ)
+        env.update({
+            "GROQ_API_KEY": "bench",
+            "GROQ_BASE_URL": groq_url,
+            "NEWS_API_KEY": "bench",
+            "NEWS_API_URL": f"{news_url}/v2/everything",
+            "ENVIO_GRAPHQL_URL": f"{envio_url}/v1/graphql",
+            "LLM_CACHE_PATH": os.path.join(self.workdir, "llm_cache.sqlite3"),
+            "MARKET_DB_PATH": os.path.join(self.workdir, "markets.sqlite3"),
+            "POOL_DB_PATH": os.path.join(self.workdir, "pools.sqlite3"),
+            "PREDICTION_MATRIX_PATH": os.path.join(self.workdir, "predictions.npz"),
+            "INSIGHTS_CACHE_PATH": os.path.join(self.workdir, "insights.json"),
+            "PYTHONUNBUFFERED": "1",
+        })
+        # The fakes need no client-side throttling unless asked for
+        env.setdefault("BACKTEST_MAX_RPS", "0")
+        env.setdefault("GROQ_RPM", "0")
+        env.setdefault("GROQ_TPM", "0")
+        # Background signal precomputation would add Groq load the scenarios do not ask for
+        env.setdefault("SIGNAL_PRECOMPUTE", "0")
+        if asgi:
+            cmd = [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(self.port),
+                   "--log-level", "warning"]
+        else:
+            cmd = [sys.executable, "-c",
+                   f"import index; index.app.run(host='127.0.0.1', port={self.port}, threaded=True)"]
+        self._log = open(self.log_path, "w")
+        self.process = subprocess.Popen(cmd, cwd=HERE, env=env, stdout=self._log, stderr=subprocess.STDOUT)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout: float = 60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Backend exited with code {self.process.returncode}; see {self.log_path}")
+            try:
+                if requests.get(f"{self.url}/api/health", timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Backend did not become healthy within {timeout}s; see {self.log_path}")
+
+    def stop(self, keep_files: bool = False):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+        if not keep_files:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def print_report(report: dict):
+    print(f"\n{'scenario':<10} {'reqs':>6} {'errors':>6} {'degr':>5} {'rps':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, row in report["scenarios"].items():
+        print(f"{name:<10} {row['requests']:>6} {row['errors']:>6} {row['degraded']:>5} {row['throughputRps']:>9.2f} "
+              f"{row['p50Ms']:>9.1f} {row['p95Ms']:>9.1f} {row['p99Ms']:>9.1f} {row['maxMs']:>9.1f}")
+    if report.get("upstreams"):
+        calls = ", ".join(f"{name} {stats['requests']} ({stats['errors']} failed)"
+                          for name, stats in report["upstreams"].items())
+        print(f"\nUpstream calls: {calls}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test with local Groq/NewsAPI/Envio stand-ins")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma list of {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=None, help="Requests per scenario (default per scenario)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests before each scenario")
+    parser.add_argument("--questions", type=int, default=50,
+                        help="Distinct questions cycled through (fewer = more cache hits)")
+    parser.add_argument("--groq", default="median=0.3,sigma=0.4", help="Groq latency profile")
+    parser.add_argument("--news", default="median=0.08,sigma=0.3", help="NewsAPI latency profile")
+    parser.add_argument("--envio", default="median=0.03,sigma=0.3", help="Envio latency profile")
+    parser.add_argument("--token-interval", type=float, default=0.002, help="Seconds between streamed Groq tokens")
+    parser.add_argument("--markets", type=int, default=200, help="Markets in the fake Envio dataset")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--asgi", action="store_true", help="Serve the backend in ASGI mode (uvicorn)")
+    parser.add_argument("--target", default=None, help="Benchmark a running server instead (no fakes started)")
+    parser.add_argument("--keep-files", action="store_true", help="Keep the server log and state files")
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    fakes = {}
+    backend = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            fakes = {
+                "groq": FakeGroq(LatencyProfile.parse(args.groq, args.seed), token_interval=args.token_interval),
+                "newsapi": FakeNewsAPI(LatencyProfile.parse(args.news, args.seed + 1)),
+                "envio": FakeEnvio(LatencyProfile.parse(args.envio, args.seed + 2), markets=args.markets,
+                                   seed=args.seed),
+            }
+            for fake in fakes.values():
+                fake.start()
+            backend = BackendProcess(fakes["groq"].url, fakes["newsapi"].url, fakes["envio"].url, asgi=args.asgi)
+            print(f"Starting backend ({'ASGI' if args.asgi else 'Flask'}) on {backend.url} ...")
+            backend.wait_ready()
+            base_url = backend.url
+
+        report = {
+            "target": args.target or ("asgi" if args.asgi else "flask"),
+            "concurrency": args.concurrency,
+            "questions": args.questions,
+            "scenarios": {},
+        }
+        for name in names:
+            make_request, default_count, degraded = SCENARIOS[name]
+            count = args.requests or default_count
+            print(f"Running {name}: {count} requests at concurrency {args.concurrency} ...")
+            report["scenarios"][name] = run_scenario(base_url, make_request, count, args.concurrency,
+                                                     args.questions, warmup=args.warmup, degraded=degraded)
+        if fakes:
+            report["upstreams"] = {name: fake.stats() for name, fake in fakes.items()}
+
+        print_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.json}")
+        return 0
+    finally:
+        if backend is not None:
+            backend.stop(keep_files=args.keep_files)
+            if args.keep_files:
+                print(f"Server log and state kept in {backend.workdir}")
+        for fake in fakes.values():
+            fake.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
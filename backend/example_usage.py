@@ -40,7 +40,7 @@ def example_2_enhanced_signal():
     print("="*60)
     
     print("⏳ Generating signal with backtest context...")
-    print("   (This will take ~30-60 seconds)")
+    print("   (Insights are precomputed in the background, so this is as fast as a basic signal)")
     
     response = requests.post(
         f"{BASE_URL}/api/generate-signal",
@@ -65,8 +65,11 @@ def example_2_enhanced_signal():
         print(f"   • Accuracy: {bs['accuracy']}%")
         print(f"   • ROI: {bs['roi']}%")
         print(f"   • Total Bets: {bs['total_bets']}")
+        print(f"   • Insights Version: {bs['version']} ({bs['age_seconds']}s old)")
+    elif result.get('backtest_status') == 'warming':
+        print("\n⏳ Backtest insights are still being computed on the server, try again shortly")
     
-    print(f"⏱️  Response Time: ~30-60 seconds")
+    print(f"⏱️  Response Time: ~2-5 seconds")
 
 def example_3_comparison():
     """Example 3: Compare same question with and without backtest"""
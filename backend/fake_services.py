@@ -0,0 +1,340 @@
+"""
+Local stand-ins for Groq, NewsAPI and Envio, used by benchmark.py.
+
+Each fake is a threaded HTTP server answering the requests the backend makes
+(Groq chat completions, streamed or not; NewsAPI `everything`; Envio GraphQL
+queries for questions, resolutions and bets) with deterministic generated data.
+A LatencyProfile controls how long each response takes and how often it fails.
+"""
+
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class LatencyProfile:
+    """Response delay and failure model for a fake service.
+
+    Delays are lognormal around `median` seconds (spread `sigma`, 0 = fixed); a
+    `tail_rate` share of responses is delayed by `tail` seconds instead, and an
+    `error_rate` share fails with HTTP `status`.
+    """
+
+    FIELDS = {"median": float, "sigma": float, "tail": float, "tailRate": float, "errors": float, "status": int}
+
+    def __init__(self, median: float = 0.0, sigma: float = 0.0, tail: float = 0.0, tail_rate: float = 0.0,
+                 error_rate: float = 0.0, status: int = 500, seed: Optional[int] = None):
+        self.median = median
+        self.sigma = sigma
+        self.tail = tail
+        self.tail_rate = tail_rate
+        self.error_rate = error_rate
+        self.status = status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyProfile":
+        """From "median=0.3,sigma=0.5,tail=3,tailRate=0.01,errors=0.02,status=429" (all optional)"""
+        values = {}
+        for item in (spec or "").split(","):
+            if not item.strip():
+                continue
+            name, _, value = item.partition("=")
+            name = name.strip()
+            if name not in cls.FIELDS:
+                raise ValueError(f"Unknown latency setting {name!r}; expected {', '.join(cls.FIELDS)}")
+            values[name] = cls.FIELDS[name](value)
+        return cls(values.get("median", 0.0), values.get("sigma", 0.0), values.get("tail", 0.0),
+                   values.get("tailRate", 0.0), values.get("errors", 0.0), values.get("status", 500), seed)
+
+    def draw(self):
+        """(delay seconds, HTTP error status or None) for one response"""
+        with self._lock:
+            if self.tail_rate and self._random.random() < self.tail_rate:
+                delay = self.tail
+            elif self.sigma and self.median > 0:
+                delay = self.median * math.exp(self._random.gauss(0, self.sigma))
+            else:
+                delay = self.median
+            failed = self.error_rate and self._random.random() < self.error_rate
+        return delay, (self.status if failed else None)
+
+    def describe(self) -> dict:
+        return {"median": self.median, "sigma": self.sigma, "tail": self.tail, "tailRate": self.tail_rate,
+                "errors": self.error_rate, "status": self.status}
+
+
+class FakeService:
+    """Threaded HTTP server on 127.0.0.1; subclasses implement handle(method, path, query, body)"""
+
+    name = "fake"
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, port: int = 0):
+        self.profile = profile or LatencyProfile()
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                url = urlparse(self.path)
+                service._dispatch(self, self.command, url.path, parse_qs(url.query), body)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeService":
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"{self.name}-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _dispatch(self, handler, method, path, query, body):
+        delay, status = self.profile.draw()
+        with self._lock:
+            self.requests += 1
+            self.errors += bool(status)
+        if delay:
+            time.sleep(delay)
+        if status:
+            self.send_json(handler, {"error": {"message": f"{self.name} fake error"}, "status": "error"}, status)
+            return
+        try:
+            self.handle(handler, method, path, query, body)
+        except Exception as e:
+            self.send_json(handler, {"error": {"message": str(e)}}, 500)
+
+    def handle(self, handler, method, path, query, body):
+        raise NotImplementedError
+
+    @staticmethod
+    def send_json(handler, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "profile": self.profile.describe()}
+
+
+class FakeGroq(FakeService):
+    """POST /openai/v1/chat/completions, plain or streamed (SSE) like Groq.
+
+    The answer is a signal JSON whose yes_probability is derived from a hash of
+    the prompt. Streamed answers send a chunk every `token_interval` seconds
+    after the first one and end with trailing whitespace tokens and a usage block,
+    as real completions do.
+    """
+
+    name = "groq"
+
+    def __init__(self, profile=None, port=0, token_interval: float = 0.002, trailing_tokens: int = 20):
+        super().__init__(profile, port)
+        self.token_interval = token_interval
+        self.trailing_tokens = trailing_tokens
+
+    def handle(self, handler, method, path, query, body):
+        if not path.endswith("/chat/completions"):
+            self.send_json(handler, {"error": {"message": "not found"}}, 404)
+            return
+        request = json.loads(body or b"{}")
+        prompt = json.dumps(request.get("messages", []), sort_keys=True)
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        answer = json.dumps({
+            "yes_probability": round((digest % 1000) / 1000, 3),
+            "reason": "Synthetic answer from the local Groq stand-in for benchmarking.",
+        })
+        model = request.get("model", "fake-model")
+        prompt_tokens = len(prompt) // 4
+        tokens = [answer[i:i + 4] for i in range(0, len(answer), 4)] + ["\n"] * self.trailing_tokens
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        created = int(time.time())
+
+        if not request.get("stream"):
+            self.send_json(handler, {
+                "id": f"chatcmpl-{digest}",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        try:
+            for index, token in enumerate(tokens):
+                if index and self.token_interval:
+                    time.sleep(self.token_interval)
+                chunk = {
+                    "id": f"chatcmpl-{digest}", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                handler.wfile.flush()
+            final = {
+                "id": f"chatcmpl-{digest}", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"id": f"req-{digest}", "usage": usage},
+            }
+            handler.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading early
+
+
+class FakeNewsAPI(FakeService):
+    """GET /v2/everything returning `pageSize` generated articles about the query"""
+
+    name = "newsapi"
+
+    def handle(self, handler, method, path, query, body):
+        if not path.endswith("/everything"):
+            self.send_json(handler, {"status": "error", "message": "not found"}, 404)
+            return
+        q = (query.get("q") or ["crypto"])[0]
+        page_size = int((query.get("pageSize") or ["20"])[0])
+        articles = [
+            {
+                "source": {"id": None, "name": f"Bench Wire {i + 1}"},
+                "title": f"{q[:80]}: analysts weigh in ({i + 1})",
+                "description": f"Synthetic coverage of '{q[:60]}' for load testing.",
+                "publishedAt": "2025-01-01T00:00:00Z",
+            }
+            for i in range(page_size)
+        ]
+        self.send_json(handler, {"status": "ok", "totalResults": len(articles), "articles": articles})
+
+
+QUESTION_TEMPLATES = [
+    "Will Bitcoin close above ${price:,} on day {n}?",
+    "Will Ethereum trade above ${price:,} by round {n}?",
+    "Will the election poll #{n} show the incumbent ahead?",
+    "Will the home team win sports fixture {n}?",
+    "Will the crypto market cap exceed ${price:,}M in week {n}?",
+]
+
+_FIELD_PATTERN = re.compile(r"ParimutuelPredictionMarket_(\w+)\s*\(([^)]*)\)")
+_CMP_PATTERN = re.compile(r"(\w+):\s*\{\s*(_gte?):\s*(?:\"([^\"]*)\"|(-?\d+))")
+_IN_PATTERN = re.compile(r"(\w+):\s*\{\s*_in:\s*(\[[^\]]*\])")
+_ORDER_PATTERN = re.compile(r"order_by:\s*(\[[^\]]*\]|\{[^}]*\})")
+_ORDER_FIELD_PATTERN = re.compile(r"(\w+):\s*(asc|desc)")
+_LIMIT_PATTERN = re.compile(r"limit:\s*(\d+)")
+_OFFSET_PATTERN = re.compile(r"offset:\s*(\d+)")
+
+
+class FakeEnvio(FakeService):
+    """POST GraphQL over generated QuestionAdded, MarketResolved and BetPlaced entities.
+
+    Supports the filters the backend uses: `{field: {_gt|_gte: ...}}`, `{field: {_in: [...]}}`,
+    `order_by: {field: asc|desc}` (or a list of those), `limit` and `offset`. `open_share` of the markets end in
+    the future and are not resolved.
+    """
+
+    name = "envio"
+    NUMERIC_FIELDS = {"questionId", "endTime", "winningOutcome", "outcomeIndex", "amount", "blockNumber", "logIndex"}
+
+    def __init__(self, profile=None, port=0, markets: int = 200, bets_per_market: int = 10,
+                 open_share: float = 0.2, seed: int = 7):
+        super().__init__(profile, port)
+        self.entities = self._generate(markets, bets_per_market, open_share, random.Random(seed))
+
+    @staticmethod
+    def _generate(markets, bets_per_market, open_share, rng) -> Dict[str, List[dict]]:
+        now = int(time.time())
+        questions, resolutions, bets = [], [], []
+        for qid in range(markets):
+            block = 1000 + qid * 50
+            is_open = rng.random() < open_share
+            end_time = now + rng.randint(3600, 30 * 86400) if is_open else now - (markets - qid) * 3600
+            template = QUESTION_TEMPLATES[qid % len(QUESTION_TEMPLATES)]
+            questions.append({
+                "id": f"296_{block}_0",
+                "questionId": str(qid),
+                "question": template.format(price=rng.randint(10, 120) * 1000, n=qid),
+                "outcomeNames": ["Yes", "No"],
+                "endTime": str(end_time),
+            })
+            if not is_open:
+                resolutions.append({"id": f"296_{block + 40}_0", "questionId": str(qid),
+                                    "winningOutcome": str(rng.randint(0, 1))})
+            for b in range(bets_per_market):
+                bets.append({"id": f"296_{block + 1 + b}_{b}", "questionId": str(qid),
+                             "outcomeIndex": str(rng.randint(0, 1)),
+                             "amount": str(rng.randint(1, 100) * 10 ** 8),
+                             "blockNumber": block + 1 + b, "logIndex": b})
+        bets.sort(key=lambda row: (row["blockNumber"], row["logIndex"]))
+        return {"QuestionAdded": questions, "MarketResolved": resolutions, "BetPlaced": bets}
+
+    def _key(self, field):
+        if field in self.NUMERIC_FIELDS:
+            return lambda row: int(row[field])
+        return lambda row: row[field]
+
+    def _select(self, entity: str, args: str) -> List[dict]:
+        rows = self.entities.get(entity, [])
+        for field, op, quoted, number in _CMP_PATTERN.findall(args):
+            key = self._key(field)
+            value = quoted if number == "" else number
+            bound = int(value) if field in self.NUMERIC_FIELDS else value
+            if op == "_gte":
+                rows = [row for row in rows if key(row) >= bound]
+            else:
+                rows = [row for row in rows if key(row) > bound]
+        for field, values in _IN_PATTERN.findall(args):
+            wanted = {str(v) for v in json.loads(values)}
+            rows = [row for row in rows if str(row[field]) in wanted]
+        order = _ORDER_PATTERN.search(args)
+        if order:
+            # Stable sorts from the last key to the first give the combined order
+            for field, direction in reversed(_ORDER_FIELD_PATTERN.findall(order.group(1))):
+                rows = sorted(rows, key=self._key(field), reverse=direction == "desc")
+        offset = _OFFSET_PATTERN.search(args)
+        if offset:
+            rows = rows[int(offset.group(1)):]
+        limit = _LIMIT_PATTERN.search(args)
+        if limit:
+            rows = rows[:int(limit.group(1))]
+        return rows
+
+    def handle(self, handler, method, path, query, body):
+        text = json.loads(body or b"{}").get("query", "")
+        data = {f"ParimutuelPredictionMarket_{entity}": self._select(entity, args)
+                for entity, args in _FIELD_PATTERN.findall(text)}
+        self.send_json(handler, {"data": data})
@@ -0,0 +1,392 @@
+"""
+Rate limiting, retries and circuit breaking for Groq completions.
+
+GroqGuard sits between GroqBackend and the Groq SDK (whose own retries are
+disabled). Every attempt:
+
+1. checks the backend's circuit breaker: after `failure_threshold` consecutive
+   upstream failures the circuit opens and calls fail immediately with
+   CircuitOpenError for `reset_timeout` seconds, then one probe call decides
+   whether it closes again
+2. takes one request and the estimated prompt + completion tokens from shared
+   per-minute token buckets; interactive callers queue for at most
+   `max_queue_wait` seconds (else RateLimitExceeded), background callers (see
+   `background()`) wait as long as needed but leave `interactive_reserve` of
+   each bucket to interactive callers
+3. on a retryable error (connection, timeout, 429, 5xx) sleeps a jittered
+   backoff and retries, as long as the shared retry budget allows it
+
+Both exceptions subclass UpstreamUnavailable, so callers fall back in
+milliseconds while Groq is down or saturated.
+"""
+
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import groq
+import httpx
+
+
+class UpstreamUnavailable(Exception):
+    """The call was not sent: the upstream is unhealthy or over its rate limit"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class RateLimitExceeded(UpstreamUnavailable):
+    pass
+
+
+# Set while scoring backtests or other bulk work; see GroqGuard.background()
+_background = contextvars.ContextVar("groq_background", default=False)
+
+
+class TokenBucket:
+    """Thread-safe bucket refilled at `per_minute` units per minute, holding at most one minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute or 0)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, max_wait: float) -> Optional[float]:
+        """Take `amount` now, returning how long to wait until it is covered (None = over max_wait, nothing taken)"""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, (amount - self.level) / self.rate)
+            if wait > max_wait:
+                return None
+            self.level -= amount
+            return wait
+
+    def try_take(self, amount: float, floor: float) -> float:
+        """Take `amount` if that leaves at least `floor`; else return the seconds until it would"""
+        if self.unlimited:
+            return 0.0
+        amount = min(amount, self.capacity * (1 - floor))
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            missing = amount + self.capacity * floor - self.level
+            if missing <= 0:
+                self.level -= amount
+                return 0.0
+            return missing / self.rate
+
+    def give_back(self, amount: float):
+        """Return over-reserved units (negative amounts charge the difference)"""
+        if self.unlimited:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures -> half-open after `reset_timeout` -> closed"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.opens = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self.probing):
+                self.probing = self.state == self.HALF_OPEN
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(f"Circuit open after {self.failures} upstream failures; retry in {retry_in:.1f}s")
+
+    def record(self, ok: Optional[bool]):
+        """ok=True closes, ok=False counts a failure, None (cancelled / client error) only ends a probe"""
+        with self._lock:
+            self.probing = False
+            if ok is None:
+                return
+            if ok:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opens += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.failures,
+                "opens": self.opens,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    """Retries may add at most `ratio` extra load: each call earns `ratio` retries, up to `burst` banked"""
+
+    def __init__(self, ratio: float = 0.2, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.balance = burst
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.balance = min(self.burst, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+class Permit:
+    """One admitted attempt; `settle(actual_tokens)` returns unused reserved tokens to the bucket"""
+
+    def __init__(self, guard: "GroqGuard", tokens: float):
+        self.guard = guard
+        self.tokens = tokens
+
+    def settle(self, actual_tokens: Optional[int]):
+        if actual_tokens is None or not self.tokens:
+            return
+        self.guard.tokens.give_back(self.tokens - actual_tokens)
+        self.tokens = 0
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (groq.APIConnectionError, groq.RateLimitError, groq.InternalServerError, httpx.TransportError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class GroqGuard:
+    """Shared limiter and retry budget plus one circuit breaker per backend name"""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_queue_wait: float = 5.0, interactive_reserve: float = 0.25,
+                 max_attempts: int = 3, backoff_base: float = 0.25, backoff_cap: float = 4.0,
+                 retry_ratio: float = 0.2, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue_wait = max_queue_wait
+        self.interactive_reserve = min(max(interactive_reserve, 0.0), 0.9)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_budget = RetryBudget(retry_ratio)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.rate_limited = 0
+        self.queued_seconds = 0.0
+
+    @staticmethod
+    @contextmanager
+    def background():
+        """Mark completions in this block (thread or task) as bulk work that yields to interactive callers"""
+        token = _background.set(True)
+        try:
+            yield
+        finally:
+            _background.reset(token)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _count(self, **deltas):
+        with self._lock:
+            for field, delta in deltas.items():
+                setattr(self, field, getattr(self, field) + delta)
+
+    def _admit_wait(self, tokens: float) -> float:
+        """Seconds to wait before sending (interactive); raises RateLimitExceeded past max_queue_wait"""
+        request_wait = self.requests.reserve(1, self.max_queue_wait)
+        if request_wait is None:
+            self._count(rate_limited=1)
+            raise RateLimitExceeded("Groq requests-per-minute limit reached")
+        token_wait = self.tokens.reserve(tokens, self.max_queue_wait)
+        if token_wait is None:
+            self.requests.give_back(1)
+            self._count(rate_limited=1)
+            raise RateLimitExceeded("Groq tokens-per-minute limit reached")
+        return max(request_wait, token_wait)
+
+    def _background_wait(self, tokens: float) -> float:
+        """0 once both buckets are taken above the interactive reserve, else seconds to poll again"""
+        wait = self.requests.try_take(1, self.interactive_reserve)
+        if wait:
+            return wait
+        wait = self.tokens.try_take(tokens, self.interactive_reserve)
+        if wait:
+            self.requests.give_back(1)
+        return wait
+
+    def _backoff(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Jittered delay before the next attempt, or None if the error/attempt/budget rules out a retry"""
+        if not is_retryable(error) or attempt + 1 >= self.max_attempts:
+            return None
+        if not self.retry_budget.withdraw():
+            self._count(budget_exhausted=1)
+            return None
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            if retry_after > self.backoff_cap:
+                return None
+            delay = max(delay, retry_after)
+        self._count(retries=1)
+        return delay
+
+    @staticmethod
+    def _breaker_outcome(error: BaseException) -> Optional[bool]:
+        # 429s and client errors say nothing about upstream health
+        if isinstance(error, groq.RateLimitError) or not is_retryable(error):
+            return None
+        return False
+
+    def call(self, name: str, attempt_fn: Callable[[Permit], object], tokens: float = 0):
+        """Run attempt_fn(permit) under the breaker, limiter and retry policy"""
+        breaker = self.breaker(name)
+        self._count(calls=1)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            breaker.allow()
+            try:
+                if _background.get():
+                    while True:
+                        wait = self._background_wait(tokens)
+                        if not wait:
+                            break
+                        self._count(queued_seconds=wait)
+                        time.sleep(wait)
+                else:
+                    wait = self._admit_wait(tokens)
+                    if wait:
+                        self._count(queued_seconds=wait)
+                        time.sleep(wait)
+                result = attempt_fn(Permit(self, tokens))
+            except UpstreamUnavailable:
+                breaker.record(None)
+                raise
+            except Exception as e:
+                breaker.record(self._breaker_outcome(e))
+                delay = self._backoff(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record(True)
+            return result
+
+    async def acall(self, name: str, attempt_fn, tokens: float = 0):
+        """Async counterpart of call(); attempt_fn(permit) returns an awaitable"""
+        breaker = self.breaker(name)
+        self._count(calls=1)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            breaker.allow()
+            try:
+                if _background.get():
+                    while True:
+                        wait = self._background_wait(tokens)
+                        if not wait:
+                            break
+                        self._count(queued_seconds=wait)
+                        await asyncio.sleep(wait)
+                else:
+                    wait = self._admit_wait(tokens)
+                    if wait:
+                        self._count(queued_seconds=wait)
+                        await asyncio.sleep(wait)
+                result = await attempt_fn(Permit(self, tokens))
+            except asyncio.CancelledError:
+                breaker.record(None)
+                raise
+            except UpstreamUnavailable:
+                breaker.record(None)
+                raise
+            except Exception as e:
+                breaker.record(self._breaker_outcome(e))
+                delay = self._backoff(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record(True)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "retryBudgetExhausted": self.budget_exhausted,
+                "rateLimited": self.rate_limited,
+                "queuedSeconds": round(self.queued_seconds, 3),
+                "requestsPerMinute": self.requests.capacity,
+                "tokensPerMinute": self.tokens.capacity,
+            }
+            breakers = dict(self._breakers)
+        counters["breakers"] = {name: breaker.stats() for name, breaker in breakers.items()}
+        return counters
@@ -0,0 +1,201 @@
+"""
+Pooled keep-alive HTTP transports, one per upstream.
+
+Envio and NewsAPI go through a requests.Session, and the Groq SDK and the
+async NewsAPI path go through httpx clients. Each upstream gets its own
+connection pool, so after the first call to a host its TCP/TLS connection is
+reused instead of being set up again on every request.
+
+Per upstream `name` (envio, newsapi, groq), settings come from
+HTTP_POOL_SIZE_<NAME>, HTTP_CONNECT_TIMEOUT_<NAME> and HTTP_READ_TIMEOUT_<NAME>.
+When one of those is not set, the matching HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT
+or READ_TIMEOUTS default is used. Idle httpx connections are closed after
+HTTP_KEEPALIVE_EXPIRY seconds. HTTP2_<NAME>=1 (or HTTP2=1) lets the httpx
+clients use HTTP/2 when the h2 package is installed (`pip install httpx[http2]`).
+Then a stream closed early, such as a Groq completion stopped once the signal
+fields are parsed, only resets its own stream and keeps the connection. Over
+HTTP/1.1 that connection is dropped.
+
+`stats()` reports requests and new connections per transport. The reuse ratio
+is the share of requests that were sent on an already-open connection.
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Read timeouts (seconds) used when HTTP_READ_TIMEOUT_<NAME> is unset
+READ_TIMEOUTS = {"envio": 30.0, "newsapi": 10.0, "groq": 60.0}
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connect/read timeouts come from the transport, not each call site"""
+
+    def __init__(self, pool_size: int, timeout: tuple):
+        self.timeout = timeout
+        super().__init__(pool_connections=4, pool_maxsize=pool_size)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=self.timeout, **kwargs)
+
+    def connection_counts(self):
+        requests_sent = connections = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        return requests_sent, connections
+
+
+class HostTransport:
+    """Keep-alive session and httpx clients for one upstream, created on first use"""
+
+    def __init__(self, name: str, pool_size: int = 16, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0, keepalive_expiry: float = 60.0, http2: bool = False):
+        self.name = name
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and _h2_available(name)
+        self._session: Optional[requests.Session] = None
+        self._adapter: Optional[_PooledAdapter] = None
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self.httpx_requests = 0
+        self.httpx_connections = 0
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._adapter = _PooledAdapter(self.pool_size, (self.connect_timeout, self.read_timeout))
+                    session = requests.Session()
+                    session.mount("http://", self._adapter)
+                    session.mount("https://", self._adapter)
+                    self._session = session
+        return self._session
+
+    def _httpx_options(self) -> dict:
+        return {
+            "http2": self.http2,
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size,
+                                   keepalive_expiry=self.keepalive_expiry),
+        }
+
+    def _count(self, requests_sent=0, connections=0):
+        with self._lock:
+            self.httpx_requests += requests_sent
+            self.httpx_connections += connections
+
+    def _on_request(self, request):
+        # httpcore reports each new TCP connection through the request's trace extension
+        self._count(requests_sent=1)
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event, info):
+        if event == "connection.connect_tcp.complete":
+            self._count(connections=1)
+
+    async def _aon_request(self, request):
+        self._count(requests_sent=1)
+        request.extensions["trace"] = self._atrace
+
+    async def _atrace(self, event, info):
+        self._trace(event, info)
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(event_hooks={"request": [self._on_request]}, **self._httpx_options())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the serving event loop
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(event_hooks={"request": [self._aon_request]},
+                                                   **self._httpx_options())
+        return self._async_client
+
+    async def aclose(self):
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            await client.aclose()
+
+    def stats(self) -> dict:
+        requests_sent, connections = self._adapter.connection_counts() if self._adapter else (0, 0)
+        with self._lock:
+            requests_sent += self.httpx_requests
+            connections += self.httpx_connections
+        reused = max(0, requests_sent - connections)
+        return {
+            "poolSize": self.pool_size,
+            "http2": self.http2,
+            "connectTimeout": self.connect_timeout,
+            "readTimeout": self.read_timeout,
+            "requests": requests_sent,
+            "newConnections": connections,
+            "reuseRatio": round(reused / requests_sent, 4) if requests_sent else 0.0,
+        }
+
+
+def _h2_available(name: str) -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print(f"HTTP/2 requested for {name} but the h2 package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+def _setting(name: str, key: str, default: str) -> str:
+    return os.getenv(f"{key}_{name.upper()}") or os.getenv(key) or default
+
+
+class TransportPool:
+    """One HostTransport per upstream name, configured from the environment"""
+
+    def __init__(self):
+        self._transports: Dict[str, HostTransport] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> HostTransport:
+        with self._lock:
+            transport = self._transports.get(name)
+            if transport is None:
+                transport = self._transports[name] = HostTransport(
+                    name,
+                    pool_size=int(_setting(name, "HTTP_POOL_SIZE", "16")),
+                    connect_timeout=float(_setting(name, "HTTP_CONNECT_TIMEOUT", "5")),
+                    read_timeout=float(os.getenv(f"HTTP_READ_TIMEOUT_{name.upper()}") or READ_TIMEOUTS.get(name, 30.0)),
+                    keepalive_expiry=float(_setting(name, "HTTP_KEEPALIVE_EXPIRY", "60")),
+                    http2=_setting(name, "HTTP2", "0") == "1",
+                )
+            return transport
+
+    async def aclose(self):
+        with self._lock:
+            transports = list(self._transports.values())
+        for transport in transports:
+            await transport.aclose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            transports = dict(self._transports)
+        return {name: transport.stats() for name, transport in transports.items()}
+
+
+# Shared by index, new and the model backends
+transports = TransportPool()
@@ -1,22 +1,262 @@
 import os
 import json
+import math
 import time
-import requests
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from groq import Groq
-from new import get_news_lines
+from new import get_news_lines, get_news_cache_stats, normalize_query
+from llm_cache import cache_from_env
+from insights import InsightsAccumulator, topic_matcher_from_env
+from insights_store import InsightsStore
+from groq_guard import GroqGuard
+from http_pool import transports
+from market_index import ResolvedMarketIndex
+from market_store import MarketStore
+from metrics import FALLBACK_SIGNALS, outbound, record_outbound, registry, timed
+from model_backends import GroqBackend, ModelRouter, parse_backend_spec
+from prompt_builder import PromptBuilder, PromptSection, TokenUsage
+from question_index import SimilarQuestionIndex
+from pool_store import PoolStore, implied_prices, parimutuel_multiple
+from signal_store import SignalStore
+from signal_parser import as_probability, extract_signal_fields, parse_signal_text
+from singleflight import SingleFlight
+from jobs import ACTIVE_STATUSES, JobCancelled, JobManager
+from agent_pool import AgentError, AgentPool, AgentTimeout
+from simulator import PredictionMatrix, PredictionStore, iter_simulate, simulate, trade_records
+from sweep import RANK_KEYS, SWEEP_MAX_COMBINATIONS, build_grid, grid_size, parse_range, run_sweep
 from dotenv import load_dotenv
 
 
 load_dotenv()
 app = Flask(__name__)
 CORS(app)
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+# Groq guard: shared per-minute request/token buckets (Groq's free-tier limits for
+# llama-3.3-70b by default, 0 = unlimited), jittered retries within a retry budget and
+# a per-backend circuit breaker. Interactive calls wait at most GROQ_MAX_QUEUE_WAIT
+# seconds for the limiter; backtests leave GROQ_INTERACTIVE_RESERVE of it to them
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "15"))
+def make_guard(requests_per_minute, tokens_per_minute):
+    return GroqGuard(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_queue_wait=float(os.getenv("GROQ_MAX_QUEUE_WAIT", "5")),
+        interactive_reserve=float(os.getenv("GROQ_INTERACTIVE_RESERVE", "0.25")),
+        max_attempts=int(os.getenv("GROQ_MAX_ATTEMPTS", "3")),
+        retry_ratio=float(os.getenv("GROQ_RETRY_RATIO", "0.2")),
+        failure_threshold=int(os.getenv("GROQ_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("GROQ_BREAKER_RESET", "30")),
+    )
+
+groq_guard = make_guard(float(os.getenv("GROQ_RPM", "30")), float(os.getenv("GROQ_TPM", "12000")))
+# Retries are done by groq_guard, not the SDK
+client = Groq(api_key=os.getenv("GROQ_API_KEY"), timeout=GROQ_TIMEOUT, max_retries=0,
+              http_client=transports.get("groq").client)
+
+# LLM settings for generate_signal; identical prompts are served from llm_cache
+LLM_MODEL = "llama-3.3-70b-versatile"
+LLM_TEMPERATURE = 0.1  # Lower temperature for more consistent JSON
+LLM_MAX_TOKENS = 200   # Shorter response to focus on JSON
+# Stream completions and stop as soon as the signal fields are parsed (LLM_STREAM=0 waits
+# for the whole answer, in Groq's JSON response mode unless LLM_JSON_MODE=0)
+LLM_STREAM = os.getenv("LLM_STREAM", "1") != "0"
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") != "0"
+llm_cache = cache_from_env()
+
+# Signal prompt: the instructions, guidelines and reference indicators never change, so
+# they are assembled and counted once; news and backtest insights fill the rest of the budget
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+SIGNAL_REFERENCE_DATA = [
+    "Bitcoin hits $69,200 amid ETF optimism.",
+    "Some traders expect pullback after short-term rally.",
+    "Whales are accumulating Bitcoin heavily again",
+    "Regulators delay altcoin ETF decision, BTC unaffected.",
+    "Market fear and greed index shows 82 (extreme greed)."
+]
+BACKTEST_CALIBRATION_NOTE = (
+    "Note: Use your historical performance data to calibrate your confidence. If you performed well on "
+    "similar topics, you can be more confident. If you struggled, be more cautious."
+)
+signal_prompt = PromptBuilder(
+    system="You are a market prediction AI agent. Always respond with valid JSON only.",
+    prefix="""You are a market prediction AI agent. You MUST respond with ONLY valid JSON.
+
+Analyze the question and context, then return your assessment in this exact JSON format:
+{
+  "yes_probability": 0.75,
+  "reason": "Brief explanation of key signals"
+}
+
+Guidelines:
+- yes_probability: number between 0.0 and 1.0
+- 0.9-1.0: very strong positive evidence
+- 0.7-0.9: moderate positive evidence
+- 0.4-0.7: neutral/mixed signals
+- 0.1-0.4: moderate negative evidence
+- 0.0-0.1: strong negative evidence
+- reason: short explanation (max 50 words)
+
+Current Market Context:
+📊 Market Indicators:
+""" + "\n".join(f"  - {line}" for line in SIGNAL_REFERENCE_DATA),
+    suffix="Respond with ONLY the JSON object, no other text:",
+    budget=PROMPT_TOKEN_BUDGET,
+)
+token_usage = TokenUsage()
+
+# Signal completion backends: comma-separated `model` or `model@base_url|API_KEY_ENV` (any Groq-compatible
+# API). LLM_ROUTER_MODE=hedged races the next backend when the first is slower than its
+# LLM_HEDGE_PERCENTILE latency; ensemble averages yes_probability within LLM_ENSEMBLE_DEADLINE
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", LLM_MODEL)
+LLM_ROUTER_MODE = os.getenv("LLM_ROUTER_MODE", "single")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "2.0"))  # Until enough latencies are observed
+LLM_ENSEMBLE_DEADLINE = float(os.getenv("LLM_ENSEMBLE_DEADLINE", "8"))
+
+# Backends on other endpoints (`model@base_url`) get a guard per base_url, so Groq's
+# limits, retry budget and breakers are not spent on them. LLM_ENDPOINT_RPM/TPM limit
+# each of those endpoints (0 = unlimited)
+LLM_ENDPOINT_RPM = float(os.getenv("LLM_ENDPOINT_RPM", "0"))
+LLM_ENDPOINT_TPM = float(os.getenv("LLM_ENDPOINT_TPM", "0"))
+endpoint_guards = {}  # base_url -> GroqGuard
+
+def build_model_backends():
+    backends = []
+    for name, model, base_url, api_key_env in parse_backend_spec(LLM_BACKENDS):
+        if base_url is None:
+            guard = groq_guard
+        else:
+            if base_url not in endpoint_guards:
+                endpoint_guards[base_url] = make_guard(LLM_ENDPOINT_RPM, LLM_ENDPOINT_TPM)
+            guard = endpoint_guards[base_url]
+        backends.append(GroqBackend(
+            name, model,
+            # "" rather than None: the SDK would fall back to GROQ_API_KEY
+            api_key=os.getenv(api_key_env, "") if api_key_env else "",
+            base_url=base_url,
+            temperature=LLM_TEMPERATURE,
+            max_tokens=LLM_MAX_TOKENS,
+            stream=LLM_STREAM,
+            json_mode=LLM_JSON_MODE,
+            token_usage=token_usage,
+            guard=guard,
+            timeout=GROQ_TIMEOUT,
+            transport=transports.get("groq"),
+            # The default endpoint and key share the module-level client
+            client=client if base_url is None and api_key_env == "GROQ_API_KEY" else None,
+        ))
+    return backends
+
+model_router = ModelRouter(
+    build_model_backends(),
+    mode=LLM_ROUTER_MODE,
+    hedge_percentile=LLM_HEDGE_PERCENTILE,
+    hedge_delay=LLM_HEDGE_DELAY,
+    ensemble_deadline=LLM_ENSEMBLE_DEADLINE,
+)
+
+# Topic dictionary for per-topic backtest accuracy (INSIGHTS_TOPICS_PATH, JSON {topic: [phrases]})
+topic_matcher = topic_matcher_from_env()
+
+# Identical concurrent signal questions / backtest runs share one in-flight computation
+signal_flight = SingleFlight("signal")
+backtest_flight = SingleFlight("backtest")
 
 # Envio GraphQL endpoint
-ENVIO_GRAPHQL_URL = "https://indexer.dev.hyperindex.xyz/2d0d192/v1/graphql"
+ENVIO_GRAPHQL_URL = os.getenv("ENVIO_GRAPHQL_URL", "https://indexer.dev.hyperindex.xyz/2d0d192/v1/graphql")
+
+# Backtest fan-out: how many markets are scored in parallel and how many
+# generate_signal calls per second we allow towards NewsAPI/Groq
+BACKTEST_MAX_WORKERS = int(os.getenv("BACKTEST_MAX_WORKERS", "4"))
+BACKTEST_MAX_RPS = float(os.getenv("BACKTEST_MAX_RPS", "2"))
+# How often a cancellable backtest checks its cancel event while waiting for a prediction
+CANCEL_POLL_SECONDS = 0.5
+BACKTEST_MARKET_LIMIT = 20  # Test on last 20 resolved markets
+
+# Batch signals: items per request and unique questions evaluated in parallel
+SIGNAL_BATCH_MAX_ITEMS = int(os.getenv("SIGNAL_BATCH_MAX_ITEMS", "100"))
+SIGNAL_BATCH_WORKERS = int(os.getenv("SIGNAL_BATCH_WORKERS", "8"))
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls out to at most `rate` per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+# Local market mirror: synced incrementally from Envio, queried for backtests
+MARKET_DB_PATH = os.getenv("MARKET_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "markets.sqlite3"))
+MARKET_SYNC_INTERVAL = float(os.getenv("MARKET_SYNC_INTERVAL", "60"))
+
+def envio_query(query):
+    """POST a GraphQL query to Envio and return its data (None on failure)"""
+    started = time.perf_counter()
+    data = _envio_query(query)
+    record_outbound("envio", time.perf_counter() - started, data is not None)
+    return data
+
+def _envio_query(query):
+    try:
+        # Pooled keep-alive session; timeouts come from HTTP_*_TIMEOUT_ENVIO (30s read by default)
+        response = transports.get("envio").session.post(
+            ENVIO_GRAPHQL_URL,
+            json={"query": query},
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        if "errors" in data:
+            print(f"GraphQL errors: {data['errors']}")
+            return None
+            
+        return data.get("data", {})
+        
+    except Exception as e:
+        print(f"Error querying Envio: {e}")
+        return None
+
+market_store = MarketStore(MARKET_DB_PATH, envio_query, page_size=int(os.getenv("MARKET_SYNC_PAGE_SIZE", "500")))
+
+# Parimutuel pool totals folded incrementally from BetPlaced events
+pool_store = PoolStore(
+    os.getenv("POOL_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "pools.sqlite3")),
+    envio_query,
+    page_size=int(os.getenv("POOL_SYNC_PAGE_SIZE", "1000")),
+    bucket_blocks=int(os.getenv("POOL_BUCKET_BLOCKS", "1000")),
+    amount_decimals=int(os.getenv("POOL_AMOUNT_DECIMALS", "8")),  # tinybars -> HBAR
+)
+
+# Every backtest's LLM predictions are merged into one saved matrix, so strategies
+# can be re-simulated (/api/backtest/simulate) without asking the LLM again
+prediction_store = PredictionStore(os.getenv("PREDICTION_MATRIX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "predictions.npz")))
+
+# Signal prompts with backtest context list the SIMILAR_MARKETS_K resolved markets most like
+# the question (BM25 over the local store), their outcomes and whether the model called them
+SIMILAR_MARKETS_K = int(os.getenv("SIMILAR_MARKETS_K", "3"))
+market_index = ResolvedMarketIndex(
+    market_store.resolved_markets,
+    budget_ms=float(os.getenv("SIMILAR_MARKETS_BUDGET_MS", "10")),
+    min_similarity=float(os.getenv("SIMILAR_MARKETS_MIN_SIMILARITY", "0.3")),
+)
 
 def fetch_historical_markets():
     """Fetch historical market data from Envio GraphQL endpoint"""
@@ -43,52 +283,47 @@ def fetch_historical_markets():
     }
     """
     
+    with timed("fetch_historical_markets"):
+        return envio_query(query)
+
+def sync_markets(force=False):
+    """Incrementally sync the local market store, at most once per MARKET_SYNC_INTERVAL"""
+    if not force and time.time() - market_store.last_attempt_at < MARKET_SYNC_INTERVAL:
+        return None
     try:
-        response = requests.post(
-            ENVIO_GRAPHQL_URL,
-            json={"query": query},
-            headers={"Content-Type": "application/json"},
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        if "errors" in data:
-            print(f"GraphQL errors: {data['errors']}")
-            return None
-            
-        return data.get("data", {})
-        
+        stats = market_store.sync()
+        stats["pools"] = pool_store.sync()
+        if stats["newResolutions"] and market_index.loaded:
+            market_index.refresh()
+        if stats["newQuestions"] or stats["newResolutions"] or stats["pools"]["newBets"]:
+            print(f"Market sync: {stats['newQuestions']} new questions, {stats['newResolutions']} new resolutions, "
+                  f"{stats['pools']['newBets']} new bets")
+        return stats
     except Exception as e:
-        print(f"Error fetching historical markets: {e}")
+        # Offline or indexer down: keep serving whatever is already synced
+        print(f"Error syncing markets: {e}")
         return None
 
+def attach_pools(markets):
+    """Add final parimutuel pools and implied prices (None when nobody bet) to market dicts"""
+    pools = pool_store.pools(m["questionId"] for m in markets)
+    for market in markets:
+        outcome_pools = pools.get(str(market["questionId"]))
+        if outcome_pools:
+            outcome_pools = outcome_pools + [0.0] * (len(market.get("outcomeNames") or []) - len(outcome_pools))
+        market["outcomePools"] = outcome_pools
+        market["impliedPrices"] = implied_prices(outcome_pools)
+    return markets
+
 def get_resolved_markets():
-    """Get markets that have been resolved with their outcomes"""
-    data = fetch_historical_markets()
-    if not data:
-        return []
-    
-    questions = {q["questionId"]: q for q in data.get("ParimutuelPredictionMarket_QuestionAdded", [])}
-    resolutions = {r["questionId"]: r for r in data.get("ParimutuelPredictionMarket_MarketResolved", [])}
-    
-    resolved_markets = []
-    for question_id, question in questions.items():
-        if question_id in resolutions:
-            resolution = resolutions[question_id]
-            winning_outcome = int(resolution["winningOutcome"])
-            
-            resolved_markets.append({
-                "questionId": question_id,
-                "question": question["question"],
-                "outcomeNames": question["outcomeNames"],
-                "winningOutcome": winning_outcome,
-                "winningOutcomeName": question["outcomeNames"][winning_outcome] if winning_outcome < len(question["outcomeNames"]) else "Unknown",
-                "endTime": int(question["endTime"]),
-                "isResolved": True
-            })
-    
-    return resolved_markets
+    """Get markets that have been resolved with their outcomes and final pools"""
+    sync_markets()
+    return attach_pools(market_store.resolved_markets())
+
+def get_open_markets():
+    """Markets still open for betting (endTime ahead, soonest first) with their current pools"""
+    sync_markets()
+    return attach_pools(market_store.open_markets())
 
 def analyze_backtest_insights(backtest_results):
     """Analyze backtest results and extract key insights for future predictions"""
@@ -96,88 +331,13 @@ def analyze_backtest_insights(backtest_results):
         return None
     
     summary = backtest_results.get("summary", {})
-    results = backtest_results.get("results", [])
-    
-    if not results:
-        return None
-    
-    # Basic performance metrics
-    accuracy = summary.get("accuracy", 0)
-    roi = summary.get("roi", 0)
-    total_bets = summary.get("totalBets", 0)
-    winning_bets = summary.get("winningBets", 0)
-    
-    # Analyze confidence levels vs outcomes
-    high_conf_correct = 0
-    high_conf_total = 0
-    low_conf_correct = 0
-    low_conf_total = 0
-    
-    # Analyze recent performance (last 5 trades)
-    recent_results = results[-5:] if len(results) >= 5 else results
-    recent_correct = sum(1 for r in recent_results if r.get("aiCorrect", False))
-    recent_accuracy = (recent_correct / len(recent_results) * 100) if recent_results else 0
-    
-    # Categorize by confidence levels
-    for result in results:
-        confidence = result.get("aiConfidence", 0.5)
-        is_correct = result.get("aiCorrect", False)
-        
-        if confidence >= 0.7:  # High confidence
-            high_conf_total += 1
-            if is_correct:
-                high_conf_correct += 1
-        elif confidence <= 0.3:  # Low confidence (betting NO)
-            low_conf_total += 1
-            if is_correct:
-                low_conf_correct += 1
-    
-    high_conf_accuracy = (high_conf_correct / high_conf_total * 100) if high_conf_total > 0 else 0
-    low_conf_accuracy = (low_conf_correct / low_conf_total * 100) if low_conf_total > 0 else 0
-    
-    # Identify question patterns (simple keyword analysis)
-    question_keywords = {}
-    for result in results:
-        question = result.get("question", "").lower()
-        is_correct = result.get("aiCorrect", False)
-        
-        # Extract key terms
-        keywords = ["bitcoin", "crypto", "ethereum", "election", "political", "sports", "market", "price"]
-        for keyword in keywords:
-            if keyword in question:
-                if keyword not in question_keywords:
-                    question_keywords[keyword] = {"total": 0, "correct": 0}
-                question_keywords[keyword]["total"] += 1
-                if is_correct:
-                    question_keywords[keyword]["correct"] += 1
-    
-    # Calculate accuracy by keyword
-    keyword_performance = {}
-    for keyword, stats in question_keywords.items():
-        if stats["total"] >= 2:  # Only include if we have at least 2 samples
-            keyword_performance[keyword] = {
-                "accuracy": (stats["correct"] / stats["total"] * 100),
-                "total": stats["total"]
-            }
-    
-    insights = {
-        "overall_accuracy": round(accuracy, 2),
-        "roi": round(roi, 2),
-        "total_bets": total_bets,
-        "winning_bets": winning_bets,
-        "recent_accuracy": round(recent_accuracy, 2),
-        "recent_trades": len(recent_results),
-        "high_confidence_accuracy": round(high_conf_accuracy, 2),
-        "high_confidence_count": high_conf_total,
-        "low_confidence_accuracy": round(low_conf_accuracy, 2),
-        "low_confidence_count": low_conf_total,
-        "keyword_performance": keyword_performance
-    }
-    
-    return insights
+    accumulator = InsightsAccumulator(topic_matcher, summary.get("initialCapital", 1000))
+    accumulator.extend(backtest_results.get("results", []))
+    return accumulator.insights()
 
-def format_backtest_summary(insights):
-    """Format backtest insights into a concise text summary for LLM context"""
+def format_backtest_summary(insights, topics=True):
+    """Format backtest insights into a concise text summary for LLM context
+    (topics=False leaves out the keyword topics, e.g. when similar markets are listed instead)"""
     if not insights:
         return ""
     
@@ -194,7 +354,7 @@ def format_backtest_summary(insights):
         summary_lines.append(f"- High Confidence (>70%) Accuracy: {insights['high_confidence_accuracy']}% ({insights['high_confidence_count']} trades)")
     
     # Keyword-specific performance
-    keyword_perf = insights.get('keyword_performance', {})
+    keyword_perf = insights.get('keyword_performance', {}) if topics else None
     if keyword_perf:
         summary_lines.append(f"- Topic-Specific Performance:")
         for keyword, stats in sorted(keyword_perf.items(), key=lambda x: x[1]['accuracy'], reverse=True)[:3]:
@@ -202,10 +362,85 @@ def format_backtest_summary(insights):
     
     return "\n".join(summary_lines)
 
-def run_backtest(markets=None, initial_capital=1000, bet_size_percent=10):
-    """Run backtesting on historical markets"""
+def predict_market(market, limiter=None):
+    """Get a blind AI prediction for a single historical market (None on failure)"""
+    if limiter:
+        limiter.wait()
+    try:
+        # The crowd's implied YES price from the final pools; 50/50 when nobody bet
+        prices = market.get("impliedPrices")
+        # Don't use backtest context during backtesting (would be circular); the Groq
+        # limiter keeps part of its budget for interactive signals while backtests run
+        with groq_guard.background():
+            result = generate_signal(
+                question=market["question"],
+                data_sources=[],
+                risk_level="medium",
+                market_price=prices[0] if prices else 0.5,
+                backtest_context=None  # Don't use backtest data during backtesting
+            )
+    except Exception as e:
+        print(f"Error predicting market {market.get('questionId')}: {e}")
+        return None
+    # A fallback HOLD is not a prediction: the market stays unscored
+    return None if result.get("degraded") else result
+
+def iter_predictions(markets, max_workers=None, max_rps=None, cancelled=None):
+    """Score markets with bounded concurrency, yielding predictions in market order.
+
+    At most 2 * max_workers predictions are in flight or buffered at a time, so
+    memory stays constant however many markets are scored. With a `cancelled`
+    event, JobCancelled is raised within CANCEL_POLL_SECONDS of it being set, even
+    while a slow prediction is still being waited for.
+    """
+    max_workers = max_workers or BACKTEST_MAX_WORKERS
+    limiter = RateLimiter(BACKTEST_MAX_RPS if max_rps is None else max_rps)
+    
+    def check_cancelled():
+        if cancelled is not None and cancelled.is_set():
+            raise JobCancelled()
+    
+    if max_workers <= 1 or len(markets) <= 1:
+        for market in markets:
+            check_cancelled()
+            yield predict_market(market, limiter)
+        return
+    
+    def result(future):
+        if cancelled is not None:
+            while not wait((future,), timeout=CANCEL_POLL_SECONDS).done:
+                check_cancelled()
+        return future.result()
+    
+    window = 2 * max_workers
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(markets)))
+    try:
+        pending = deque()
+        for market in markets:
+            check_cancelled()
+            pending.append(executor.submit(predict_market, market, limiter))
+            if len(pending) >= window:
+                yield result(pending.popleft())
+        while pending:
+            yield result(pending.popleft())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def collect_predictions(markets, max_workers=None, max_rps=None):
+    """Score markets with bounded concurrency, returning predictions in market order"""
+    return list(iter_predictions(markets, max_workers=max_workers, max_rps=max_rps))
+
+def run_backtest(markets=None, initial_capital=1000, bet_size_percent=10, max_workers=None, max_rps=None):
+    """Run backtesting on historical markets (identical concurrent runs share one execution)"""
+    market_key = None if markets is None else tuple(m["questionId"] for m in markets)
+    key = (market_key, initial_capital, bet_size_percent)
+    with timed("run_backtest"):
+        return backtest_flight.do(key, _run_backtest, markets, initial_capital, bet_size_percent, max_workers, max_rps)
+
+def _run_backtest(markets=None, initial_capital=1000, bet_size_percent=10, max_workers=None, max_rps=None):
     if markets is None:
-        markets = get_resolved_markets()
+        with timed("backtest.load_markets"):
+            markets = get_resolved_markets()
     
     if not markets:
         return {
@@ -214,299 +449,361 @@ def run_backtest(markets=None, initial_capital=1000, bet_size_percent=10):
         }
     
     # Limit to recent markets for faster testing
-    markets = markets[:20]  # Test on last 20 resolved markets
+    markets = markets[:BACKTEST_MARKET_LIMIT]
     
-    results = []
-    total_capital = initial_capital
-    total_bets = 0
-    winning_bets = 0
-    total_profit = 0
-    
-    for market in markets:
-        try:
-            # Get AI prediction for this market (blind - without knowing outcome)
-            # Don't use backtest context during backtesting (would be circular)
-            ai_result = generate_signal(
-                question=market["question"],
-                data_sources=[],
-                risk_level="medium",
-                market_price=0.5,  # Assume 50/50 for backtesting
-                backtest_context=None  # Don't use backtest data during backtesting
-            )
-            
-            if not ai_result["success"]:
-                continue
-                
-            ai_confidence = ai_result["signal"]["confidence"]
-            ai_direction = ai_result["signal"]["direction"]
-            
-            # Determine bet based on AI prediction
-            bet_amount = total_capital * (bet_size_percent / 100)
-            if bet_amount < 1:  # Minimum bet
-                bet_amount = 1
-                
-            # Simulate betting on "Yes" outcome (index 0)
-            # In real markets, you'd bet on the outcome you think will win
-            bet_on_yes = ai_confidence > 0.5
-            
-            # Check if AI was correct
-            actual_winner = market["winningOutcome"]
-            ai_correct = (bet_on_yes and actual_winner == 0) or (not bet_on_yes and actual_winner != 0)
-            
-            # Calculate profit/loss
-            if ai_correct:
-                # Assume 2x return for correct prediction (simplified)
-                profit = bet_amount * 1.0  # 100% profit
-                total_capital += profit
-                winning_bets += 1
-            else:
-                # Lose the bet
-                total_capital -= bet_amount
-                profit = -bet_amount
-            
-            total_profit += profit
-            total_bets += 1
-            
-            results.append({
-                "questionId": market["questionId"],
-                "question": market["question"],
-                "aiConfidence": ai_confidence,
-                "aiDirection": ai_direction,
-                "betOnYes": bet_on_yes,
-                "actualWinner": actual_winner,
-                "actualWinnerName": market["winningOutcomeName"],
-                "aiCorrect": ai_correct,
-                "betAmount": bet_amount,
-                "profit": profit,
-                "capitalAfter": total_capital,
-                "timestamp": market["endTime"]
-            })
-            
-        except Exception as e:
-            print(f"Error processing market {market['questionId']}: {e}")
-            continue
-    
-    # Calculate performance metrics
-    accuracy = (winning_bets / total_bets * 100) if total_bets > 0 else 0
-    roi = ((total_capital - initial_capital) / initial_capital * 100) if initial_capital > 0 else 0
+    # Fan the LLM calls out first; capital only compounds once every prediction is in
+    with timed("backtest.predict"):
+        predictions = collect_predictions(markets, max_workers=max_workers, max_rps=max_rps)
+    matrix = save_predictions(markets, predictions)
     
+    with timed("backtest.simulate"):
+        result = simulate_matrix(matrix, initial_capital, bet_size_percent)
+    result["summary"]["maxWorkers"] = max_workers or BACKTEST_MAX_WORKERS
+    return result
+
+def save_predictions(markets, predictions):
+    """Merge a backtest's predictions into the saved matrix and return this run's matrix"""
+    matrix = PredictionMatrix.from_predictions(markets, predictions)
+    with timed("backtest.save_predictions"):
+        prediction_store.add(matrix)
+    return matrix
+
+def simulate_matrix(matrix, initial_capital=1000, bet_size_percent=10, payout=2.0, payout_model="parimutuel"):
+    """Run the vectorized strategy simulator over a prediction matrix (no LLM calls)"""
+    simulation = simulate(matrix, initial_capital, bet_size_percent, payout, payout_model=payout_model)
     return {
         "success": True,
-        "summary": {
-            "totalMarkets": len(markets),
-            "totalBets": total_bets,
-            "winningBets": winning_bets,
-            "accuracy": round(accuracy, 2),
-            "initialCapital": initial_capital,
-            "finalCapital": round(total_capital, 2),
-            "totalProfit": round(total_profit, 2),
-            "roi": round(roi, 2),
-            "betSizePercent": bet_size_percent
-        },
-        "results": results
+        "summary": simulation["summary"],
+        "results": trade_records(matrix, simulation)
     }
 
-def generate_signal(question, data_sources, risk_level, market_price=0.65, backtest_context=None):
-    """Generate trading signal based on question and data sources"""
-    
-    # 1. Pull live news from NewsAPI (limit to 2 lines for token efficiency)
-    news_lines = get_news_lines(question, max_items=2)
-    
-    # 2. Always include fallback/reference data (market indicators)
-    reference_data = [
-        "Bitcoin hits $69,200 amid ETF optimism.",
-        "Some traders expect pullback after short-term rally.",
-        "Whales are accumulating Bitcoin heavily again",
-        "Regulators delay altcoin ETF decision, BTC unaffected.",
-        "Market fear and greed index shows 82 (extreme greed)."
-    ]
-    
-    # 3. Combine all data sources
-    all_context_lines = []
+def iter_backtest(markets, predictions, initial_capital=1000, bet_size_percent=10):
+    """Yield ("trade", record) for each scored market, then ("summary", summary).
+
+    predictions may be any iterable aligned with markets (e.g. iter_predictions),
+    so trades stream out as soon as their prediction arrives. Each one is settled by
+    the simulator's own step (iter_simulate), the same as /api/backtest/run.
+    """
+    def rows():
+        for market, ai_result in zip(markets, predictions):
+            try:
+                yield PredictionMatrix.from_predictions([market], [ai_result])
+            except Exception as e:
+                print(f"Error processing market {market.get('questionId')}: {e}")
     
-    # Add news if available (limited to 2 lines)
+    for kind, payload in iter_simulate(rows(), initial_capital, bet_size_percent, payout_model="parimutuel"):
+        if kind == "summary":
+            payload["totalMarkets"] = len(markets)
+        yield kind, payload
+
+def similar_market_evidence(question):
+    """The resolved markets most similar to the question, with the model's saved call on each"""
+    if SIMILAR_MARKETS_K <= 0:
+        return []
+    with timed("signal.retrieve"):
+        matches = market_index.search(question, SIMILAR_MARKETS_K)
+        confidences = prediction_store.confidences() if matches else {}
+    evidence = []
+    for market, similarity in matches:
+        confidence = confidences.get(market["questionId"])
+        evidence.append({
+            "question": market["question"],
+            "outcome": market["winningOutcomeName"],
+            "similarity": similarity,
+            "confidence": confidence,
+            # Same rule as the backtest: YES when confidence > 0.5, correct if outcome 0 won
+            "correct": None if confidence is None else (confidence > 0.5) == (market["winningOutcome"] == 0),
+        })
+    return evidence
+
+def format_similar_markets(evidence):
+    """Header and one line per similar resolved market for the signal prompt"""
+    called = [e for e in evidence if e["correct"] is not None]
+    header = "🔎 Similar Resolved Markets"
+    if called:
+        header += f" (you were right on {sum(e['correct'] for e in called)}/{len(called)}):"
+    else:
+        header += ":"
+    lines = []
+    for e in evidence:
+        line = f'  • "{e["question"]}" → {e["outcome"]}'
+        if e["correct"] is not None:
+            line += f" (you said {e['confidence'] * 100:.0f}% YES, {'correct' if e['correct'] else 'wrong'})"
+        lines.append(line)
+    return header, lines
+
+def build_signal_prompt(question, news_lines, backtest_context=None):
+    """Assemble the chat prompt for a signal, fitting news and backtest insights into PROMPT_TOKEN_BUDGET"""
+    sections = []
     if news_lines:
-        all_context_lines.append("📰 Latest News:")
-        all_context_lines.extend([f"  - {line}" for line in news_lines[:2]])
-    
-    # Always add reference market data
-    all_context_lines.append("\n📊 Market Indicators:")
-    all_context_lines.extend([f"  - {line}" for line in reference_data])
-    
-    context = "\n".join(all_context_lines)
-    
-    # Add backtest context if available (limited to 3 lines)
-    backtest_summary = ""
+        sections.append(PromptSection(
+            "news", [f"  - {line}" for line in news_lines], priority=1, header="📰 Latest News:"
+        ))
     if backtest_context:
-        full_summary = format_backtest_summary(backtest_context)
-        # Limit to first 3 lines for token efficiency
-        summary_lines = full_summary.split('\n')[:3]
-        backtest_summary = '\n'.join(summary_lines)
-    
-    prompt = f"""
-    You are a market prediction AI agent. You MUST respond with ONLY valid JSON.
-
-    Analyze the question and context, then return your assessment in this exact JSON format:
-    {{
-      "yes_probability": 0.75,
-      "reason": "Brief explanation of key signals"
-    }}
-
-    Guidelines:
-    - yes_probability: number between 0.0 and 1.0
-    - 0.9-1.0: very strong positive evidence
-    - 0.7-0.9: moderate positive evidence  
-    - 0.4-0.7: neutral/mixed signals
-    - 0.1-0.4: moderate negative evidence
-    - 0.0-0.1: strong negative evidence
-    - reason: short explanation (max 50 words)
-
-    Question: {question}
-    
-    Current Market Context:
-    {context}
-    """
-    
-    # Add backtest performance context if available
-    if backtest_summary:
-        prompt += f"""
-    
-    {backtest_summary}
-    
-    Note: Use your historical performance data to calibrate your confidence. If you performed well on similar topics, you can be more confident. If you struggled, be more cautious.
-    """
-    
-    prompt += """
+        # Markets like this one say more than keyword topics; the topics stay as the fallback
+        evidence = similar_market_evidence(question)
+        if evidence:
+            header, lines = format_similar_markets(evidence)
+            sections.append(PromptSection("similar", lines, priority=2, header=header))
+        # Summary lines are ordered most useful first; the budget decides how many fit
+        summary_lines = format_backtest_summary(backtest_context, topics=not evidence).split('\n')
+        sections.append(PromptSection(
+            "backtest", summary_lines[1:], priority=3, header=summary_lines[0], footer=BACKTEST_CALIBRATION_NOTE
+        ))
+    return signal_prompt.build(question, sections)
+
+def complete_cached(messages, estimated_tokens=None):
+    """Run a chat completion through the LLM cache and return the raw text"""
+    for model in model_router.cache_models:
+        raw_output = llm_cache.get(llm_cache.make_key(model, LLM_TEMPERATURE, messages))
+        if raw_output is not None:
+            return raw_output
 
-    Respond with ONLY the JSON object, no other text:
+    raw_output, model = model_router.complete_with_model(messages, estimated_tokens)
+    llm_cache.set(llm_cache.make_key(model, LLM_TEMPERATURE, messages), raw_output)
+    return raw_output
+
+def context_fingerprint(backtest_context):
+    """Short stable hash of the backtest insights fed into a prompt"""
+    if not backtest_context:
+        return None
+    return hashlib.sha256(json.dumps(backtest_context, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def evaluate_question(question, backtest_context=None):
+    """Ask the model about a question: returns (yes_probability, reason). Raises on LLM errors.
+    Concurrent callers asking the same question share one NewsAPI + Groq round trip.
     """
+    return signal_flight.do(signal_key(question, backtest_context), _evaluate_question, question, backtest_context)
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a market prediction AI agent. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,  # Lower temperature for more consistent JSON
-            max_tokens=200,   # Shorter response to focus on JSON
-        )
+def signal_key(question, backtest_context=None):
+    """Questions that normalize alike with the same backtest insights share an evaluation"""
+    return (normalize_query(question), context_fingerprint(backtest_context))
 
-        raw_output = response.choices[0].message.content.strip()
-        
-        print(f"Raw AI response: {raw_output}")  # Debug logging
-        
-        # Try to find JSON in the response
-        start = raw_output.find("{")
-        end = raw_output.rfind("}") + 1
-        
-        parsed = None
-        
-        if start != -1 and end > start:
-            json_str = raw_output[start:end]
-            try:
-                parsed = json.loads(json_str)
-                print(f"Successfully parsed JSON: {parsed}")  # Debug logging
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {e}")
-                print(f"Failed to parse: {json_str}")
-        
-        # If parsing failed, try to extract information manually
-        if not parsed:
-            print("Attempting manual parsing...")
-            # Try to extract yes_probability and reason from text
-            yes_prob = 0.5  # Default neutral
-            reason = "Unable to parse AI response, using neutral stance."
-            
-            # Look for probability patterns
-            import re
-            prob_match = re.search(r'(\d+\.?\d*)\s*(?:%|percent)', raw_output.lower())
-            if prob_match:
-                yes_prob = float(prob_match.group(1)) / 100
-            else:
-                # Look for decimal patterns
-                decimal_match = re.search(r'(\d+\.\d+)', raw_output)
-                if decimal_match:
-                    val = float(decimal_match.group(1))
-                    if val <= 1.0:
-                        yes_prob = val
-                    elif val <= 100:
-                        yes_prob = val / 100
-            
-            # Extract reason (first sentence or key phrases)
-            sentences = raw_output.split('.')
-            if sentences:
-                reason = sentences[0].strip()
-                if len(reason) > 100:
-                    reason = reason[:100] + "..."
-            
-            parsed = {"yes_probability": yes_prob, "reason": reason}
-            print(f"Manual parsing result: {parsed}")
-
-        # Ensure we have valid data
-        if "yes_probability" not in parsed:
-            parsed["yes_probability"] = 0.5
-        if "reason" not in parsed:
-            parsed["reason"] = "Analysis completed with neutral stance"
-            
-        confidence_yes = float(parsed["yes_probability"])
-        
-        # Ensure confidence is within valid range
-        if confidence_yes < 0 or confidence_yes > 1:
-            confidence_yes = 0.5
-            parsed["reason"] = "Invalid confidence value, using neutral stance"
-
-        # Risk-based thresholds
-        if risk_level == "low":
-            buy_threshold, sell_threshold = 0.8, 0.4
-        elif risk_level == "medium":
-            buy_threshold, sell_threshold = 0.7, 0.3
-        elif risk_level == "high":
-            buy_threshold, sell_threshold = 0.6, 0.4
-        else:  # very-high
-            buy_threshold, sell_threshold = 0.55, 0.45
-
-        # Determine action
-        decision = "HOLD"
-        if confidence_yes > buy_threshold and confidence_yes > market_price:
-            decision = "BUY"
-        elif confidence_yes < sell_threshold and (1 - market_price) > confidence_yes:
-            decision = "SELL"
-        else:
-            decision = "HOLD"
+def _evaluate_question(question, backtest_context=None):
+    # 1. Pull live news from NewsAPI (limit to 2 lines for token efficiency)
+    with timed("signal.news"):
+        news_lines = get_news_lines(question, max_items=2)
+    with timed("signal.prompt"):
+        prompt = build_signal_prompt(question, news_lines, backtest_context)
+    with timed("signal.llm"):
+        raw_output = complete_cached(prompt.messages, prompt.tokens)
+    with timed("signal.parse"):
+        evaluation = parse_model_output(raw_output)
+    remember_evaluation(question, backtest_context, evaluation)
+    return evaluation
 
-        return {
-            "success": True,
-            "signal": {
-                "direction": decision,
-                "confidence": confidence_yes,
-                "reason": parsed["reason"],
-                "market_price": market_price,
-                "risk_level": risk_level,
-                "timestamp": int(time.time() * 1000)
-            }
-        }
+def generate_signal(question, data_sources, risk_level, market_price=0.65, backtest_context=None):
+    """Generate trading signal based on question and data sources"""
+    try:
+        with timed("generate_signal"):
+            confidence_yes, reason = evaluate_question(question, backtest_context)
+            return decide_signal(confidence_yes, reason, risk_level, market_price)
         
     except Exception as e:
         print(f"Error in generate_signal: {e}")
         # Return a fallback response instead of failing
-        return {
-            "success": True,
-            "signal": {
-                "direction": "HOLD",
-                "confidence": 0.5,
-                "reason": f"AI analysis temporarily unavailable: {str(e)[:50]}...",
-                "market_price": market_price,
-                "risk_level": risk_level,
-                "timestamp": int(time.time() * 1000)
-            }
+        return fallback_signal(e, risk_level, market_price)
+
+def parse_signal_output(raw_output, risk_level, market_price):
+    """Parse the model's JSON answer and turn it into a risk-adjusted signal"""
+    confidence_yes, reason = parse_model_output(raw_output)
+    return decide_signal(confidence_yes, reason, risk_level, market_price)
+
+def parse_model_output(raw_output):
+    """Extract (yes_probability, reason) from the model's raw answer"""
+    parsed = parse_signal_text(raw_output)
+    
+    # If the answer held no JSON, try to extract the information from the text
+    if not parsed:
+        print(f"Could not parse AI response as JSON, extracting manually: {raw_output[:200]!r}")
+        parsed = extract_signal_fields(raw_output)
+
+    # Ensure we have valid data
+    confidence_yes = as_probability(parsed.get("yes_probability", 0.5))
+    reason = parsed.get("reason") or "Analysis completed with neutral stance"
+    
+    # Ensure confidence is within valid range
+    if confidence_yes is None or confidence_yes < 0 or confidence_yes > 1:
+        confidence_yes = 0.5
+        reason = "Invalid confidence value, using neutral stance"
+    
+    return confidence_yes, str(reason)
+
+def decide_signal(confidence_yes, reason, risk_level, market_price):
+    """Apply the risk-level thresholds and market price to a yes probability"""
+    # Risk-based thresholds
+    if risk_level == "low":
+        buy_threshold, sell_threshold = 0.8, 0.4
+    elif risk_level == "medium":
+        buy_threshold, sell_threshold = 0.7, 0.3
+    elif risk_level == "high":
+        buy_threshold, sell_threshold = 0.6, 0.4
+    else:  # very-high
+        buy_threshold, sell_threshold = 0.55, 0.45
+
+    # Determine action
+    decision = "HOLD"
+    if confidence_yes > buy_threshold and confidence_yes > market_price:
+        decision = "BUY"
+    elif confidence_yes < sell_threshold and (1 - market_price) > confidence_yes:
+        decision = "SELL"
+    else:
+        decision = "HOLD"
+
+    return {
+        "success": True,
+        "signal": {
+            "direction": decision,
+            "confidence": confidence_yes,
+            "reason": reason,
+            "market_price": market_price,
+            "risk_level": risk_level,
+            "timestamp": int(time.time() * 1000)
+        }
+    }
+
+def fallback_signal(error, risk_level, market_price):
+    """Neutral HOLD signal returned when the AI call or parsing fails (marked degraded, never saved)"""
+    FALLBACK_SIGNALS.inc()
+    return {
+        "success": True,
+        "degraded": True,
+        "signal": {
+            "direction": "HOLD",
+            "confidence": 0.5,
+            "reason": f"AI analysis temporarily unavailable: {str(error)[:50]}...",
+            "market_price": market_price,
+            "risk_level": risk_level,
+            "timestamp": int(time.time() * 1000)
         }
+    }
+
+def score_insight_markets(markets, initial_capital):
+    """Backtest trade records for newly resolved markets, continuing the insights' capital path"""
+    backtest_results = run_backtest(markets, initial_capital=initial_capital, bet_size_percent=10)
+    return backtest_results.get("results", []) if backtest_results.get("success") else []
+
+# Precomputed backtest insights for includeBacktest requests; newly resolved markets
+# are folded in incrementally by a background thread
+insights_store = InsightsStore(
+    load_markets=get_resolved_markets,
+    score=score_insight_markets,
+    matcher=topic_matcher,
+    path=os.getenv("INSIGHTS_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "backtest_insights.json")),
+    poll_interval=float(os.getenv("INSIGHTS_POLL_INTERVAL", "300")),
+    max_age=float(os.getenv("INSIGHTS_MAX_AGE", str(6 * 3600))),
+    batch_limit=BACKTEST_MARKET_LIMIT,
+)
+
+# Signals for open markets, precomputed in the background and refreshed more often as
+# endTime approaches; requests about those markets are answered from the store while fresh
+SIGNAL_PRECOMPUTE = os.getenv("SIGNAL_PRECOMPUTE", "1") != "0"
+# Also precompute with the current backtest insights (for includeBacktest requests)
+SIGNAL_PRECOMPUTE_BACKTEST = os.getenv("SIGNAL_PRECOMPUTE_BACKTEST", "0") == "1"
+
+def precompute_contexts():
+    contexts = [None]
+    if SIGNAL_PRECOMPUTE_BACKTEST:
+        backtest_context, _ = load_backtest_context(True)
+        if backtest_context:
+            contexts.append(backtest_context)
+    return contexts
+
+def precompute_evaluation(question, backtest_context):
+    # Background work: leaves the Groq limiter's interactive reserve to live requests
+    with groq_guard.background():
+        return evaluate_question(question, backtest_context)
+
+signal_store = SignalStore(
+    load_markets=get_open_markets,
+    evaluate=precompute_evaluation,
+    decide=decide_signal,
+    key_fn=signal_key,
+    contexts=precompute_contexts,
+    risk_levels=[r.strip() for r in os.getenv("SIGNAL_RISK_LEVELS", "low,medium,high").split(",") if r.strip()],
+    base_interval=float(os.getenv("SIGNAL_REFRESH_INTERVAL", "900")),
+    min_interval=float(os.getenv("SIGNAL_REFRESH_MIN", "60")),
+    horizon_fraction=float(os.getenv("SIGNAL_REFRESH_HORIZON", "0.1")),
+    poll_interval=float(os.getenv("SIGNAL_PRECOMPUTE_POLL", "30")),
+    max_markets=int(os.getenv("SIGNAL_PRECOMPUTE_MAX_MARKETS", "200")),
+    max_per_cycle=int(os.getenv("SIGNAL_PRECOMPUTE_PER_CYCLE", "20")),
+)
+
+# Reworded questions ("Will BTC hit $100k before 2025?" after "Will Bitcoin reach
+# $100,000 by end of 2024?") reuse an answer given within SIMILAR_QUESTION_MAX_AGE seconds.
+# Opt-in: only identical canonical wording matches, but aliases can still be too generous
+SIMILAR_QUESTIONS = os.getenv("SIMILAR_QUESTIONS", "0") != "0"
+similar_questions = SimilarQuestionIndex(
+    max_age=float(os.getenv("SIMILAR_QUESTION_MAX_AGE", "900")),
+    max_entries=int(os.getenv("SIMILAR_QUESTION_MAX_ENTRIES", "100000")),
+)
+
+def remember_evaluation(question, backtest_context, evaluation):
+    """Index a fresh (yes_probability, reason) so paraphrases of the question can reuse it"""
+    if SIMILAR_QUESTIONS:
+        similar_questions.add(question, evaluation, context_fingerprint(backtest_context))
+
+def stored_signal(question, backtest_context=None):
+    """A reusable evaluation, or None to compute on demand: a fresh precomputed one for an open
+    market, else a recent answer to a reworded copy of the question.
+    Returns (yes_probability, reason, fields that tell the response where it came from).
+    """
+    if SIGNAL_PRECOMPUTE:
+        signal_store.start()
+        entry = signal_store.lookup(question, backtest_context)
+        if entry is not None:
+            return entry["yesProbability"], entry["reason"], {"precomputed": signal_store.describe(entry)}
+    if SIMILAR_QUESTIONS:
+        match = similar_questions.find(question, context_fingerprint(backtest_context))
+        if match is not None:
+            entry, similarity = match
+            confidence_yes, reason = entry["result"]
+            return confidence_yes, reason, {"similar_question": {
+                "question": entry["question"],
+                "similarity": similarity,
+                "ageSeconds": round(time.time() - entry["storedAt"], 1),
+            }}
+    return None
+
+def serve_stored_signal(stored, risk_level, market_price):
+    """Signal response from a reused evaluation, for the caller's risk level and price"""
+    confidence_yes, reason, source = stored
+    result = decide_signal(confidence_yes, reason, risk_level, market_price)
+    result.update(source)
+    return result
+
+def load_backtest_context(include_backtest):
+    """Read the precomputed insights snapshot for a signal request: (insights, snapshot)"""
+    if not include_backtest:
+        return None, None
+    insights_store.start()
+    snapshot = insights_store.get()
+    if not snapshot:
+        return None, None
+    return snapshot["insights"], snapshot
+
+def annotate_signal_result(result, include_backtest, backtest_context, snapshot):
+    """Add info about whether (and which) backtest context was used"""
+    result["backtest_used"] = include_backtest and backtest_context is not None
+    if backtest_context:
+        result["backtest_summary"] = {
+            "accuracy": backtest_context.get("overall_accuracy"),
+            "roi": backtest_context.get("roi"),
+            "total_bets": backtest_context.get("total_bets"),
+            "version": snapshot["version"],
+            "age_seconds": insights_store.age_seconds()
+        }
+    elif include_backtest:
+        result["backtest_status"] = "warming"  # First snapshot is still being computed
+    return result
 
 @app.route('/api/generate-signal', methods=['POST'])
 def api_generate_signal():
     """API endpoint to generate trading signals"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"success": False, "error": "Request body must be a JSON object"}), 400
         
         question = data.get('question', '')
         data_sources = data.get('dataSources', [])
@@ -517,58 +814,428 @@ def api_generate_signal():
         if not question:
             return jsonify({"success": False, "error": "Question is required"}), 400
         
-        # Get backtest context if requested
-        backtest_context = None
-        if include_backtest:
-            # Run a quick backtest to get insights
-            backtest_results = run_backtest(initial_capital=1000, bet_size_percent=10)
-            if backtest_results.get("success"):
-                backtest_context = analyze_backtest_insights(backtest_results)
+        # Read precomputed backtest insights if requested (never backtest on the request path)
+        backtest_context, snapshot = load_backtest_context(include_backtest)
         
-        result = generate_signal(question, data_sources, risk_level, market_price, backtest_context)
+        stored = stored_signal(question, backtest_context)
+        if stored is not None:
+            result = serve_stored_signal(stored, risk_level, market_price)
+        else:
+            result = generate_signal(question, data_sources, risk_level, market_price, backtest_context)
         
         if result["success"]:
-            # Add info about whether backtest context was used
-            result["backtest_used"] = include_backtest and backtest_context is not None
-            if backtest_context:
-                result["backtest_summary"] = {
-                    "accuracy": backtest_context.get("overall_accuracy"),
-                    "roi": backtest_context.get("roi"),
-                    "total_bets": backtest_context.get("total_bets")
-                }
-            return jsonify(result)
+            return jsonify(annotate_signal_result(result, include_backtest, backtest_context, snapshot))
         else:
             return jsonify(result), 500
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+def validate_backtest_params(data):
+    """Validate a backtest request body: returns (run_backtest kwargs, error message)"""
+    if not isinstance(data, dict):
+        return None, "Request body must be a JSON object"
+    initial_capital = data.get('initialCapital', 1000)
+    bet_size_percent = data.get('betSizePercent', 10)
+    max_workers = data.get('maxWorkers')
+    max_rps = data.get('maxRps')
+    
+    if not is_number(initial_capital) or initial_capital <= 0:
+        return None, "Initial capital must be a positive number"
+    
+    if not is_number(bet_size_percent) or bet_size_percent <= 0 or bet_size_percent > 100:
+        return None, "Bet size must be between 1-100%"
+    
+    if max_workers is not None and (not isinstance(max_workers, int) or isinstance(max_workers, bool)
+                                    or max_workers < 1 or max_workers > 32):
+        return None, "maxWorkers must be an integer between 1-32"
+    
+    if max_rps is not None and (not is_number(max_rps) or max_rps < 0):
+        return None, "maxRps must be a non-negative number (0 = unlimited)"
+    
+    return {
+        "initial_capital": initial_capital,
+        "bet_size_percent": bet_size_percent,
+        "max_workers": max_workers,
+        "max_rps": max_rps
+    }, None
+
+def validate_sweep_params(data):
+    """Validate a sweep request body: returns (ranges and run_sweep kwargs, error message)"""
+    ranges = {}
+    for field, default in (('betSizePercent', 10), ('buyThreshold', 0.5), ('sellThreshold', 0.5), ('kellyFraction', 0)):
+        try:
+            ranges[field] = parse_range(data.get(field, default))
+        except (ValueError, TypeError, KeyError) as e:
+            return None, f"Invalid {field} range: {e}"
+        if not ranges[field]:
+            return None, f"{field} needs at least one value"
+    
+    initial_capital = data.get('initialCapital', 1000)
+    payout = data.get('payout', 2.0)
+    top = data.get('top', 20)
+    workers = data.get('workers')
+    rank_by = data.get('rankBy', 'roi')
+    payout_model = data.get('payoutModel', 'parimutuel')
+    
+    if not is_number(initial_capital) or initial_capital <= 0:
+        return None, "Initial capital must be a positive number"
+    if not is_number(payout) or payout <= 0:
+        return None, "payout must be a positive number"
+    if any(b <= 0 or b > 100 for b in ranges['betSizePercent']):
+        return None, "Bet size must be between 1-100%"
+    if any(t < 0 or t > 1 for t in ranges['buyThreshold'] + ranges['sellThreshold']):
+        return None, "Thresholds must be between 0 and 1"
+    if any(k < 0 for k in ranges['kellyFraction']):
+        return None, "kellyFraction must be non-negative"
+    if grid_size(*ranges.values()) > SWEEP_MAX_COMBINATIONS:
+        return None, f"Too many combinations ({grid_size(*ranges.values())}); the limit is {SWEEP_MAX_COMBINATIONS}"
+    if not isinstance(top, int) or isinstance(top, bool) or top < 0:
+        return None, "top must be a non-negative integer (0 = all rows)"
+    if workers is not None and (not isinstance(workers, int) or isinstance(workers, bool) or workers < 1 or workers > 32):
+        return None, "workers must be an integer between 1-32"
+    if rank_by not in RANK_KEYS:
+        return None, f"rankBy must be one of {', '.join(RANK_KEYS)}"
+    if payout_model not in ('parimutuel', 'fixed'):
+        return None, "payoutModel must be 'parimutuel' or 'fixed'"
+    
+    return {
+        "bet_sizes": ranges['betSizePercent'],
+        "buy_thresholds": ranges['buyThreshold'],
+        "sell_thresholds": ranges['sellThreshold'],
+        "kelly_fractions": ranges['kellyFraction'],
+        "initial_capital": initial_capital,
+        "payout": payout,
+        "rank_by": rank_by,
+        "top": top,
+        "workers": workers,
+        "payout_model": payout_model
+    }, None
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def iter_batch_signals(items, backtest_context=None, max_workers=None):
+    """Yield one result per batch item as soon as its question has been evaluated.
+
+    Items asking the same (normalized) question share a single LLM evaluation;
+    each item still gets its own risk-level / market-price decision.
+    """
+    groups = {}
+    for index, item in enumerate(items):
+        question = (item.get('question') or '').strip() if isinstance(item, dict) else ''
+        if not question:
+            yield {"index": index, "success": False, "error": "Question is required"}
+            continue
+        groups.setdefault(normalize_query(question), []).append((index, item, question))
+    
+    # Questions with a fresh precomputed evaluation or a reusable earlier answer are answered right away
+    for key in list(groups):
+        stored = stored_signal(groups[key][0][2], backtest_context)
+        if stored is None:
+            continue
+        for index, item, question in groups.pop(key):
+            result = serve_stored_signal(stored, item.get('riskLevel', 'medium'), item.get('marketPrice', 0.65))
+            result["index"] = index
+            result["question"] = question
+            yield result
+    
+    if not groups:
+        return
+    
+    executor = ThreadPoolExecutor(max_workers=min(max_workers or SIGNAL_BATCH_WORKERS, len(groups)))
+    try:
+        futures = {
+            executor.submit(evaluate_question, members[0][2], backtest_context): members
+            for members in groups.values()
+        }
+        for future in as_completed(futures):
+            try:
+                confidence_yes, reason = future.result()
+                error = None
+            except Exception as e:
+                print(f"Error in batch signal: {e}")
+                error = e
+            
+            for index, item, question in futures[future]:
+                risk_level = item.get('riskLevel', 'medium')
+                market_price = item.get('marketPrice', 0.65)
+                if error is None:
+                    result = decide_signal(confidence_yes, reason, risk_level, market_price)
+                else:
+                    result = fallback_signal(error, risk_level, market_price)
+                result["index"] = index
+                result["question"] = question
+                yield result
+    finally:
+        # Client went away or we finished: don't keep evaluating abandoned questions
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@app.route('/api/generate-signal/batch', methods=['POST'])
+def api_generate_signal_batch():
+    """API endpoint to generate signals for many markets, streamed as NDJSON.
+    Expects: { "items": [{"question", "riskLevel", "marketPrice"}, ...], "includeBacktest": false }
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    include_backtest = data.get('includeBacktest', False)
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "error": "items must be a non-empty list"}), 400
+    if len(items) > SIGNAL_BATCH_MAX_ITEMS:
+        return jsonify({"success": False, "error": f"At most {SIGNAL_BATCH_MAX_ITEMS} items per batch"}), 400
+    
+    backtest_context, snapshot = load_backtest_context(include_backtest)
+    
+    def generate():
+        started = time.time()
+        count = 0
+        for result in iter_batch_signals(items, backtest_context):
+            if result.get("success"):
+                annotate_signal_result(result, include_backtest, backtest_context, snapshot)
+            count += 1
+            yield json.dumps(result) + "\n"
+        unique = len({normalize_query(i.get('question') or '') for i in items if isinstance(i, dict) and i.get('question')})
+        yield json.dumps({"done": True, "count": count, "uniqueQuestions": unique, "durationMs": int((time.time() - started) * 1000)}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/backtest/run', methods=['POST'])
 def api_run_backtest():
     """API endpoint to run backtesting"""
     try:
         data = request.get_json() or {}
         
-        initial_capital = data.get('initialCapital', 1000)
-        bet_size_percent = data.get('betSizePercent', 10)
+        params, error = validate_backtest_params(data)
+        if error:
+            return jsonify({"success": False, "error": error}), 400
+        
+        result = run_backtest(**params)
         
-        # Validate inputs
-        if initial_capital <= 0:
-            return jsonify({"success": False, "error": "Initial capital must be positive"}), 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/backtest/simulate', methods=['POST'])
+def api_simulate_backtest():
+    """API endpoint to re-simulate a strategy over the saved predictions (no LLM calls).
+    Expects: { "initialCapital", "betSizePercent", "payout" (default 2.0), "questionIds" (optional),
+    "includeTrades" (default true) }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
         
-        if bet_size_percent <= 0 or bet_size_percent > 100:
-            return jsonify({"success": False, "error": "Bet size must be between 1-100%"}), 400
+        params, error = validate_backtest_params(data)
+        if error:
+            return jsonify({"success": False, "error": error}), 400
         
-        result = run_backtest(
-            initial_capital=initial_capital,
-            bet_size_percent=bet_size_percent
-        )
+        payout = data.get('payout', 2.0)
+        if not isinstance(payout, (int, float)) or payout <= 0:
+            return jsonify({"success": False, "error": "payout must be a positive number"}), 400
+        
+        matrix = prediction_store.get()
+        question_ids = data.get('questionIds')
+        if question_ids:
+            matrix = matrix.select(question_ids)
+        if not matrix.scored:
+            return jsonify({"success": False, "error": "No saved predictions yet; run a backtest first"}), 404
         
+        payout_model = data.get('payoutModel', 'parimutuel')
+        if payout_model not in ('parimutuel', 'fixed'):
+            return jsonify({"success": False, "error": "payoutModel must be 'parimutuel' or 'fixed'"}), 400
+        
+        started = time.perf_counter()
+        result = simulate_matrix(matrix, params["initial_capital"], params["bet_size_percent"], payout, payout_model)
+        result["summary"]["payout"] = payout
+        result["summary"]["simulationMs"] = round((time.perf_counter() - started) * 1000, 3)
+        if not data.get('includeTrades', True):
+            result.pop("results")
         return jsonify(result)
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/backtest/sweep', methods=['POST'])
+def api_sweep_backtest():
+    """API endpoint to grid-search strategies over the saved predictions (no LLM calls).
+    Each of betSizePercent, buyThreshold, sellThreshold and kellyFraction takes a number,
+    a list or {"start", "stop", "step"}; every combination is simulated and ranked.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            data = {}
+        
+        params, error = validate_sweep_params(data)
+        if error:
+            return jsonify({"success": False, "error": error}), 400
+        
+        matrix = prediction_store.get()
+        if not matrix.scored:
+            return jsonify({"success": False, "error": "No saved predictions yet; run a backtest first"}), 404
+        
+        grid = build_grid(params["bet_sizes"], params["buy_thresholds"], params["sell_thresholds"],
+                          params["kelly_fractions"])
+        try:
+            result = run_sweep(matrix, grid, params["initial_capital"], params["payout"], rank_by=params["rank_by"],
+                               top=params["top"], workers=params["workers"], payout_model=params["payout_model"])
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        
+        return jsonify({"success": True, **result})
+        
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def iter_backtest_run(params, cancelled=None):
+    """Backtest the latest resolved markets as an event stream for SSE and background jobs.
+    Yields ("start", info), ("trade", record) per scored market and ("summary", summary).
+    Raises JobCancelled once `cancelled` is set, including while predictions are pending.
+    """
+    markets = get_resolved_markets()[:BACKTEST_MARKET_LIMIT]
+    if not markets:
+        raise ValueError("No resolved markets found for backtesting")
+    
+    yield "start", {"totalMarkets": len(markets), "initialCapital": params["initial_capital"]}
+    predictions = iter_predictions(markets, max_workers=params["max_workers"], max_rps=params["max_rps"],
+                                   cancelled=cancelled)
+    collected = []
+    scored = 0
+    try:
+        for kind, payload in iter_backtest(markets, recorded(predictions, collected), params["initial_capital"], params["bet_size_percent"]):
+            if kind == "trade":
+                scored += 1
+                payload["index"] = scored
+            else:
+                payload["maxWorkers"] = params["max_workers"] or BACKTEST_MAX_WORKERS
+                save_predictions(markets, collected)
+            yield kind, payload
+    finally:
+        predictions.close()
+
+def recorded(items, sink):
+    """Pass items through while appending each one to sink"""
+    for item in items:
+        sink.append(item)
+        yield item
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def read_backtest_query(args):
+    """Coerce backtest query-string parameters (GET/EventSource) to numbers"""
+    data = {}
+    for key, cast in (('initialCapital', float), ('betSizePercent', float), ('maxWorkers', int), ('maxRps', float)):
+        value = args.get(key)
+        if value not in (None, ''):
+            data[key] = cast(value)
+    return data
+
+@app.route('/api/backtest/stream', methods=['GET', 'POST'])
+def api_stream_backtest():
+    """API endpoint to run a backtest as a Server-Sent Events stream.
+    Emits "start", one "trade" per scored market, then "summary" (or "error").
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+        else:
+            data = read_backtest_query(request.args)
+    except ValueError:
+        return jsonify({"success": False, "error": "Backtest parameters must be numbers"}), 400
+    
+    params, error = validate_backtest_params(data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    
+    def generate():
+        try:
+            for kind, payload in iter_backtest_run(params):
+                if kind == "summary":
+                    payload = {"success": True, "summary": payload}
+                yield sse_event(kind, payload)
+        except Exception as e:
+            yield sse_event("error", {"success": False, "error": str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Background backtest jobs: at most BACKTEST_JOB_WORKERS run at once, state lives in SQLite
+job_manager = JobManager(
+    os.getenv("BACKTEST_JOB_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "backtest_jobs.sqlite3")),
+    iter_backtest_run,
+    max_workers=int(os.getenv("BACKTEST_JOB_WORKERS", "2")),
+)
+
+@app.route('/api/backtest/jobs', methods=['POST'])
+def api_submit_backtest_job():
+    """API endpoint to queue a backtest and return its job ID immediately"""
+    data = request.get_json(silent=True) or {}
+    params, error = validate_backtest_params(data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    
+    job_id = job_manager.submit(params)
+    return jsonify({"success": True, "jobId": job_id, "status": "queued"}), 202
+
+@app.route('/api/backtest/jobs', methods=['GET'])
+def api_list_backtest_jobs():
+    """API endpoint to list recent backtest jobs"""
+    job_manager.start()
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be an integer"}), 400
+    return jsonify({"success": True, "jobs": job_manager.list(limit), "stats": job_manager.stats()})
+
+@app.route('/api/backtest/jobs/<job_id>', methods=['GET'])
+def api_get_backtest_job(job_id):
+    """API endpoint to poll a backtest job's status, progress and summary"""
+    job_manager.start()
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job})
+
+@app.route('/api/backtest/jobs/<job_id>/results', methods=['GET'])
+def api_get_backtest_job_results(job_id):
+    """API endpoint to page through a job's trades (partial while it is still running)"""
+    job_manager.start()
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"success": False, "error": "offset and limit must be integers"}), 400
+    
+    results = job_manager.results(job_id, offset, limit)
+    return jsonify({
+        "success": True,
+        "jobId": job_id,
+        "status": job["status"],
+        "offset": offset,
+        "nextOffset": offset + len(results),
+        "results": results
+    })
+
+@app.route('/api/backtest/jobs/<job_id>/cancel', methods=['POST'])
+def api_cancel_backtest_job(job_id):
+    """API endpoint to cancel a queued or running backtest job"""
+    job_manager.start()
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    if job["status"] not in ACTIVE_STATUSES:
+        return jsonify({"success": False, "error": f"Job already {job['status']}", "job": job}), 409
+    return jsonify({"success": True, "job": job_manager.cancel(job_id)})
+
 @app.route('/api/backtest/markets', methods=['GET'])
 def api_get_resolved_markets():
     """API endpoint to get resolved markets for backtesting"""
@@ -583,26 +1250,112 @@ def api_get_resolved_markets():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/backtest/insights', methods=['GET'])
+def api_backtest_insights():
+    """API endpoint to read the precomputed backtest insights"""
+    insights_store.start()
+    snapshot = insights_store.get()
+    if not snapshot:
+        return jsonify({"success": False, "status": "warming", "error": insights_store.last_error}), 503
+    return jsonify({
+        "success": True,
+        "insights": snapshot["insights"],
+        "version": snapshot["version"],
+        "computedAt": int(snapshot["computedAt"] * 1000),
+        "ageSeconds": insights_store.age_seconds(),
+        "marketCount": snapshot["marketCount"]
+    })
+
+@app.route('/api/backtest/insights/refresh', methods=['POST'])
+def api_refresh_backtest_insights():
+    """Ask the background refresher to re-check resolved markets now"""
+    insights_store.request_refresh()
+    return jsonify({"success": True, "status": "refresh requested"}), 202
+
+@app.route('/api/signals/precomputed', methods=['GET'])
+def api_precomputed_signals():
+    """Signals precomputed for open markets, soonest endTime first"""
+    if not SIGNAL_PRECOMPUTE:
+        return jsonify({"success": False, "error": "Signal precomputation is disabled (SIGNAL_PRECOMPUTE=0)"}), 404
+    signal_store.start()
+    now = time.time()
+    signals = [
+        {
+            **{k: v for k, v in entry.items() if k != "computedAt"},
+            "computedAt": int(entry["computedAt"] * 1000),
+            "ageSeconds": round(now - entry["computedAt"], 1),
+            "refreshInterval": round(signal_store.refresh_interval(entry["endTime"], now), 1),
+        }
+        for entry in signal_store.entries()
+    ]
+    return jsonify({"success": True, "signals": signals, "count": len(signals), "stats": signal_store.stats()})
+
+@app.route('/api/signals/precomputed/refresh', methods=['POST'])
+def api_refresh_precomputed_signals():
+    """Ask the precompute scheduler to re-check open markets now"""
+    if not SIGNAL_PRECOMPUTE:
+        return jsonify({"success": False, "error": "Signal precomputation is disabled (SIGNAL_PRECOMPUTE=0)"}), 404
+    signal_store.request_refresh()
+    return jsonify({"success": True, "status": "refresh requested"}), 202
+
+@app.route('/api/backtest/sync', methods=['POST'])
+def api_sync_markets():
+    """API endpoint to pull new questions/resolutions from Envio into the local store"""
+    data = request.get_json(silent=True) or {}
+    try:
+        full = bool(data.get('full', False))
+        stats = market_store.sync(full=full)
+        stats["pools"] = pool_store.sync(full=full)
+        if stats["newResolutions"] and market_index.loaded:
+            market_index.refresh()
+        return jsonify({"success": True, "sync": stats, "counts": {**market_store.counts(), **pool_store.counts()}})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "counts": {**market_store.counts(), **pool_store.counts()}}), 502
+
+@app.route('/api/backtest/pools/<question_id>', methods=['GET'])
+def api_market_pools(question_id):
+    """API endpoint for a market's parimutuel pools and implied prices.
+    Pass ?block=N for the pool as it stood before block N.
+    """
+    try:
+        block = request.args.get('block')
+        if block not in (None, ''):
+            pools = pool_store.pool_at(question_id, int(block))
+        else:
+            pools = pool_store.pools([question_id]).get(str(int(question_id)), [])
+    except ValueError:
+        return jsonify({"success": False, "error": "questionId and block must be integers"}), 400
+    return jsonify({
+        "success": True,
+        "questionId": str(question_id),
+        "block": int(block) if block not in (None, '') else None,
+        "pools": pools,
+        "totalPool": sum(pools),
+        "impliedPrices": implied_prices(pools),
+        "payoutMultiples": {
+            "yes": parimutuel_multiple(pools, True),
+            "no": parimutuel_multiple(pools, False)
+        }
+    })
+
+def read_news_params(data, question_key, limit=6):
+    """Pull (question, limit) out of a JSON body or query string"""
+    question = (data.get(question_key) or '').strip()
+    l = data.get('limit')
+    if l:
+        try:
+            limit = int(l)
+        except Exception:
+            pass
+    return question, limit
+
 @app.route('/api/news-context', methods=['GET', 'POST'])
 def api_news_context():
     try:
-        question = ''
-        limit = 6
         if request.method == 'POST':
-            data = request.get_json(silent=True) or {}
-            question = (data.get('question') or '').strip()
-            try:
-                limit = int(data.get('limit', limit))
-            except Exception:
-                pass
+            question, limit = read_news_params(request.get_json(silent=True) or {}, 'question')
         else:
-            question = (request.args.get('q') or '').strip()
-            l = request.args.get('limit')
-            if l:
-                try:
-                    limit = int(l)
-                except Exception:
-                    pass
+            question, limit = read_news_params(request.args, 'q')
         
         print(f"Fetching news for query: '{question}' (limit: {limit})")
         lines = get_news_lines(question, max_items=limit)
@@ -623,6 +1376,118 @@ def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "message": "Backend is running"})
 
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    """Hit/miss counters for the LLM completion and news caches"""
+    return jsonify({
+        "success": True,
+        "llm": llm_cache.stats(),
+        "news": get_news_cache_stats(),
+        "models": model_router.stats(),
+        "groq": groq_guard.stats(),
+        "endpoints": {base_url: guard.stats() for base_url, guard in endpoint_guards.items()},
+        "precomputed": signal_store.stats(),
+        "similarQuestions": similar_questions.stats(),
+        "similarMarkets": {**market_index.stats(), "k": SIMILAR_MARKETS_K},
+        "http": transports.stats(),
+        "tokens": {**token_usage.stats(), "budget": PROMPT_TOKEN_BUDGET, "staticTokens": signal_prompt.static_tokens},
+        "singleflight": {"signal": signal_flight.stats(), "backtest": backtest_flight.stats()}
+    })
+
+def register_metrics():
+    """Expose the existing cache, token, model and queue counters on /api/metrics"""
+    def caches():
+        return {"llm": llm_cache.stats(), "news": get_news_cache_stats()}
+    registry.callback("betai_cache_hit_ratio", "Cache hits / lookups", "gauge", ["cache"],
+                      lambda: {(name,): stats["hitRatio"] for name, stats in caches().items()})
+    registry.callback("betai_similar_question_lookups_total", "Signal requests answered from a reworded question",
+                      "counter", ["result"],
+                      lambda: {("hit",): similar_questions.hits, ("miss",): similar_questions.misses})
+    registry.callback("betai_cache_lookups_total", "Cache lookups by result", "counter", ["cache", "result"],
+                      lambda: {
+                          ("llm", "hit"): llm_cache.hits, ("llm", "miss"): llm_cache.misses,
+                          **{("news", result): get_news_cache_stats()[key]
+                             for result, key in (("hit", "hits"), ("stale", "staleHits"), ("miss", "misses"))},
+                      })
+    registry.callback("betai_singleflight_coalesced_total", "Calls that joined an identical in-flight call",
+                      "counter", ["flight"],
+                      lambda: {("signal",): signal_flight.coalesced, ("backtest",): backtest_flight.coalesced})
+    registry.callback("betai_llm_tokens_total", "LLM tokens reported by completions", "counter", ["kind"],
+                      lambda: {("prompt",): token_usage.prompt_tokens, ("completion",): token_usage.completion_tokens})
+    registry.callback("betai_llm_router_events_total", "Model router requests, hedges and failures", "counter",
+                      ["event"],
+                      lambda: {(event,): value for event, value in model_router.stats().items()
+                               if event in ("requests", "hedges", "hedgeWins", "ensemblePartial", "failures")})
+    registry.callback("betai_groq_guard_events_total", "Groq guard retries, rate-limit rejections and budget exhaustion",
+                      "counter", ["event"],
+                      lambda: {(event,): value for event, value in groq_guard.stats().items()
+                               if event in ("calls", "retries", "retryBudgetExhausted", "rateLimited")})
+    registry.callback("betai_groq_circuit_open", "1 while a backend's circuit breaker is open or half-open", "gauge",
+                      ["backend"],
+                      lambda: {(name,): int(breaker["state"] != "closed")
+                               for guard in (groq_guard, *endpoint_guards.values())
+                               for name, breaker in guard.stats()["breakers"].items()})
+    registry.callback("betai_http_connections_total", "Upstream HTTP requests and newly opened connections", "counter",
+                      ["upstream", "kind"],
+                      lambda: {key: value for name, stats in transports.stats().items()
+                               for key, value in (((name, "requests"), stats["requests"]),
+                                                  ((name, "new"), stats["newConnections"]))})
+    registry.callback("betai_http_connection_reuse_ratio", "Share of upstream requests sent on a kept-alive connection",
+                      "gauge", ["upstream"],
+                      lambda: {(name,): stats["reuseRatio"] for name, stats in transports.stats().items()})
+    registry.callback("betai_precomputed_signal_lookups_total", "Signal requests answered from / missing the precomputed store",
+                      "counter", ["result"],
+                      lambda: {("hit",): signal_store.hits, ("miss",): signal_store.misses})
+    registry.callback("betai_similar_market_searches_total", "Similar resolved market lookups by result", "counter",
+                      ["result"],
+                      lambda: {(result,): market_index.stats()[key] for result, key in
+                               (("matched", "matched"), ("truncated", "truncated"), ("not_ready", "notReady"))})
+    registry.callback("betai_similar_market_documents", "Resolved markets in the retrieval index", "gauge", [],
+                      lambda: {(): market_index.stats()["documents"]})
+    registry.callback("betai_agent_pool_workers", "Agent worker pool occupancy", "gauge", ["state"],
+                      lambda: {(state,): agent_pool.stats()[state] for state in ("workers", "idle", "queued")})
+
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    """Stage latency histograms, upstream call counts, cache ratios and fallbacks in Prometheus text format"""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+# Locate the hedera_agent.js under the frontend folder
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+AGENT_PATH = os.path.join(REPO_ROOT, 'frontend', 'src', 'pages', 'hedera_agent.js')
+AGENT_CWD = os.path.join(REPO_ROOT, 'frontend')  # So ESM imports resolve and node finds frontend deps
+AGENT_TIMEOUT = float(os.getenv('AGENT_TIMEOUT', '120'))
+# Persistent `node hedera_agent.js --worker` processes; each is recycled after AGENT_MAX_REQUESTS
+AGENT_POOL_SIZE = int(os.getenv('AGENT_POOL_SIZE', '2'))
+AGENT_MAX_REQUESTS = int(os.getenv('AGENT_MAX_REQUESTS', '100'))
+AGENT_PING_INTERVAL = float(os.getenv('AGENT_PING_INTERVAL', '60'))
+AGENT_RESPAWN_BACKOFF = float(os.getenv('AGENT_RESPAWN_BACKOFF', '0.5'))
+AGENT_MAX_RESPAWN_BACKOFF = float(os.getenv('AGENT_MAX_RESPAWN_BACKOFF', '30'))
+
+def agent_environment():
+    """Pass through existing env plus map Vite keys if present"""
+    env = os.environ.copy()
+    # Map VITE_* to agent expected vars if available
+    if not env.get('HEDERA_ACCOUNT_ID') and env.get('VITE_MY_ACCOUNT_ID'):
+        env['HEDERA_ACCOUNT_ID'] = env['VITE_MY_ACCOUNT_ID']
+    if not env.get('HEDERA_PRIVATE_KEY') and env.get('VITE_MY_PRIVATE_KEY'):
+        env['HEDERA_PRIVATE_KEY'] = env['VITE_MY_PRIVATE_KEY']
+    return env
+
+agent_pool = AgentPool(
+    ['node', AGENT_PATH, '--worker'],
+    cwd=AGENT_CWD,
+    env_factory=agent_environment,
+    size=AGENT_POOL_SIZE,
+    max_requests=AGENT_MAX_REQUESTS,
+    timeout=AGENT_TIMEOUT,
+    ping_interval=AGENT_PING_INTERVAL,
+    respawn_backoff=AGENT_RESPAWN_BACKOFF,
+    max_respawn_backoff=AGENT_MAX_RESPAWN_BACKOFF,
+)
+
+register_metrics()
+
 @app.route('/api/agent-chat', methods=['POST'])
 def api_agent_chat():
     """Proxy endpoint to run the Node-based Hedera Agent with a prompt and return its JSON output.
@@ -634,63 +1499,27 @@ def api_agent_chat():
         if not prompt:
             return jsonify({"success": False, "error": "prompt is required"}), 400
 
-        # Locate the hedera_agent.js under the frontend folder
-        repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-        agent_path = os.path.join(repo_root, 'frontend', 'src', 'pages', 'hedera_agent.js')
-        if not os.path.exists(agent_path):
-            return jsonify({"success": False, "error": f"Agent file not found at {agent_path}"}), 500
-
-        # Prepare environment: pass through existing env plus map Vite keys if present
-        env = os.environ.copy()
-        # Map VITE_* to agent expected vars if available
-        if not env.get('HEDERA_ACCOUNT_ID') and env.get('VITE_MY_ACCOUNT_ID'):
-            env['HEDERA_ACCOUNT_ID'] = env['VITE_MY_ACCOUNT_ID']
-        if not env.get('HEDERA_PRIVATE_KEY') and env.get('VITE_MY_PRIVATE_KEY'):
-            env['HEDERA_PRIVATE_KEY'] = env['VITE_MY_PRIVATE_KEY']
-
-        # Node command
-        node_cmd = ['node', agent_path, prompt]
-        import subprocess
-        # Run from repo root so ESM imports resolve and node can find dependencies in frontend
-        result = subprocess.run(
-            node_cmd,
-            cwd=os.path.join(repo_root, 'frontend'),
-            capture_output=True,
-            text=True,
-            timeout=120,
-            env=env,
-        )
-
-        stdout = (result.stdout or '').strip()
-        stderr = (result.stderr or '').strip()
-
-        if result.returncode != 0:
-            return jsonify({"success": False, "error": "Agent process failed", "stderr": stderr}), 500
-
-        # Try to parse stdout as JSON
-        try:
-            output = json.loads(stdout)
-        except Exception:
-            # In case agent prints other logs, try to extract JSON object
-            start = stdout.find('{')
-            end = stdout.rfind('}') + 1
-            if start != -1 and end > start:
-                try:
-                    output = json.loads(stdout[start:end])
-                except Exception as e:
-                    return jsonify({"success": False, "error": f"Failed to parse agent output: {str(e)}", "raw": stdout}), 500
-            else:
-                return jsonify({"success": False, "error": "No JSON output from agent", "raw": stdout}), 500
+        if not os.path.exists(AGENT_PATH):
+            return jsonify({"success": False, "error": f"Agent file not found at {AGENT_PATH}"}), 500
 
+        with timed("agent_chat"), outbound("agent"):
+            output = agent_pool.call(prompt)
         return jsonify({"success": True, "agent": output})
 
-    except subprocess.TimeoutExpired:
+    except AgentTimeout:
         return jsonify({"success": False, "error": "Agent timed out"}), 504
+    except AgentError as e:
+        return jsonify({"success": False, "error": str(e), "stderr": e.stderr}), 500
     except FileNotFoundError as e:
         # node not found
         return jsonify({"success": False, "error": f"Node runtime not found: {str(e)}"}), 500
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/agent-chat/stats', methods=['GET'])
+def api_agent_stats():
+    """Agent worker pool counters (workers, queue, timeouts, crashes, recycles)"""
+    return jsonify({"success": True, "pool": agent_pool.stats()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,209 @@
+import os
+import json
+import hashlib
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+# Used when no INSIGHTS_TOPICS_PATH dictionary is configured: topic -> phrases
+DEFAULT_TOPICS = {
+    "bitcoin": ["bitcoin"],
+    "crypto": ["crypto"],
+    "ethereum": ["ethereum"],
+    "election": ["election"],
+    "political": ["political"],
+    "sports": ["sports"],
+    "market": ["market"],
+    "price": ["price"],
+}
+
+HIGH_CONFIDENCE = 0.7
+LOW_CONFIDENCE = 0.3
+MIN_TOPIC_SAMPLES = 2
+
+
+def load_topics(path: Optional[str]) -> Dict[str, List[str]]:
+    """Read a {topic: [phrase, ...]} JSON dictionary (a bare string counts as one phrase)"""
+    if not path:
+        return DEFAULT_TOPICS
+    with open(path, "r", encoding="utf-8") as f:
+        topics = json.load(f)
+    return {topic: [phrases] if isinstance(phrases, str) else list(phrases) for topic, phrases in topics.items()}
+
+
+class TopicMatcher:
+    """Aho-Corasick automaton over every phrase of every topic.
+
+    match() walks the lowercased text once and returns the topics whose phrases
+    occur in it (substring semantics, like `phrase in text`), so the cost depends
+    on the text length, not on how many topics are configured.
+    """
+
+    def __init__(self, topics: Dict[str, List[str]]):
+        self.topics = {topic: [p.lower() for p in phrases if p] for topic, phrases in topics.items()}
+        self.fingerprint = hashlib.sha256(json.dumps(self.topics, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Set[str]] = [set()]
+        for topic, phrases in self.topics.items():
+            for phrase in phrases:
+                node = 0
+                for ch in phrase:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[node][ch] = nxt
+                        self._goto.append({})
+                        self._outputs.append(set())
+                    node = nxt
+                self._outputs[node].add(topic)
+
+        # Breadth-first failure links; each node inherits the outputs of its failure node
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._outputs[child] |= self._outputs[self._fail[child]]
+
+    def match(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        node = 0
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        for ch in (text or "").lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if outputs[node]:
+                found |= outputs[node]
+        return found
+
+
+class InsightsAccumulator:
+    """Online backtest insights: add() trade records one at a time in O(1) each.
+
+    Keeps the overall, confidence-bucket, recent-window and per-topic counters, plus
+    the capital path for ROI. State round-trips through to_dict()/from_dict() so it
+    can be persisted and extended as new markets resolve.
+    """
+
+    def __init__(self, matcher: TopicMatcher, initial_capital: float = 1000, recent_window: int = 5):
+        self.matcher = matcher
+        self.initial_capital = initial_capital
+        self.capital = initial_capital
+        self.recent_window = recent_window
+        self.total = 0
+        self.correct = 0
+        self.high_total = 0
+        self.high_correct = 0
+        self.low_total = 0
+        self.low_correct = 0
+        self._recent = deque(maxlen=recent_window)
+        self._recent_correct = 0
+        self.topics: Dict[str, List[int]] = {}  # topic -> [total, correct]
+        self.seen: Set[str] = set()
+
+    def add(self, result: dict):
+        """Fold one trade record (aiConfidence, aiCorrect, question, capitalAfter) into the counters"""
+        question_id = result.get("questionId")
+        if question_id is not None:
+            if str(question_id) in self.seen:
+                return
+            self.seen.add(str(question_id))
+
+        confidence = result.get("aiConfidence", 0.5)
+        is_correct = bool(result.get("aiCorrect", False))
+
+        self.total += 1
+        self.correct += is_correct
+        if "capitalAfter" in result:
+            self.capital = result["capitalAfter"]
+
+        if confidence >= HIGH_CONFIDENCE:
+            self.high_total += 1
+            self.high_correct += is_correct
+        elif confidence <= LOW_CONFIDENCE:  # Low confidence (betting NO)
+            self.low_total += 1
+            self.low_correct += is_correct
+
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_correct -= self._recent[0]
+        self._recent.append(is_correct)
+        self._recent_correct += is_correct
+
+        for topic in self.matcher.match(result.get("question", "")):
+            counts = self.topics.setdefault(topic, [0, 0])
+            counts[0] += 1
+            counts[1] += is_correct
+
+    def extend(self, results: Iterable[dict]):
+        for result in results:
+            self.add(result)
+
+    def mark_seen(self, question_ids: Iterable):
+        """Remember markets that were scored without a trade so they are not rescored"""
+        self.seen.update(str(q) for q in question_ids)
+
+    def insights(self) -> Optional[dict]:
+        """Insights in the shape analyze_backtest_insights always returned (None before any trade)"""
+        if not self.total:
+            return None
+
+        def pct(correct, total):
+            return round(correct / total * 100, 2) if total else 0
+
+        keyword_performance = {
+            topic: {"accuracy": correct / total * 100, "total": total}
+            for topic, (total, correct) in self.topics.items()
+            if total >= MIN_TOPIC_SAMPLES  # Only include if we have at least 2 samples
+        }
+        roi = (self.capital - self.initial_capital) / self.initial_capital * 100 if self.initial_capital > 0 else 0
+
+        return {
+            "overall_accuracy": pct(self.correct, self.total),
+            "roi": round(roi, 2),
+            "total_bets": self.total,
+            "winning_bets": self.correct,
+            "recent_accuracy": pct(self._recent_correct, len(self._recent)),
+            "recent_trades": len(self._recent),
+            "high_confidence_accuracy": pct(self.high_correct, self.high_total),
+            "high_confidence_count": self.high_total,
+            "low_confidence_accuracy": pct(self.low_correct, self.low_total),
+            "low_confidence_count": self.low_total,
+            "keyword_performance": keyword_performance
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "topicsFingerprint": self.matcher.fingerprint,
+            "initialCapital": self.initial_capital,
+            "capital": self.capital,
+            "recentWindow": self.recent_window,
+            "counts": [self.total, self.correct, self.high_total, self.high_correct, self.low_total, self.low_correct],
+            "recent": list(self._recent),
+            "topics": self.topics,
+            "seen": sorted(self.seen),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, matcher: TopicMatcher) -> Optional["InsightsAccumulator"]:
+        """Restore saved state; None when it was built with a different topic dictionary"""
+        if data.get("topicsFingerprint") != matcher.fingerprint:
+            return None
+        acc = cls(matcher, data["initialCapital"], data.get("recentWindow", 5))
+        acc.capital = data["capital"]
+        acc.total, acc.correct, acc.high_total, acc.high_correct, acc.low_total, acc.low_correct = data["counts"]
+        for is_correct in data["recent"]:
+            acc._recent.append(bool(is_correct))
+        acc._recent_correct = sum(acc._recent)
+        acc.topics = {topic: list(counts) for topic, counts in data["topics"].items()}
+        acc.seen = set(data["seen"])
+        return acc
+
+
+def topic_matcher_from_env() -> TopicMatcher:
+    return TopicMatcher(load_topics(os.getenv("INSIGHTS_TOPICS_PATH")))
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Callable, List, Optional
+
+from insights import InsightsAccumulator, TopicMatcher
+
+
+def markets_fingerprint(markets: List[dict]) -> str:
+    """Hash of the resolved market set; changes whenever a new MarketResolved shows up"""
+    ids = sorted(f"{m['questionId']}:{m['winningOutcome']}" for m in markets)
+    return hashlib.sha256(",".join(ids).encode("utf-8")).hexdigest()
+
+
+class InsightsStore:
+    """Materialized backtest insights served in O(1) to the request path.
+
+    A daemon thread polls the resolved markets every `poll_interval` seconds. Markets
+    that resolved since the last poll are scored and folded into an
+    InsightsAccumulator one trade at a time, so an update costs O(new markets).
+    The insights are rebuilt from the latest `batch_limit` markets on first run,
+    on a forced refresh, or when the last rebuild is older than `max_age`. The
+    snapshot and accumulator state are persisted to `path` so a restart can answer
+    immediately and keep accumulating.
+
+    `score(markets, initial_capital)` returns the backtest trade records for the
+    given markets (oldest first), continuing the capital path from initial_capital.
+    """
+
+    def __init__(self, load_markets: Callable[[], List[dict]], score: Callable[[List[dict], float], List[dict]],
+                 matcher: TopicMatcher, path: Optional[str] = None, poll_interval: float = 300,
+                 max_age: float = 6 * 3600, batch_limit: int = 20, initial_capital: float = 1000):
+        self.load_markets = load_markets
+        self.score = score
+        self.matcher = matcher
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.batch_limit = batch_limit
+        self.initial_capital = initial_capital
+        self._snapshot = None
+        self._accumulator: Optional[InsightsAccumulator] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._snapshot = json.load(f)
+            state = self._snapshot.get("accumulator")
+            if state:
+                # None if the topic dictionary changed; the next refresh rebuilds
+                self._accumulator = InsightsAccumulator.from_dict(state, self.matcher)
+        except Exception as e:
+            print(f"Could not load insights snapshot: {e}")
+
+    def _save(self, snapshot):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Could not persist insights snapshot: {e}")
+
+    def get(self) -> Optional[dict]:
+        """Latest snapshot ({insights, version, computedAt, fingerprint, marketCount}) or None"""
+        return self._snapshot
+
+    def age_seconds(self) -> Optional[float]:
+        snapshot = self._snapshot
+        if not snapshot:
+            return None
+        return round(time.time() - snapshot["computedAt"], 1)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Fold newly resolved markets into the insights (or rebuild). Returns True if updated"""
+        with self._refresh_lock:
+            markets = self.load_markets()
+            if not markets:
+                return False
+
+            current = self._snapshot
+            accumulator = self._accumulator
+            rebuild = force or accumulator is None or not current \
+                or time.time() - current.get("builtAt", current["computedAt"]) >= self.max_age
+
+            if rebuild:
+                accumulator = InsightsAccumulator(self.matcher, self.initial_capital)
+                pending = markets[:self.batch_limit]
+                # Older history is the baseline, not "newly resolved"
+                accumulator.mark_seen(m["questionId"] for m in markets[self.batch_limit:])
+            else:
+                pending = [m for m in markets if str(m["questionId"]) not in accumulator.seen][:self.batch_limit]
+                if not pending:
+                    return False
+
+            # Markets come newest first; replay them in time order
+            accumulator.extend(self.score(pending[::-1], accumulator.capital))
+            # Markets scored without a trade (skipped or failed predictions) are done too
+            accumulator.mark_seen(m["questionId"] for m in pending)
+            insights = accumulator.insights()
+            if not insights:
+                return False
+
+            now = time.time()
+            snapshot = {
+                "insights": insights,
+                "version": (current or {}).get("version", 0) + 1,
+                "computedAt": now,
+                "builtAt": now if rebuild else current.get("builtAt", current["computedAt"]),
+                "fingerprint": markets_fingerprint(markets),
+                "marketCount": accumulator.total,
+                "accumulator": accumulator.to_dict(),
+            }
+            with self._lock:
+                self._snapshot = snapshot
+                self._accumulator = accumulator
+            self._save(snapshot)
+            print(f"Backtest insights {'rebuilt' if rebuild else 'updated'} "
+                  f"(version {snapshot['version']}, {len(pending)} markets scored, {accumulator.total} total)")
+            return True
+
+    def request_refresh(self):
+        """Ask the background thread to re-check now (non-blocking)"""
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background refresher once; safe to call from every request"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="insights-refresher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error refreshing backtest insights: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised by a runner that noticed its cancel event while it was not yielding"""
+
+
+class JobManager:
+    """Background backtest jobs executed on a bounded worker pool.
+
+    `runner(params, cancel_event)` must yield ("start", info), ("trade", record) ...
+    and finally ("summary", summary). Every event is written to SQLite as it
+    happens, so status and partial results can be polled while the job runs and
+    survive a restart. Cancellation is checked between events; a runner that can
+    spend a long time between them (e.g. waiting for predictions) should watch
+    `cancel_event` itself and raise JobCancelled.
+    """
+
+    def __init__(self, path: str, runner: Callable[[dict, threading.Event], Iterator[Tuple[str, dict]]],
+                 max_workers: int = 2):
+        self.path = path
+        self.runner = runner
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._cancel_events = {}
+        self._executor = None
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                total_markets INTEGER,
+                scored INTEGER NOT NULL DEFAULT 0,
+                summary TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            """
+        )
+        self._db.commit()
+
+    def start(self):
+        """Create the worker pool and recover jobs left over from a previous run (idempotent)"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="backtest-job")
+            # A job that was running when the process died cannot be resumed mid-way;
+            # keep its partial results and let queued jobs run again
+            self._db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', finished_at = ? "
+                "WHERE status = 'running'",
+                (time.time(),),
+            )
+            self._db.commit()
+            queued = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            )]
+        for job_id in queued:
+            self._enqueue(job_id)
+
+    def _enqueue(self, job_id: str):
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id)
+
+    def submit(self, params: dict) -> str:
+        self.start()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(params), time.time()),
+            )
+            self._db.commit()
+        self._enqueue(job_id)
+        return job_id
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Request cancellation; queued jobs are cancelled immediately, running ones at the runner's next check"""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+            if event:
+                event.set()
+            self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            self._db.commit()
+        return self.get(job_id)
+
+    def _update(self, job_id: str, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._db.commit()
+
+    def _run(self, job_id: str):
+        with self._lock:
+            row = self._db.execute("SELECT status, params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            cancel_event = self._cancel_events.get(job_id)
+        if not row or row[0] != "queued":
+            return
+
+        self._update(job_id, status="running", started_at=time.time())
+        events = self.runner(json.loads(row[1]), cancel_event)
+        seq = 0
+        try:
+            for kind, payload in events:
+                if cancel_event is not None and cancel_event.is_set():
+                    self._update(job_id, status="cancelled", finished_at=time.time())
+                    return
+                if kind == "start":
+                    self._update(job_id, total_markets=payload.get("totalMarkets"))
+                elif kind == "trade":
+                    seq += 1
+                    with self._lock:
+                        self._db.execute(
+                            "INSERT INTO job_results (job_id, seq, record) VALUES (?, ?, ?)",
+                            (job_id, seq, json.dumps(payload)),
+                        )
+                        self._db.execute("UPDATE jobs SET scored = ? WHERE id = ?", (seq, job_id))
+                        self._db.commit()
+                elif kind == "summary":
+                    self._update(job_id, status="completed", summary=json.dumps(payload), finished_at=time.time())
+        except JobCancelled:
+            self._update(job_id, status="cancelled", finished_at=time.time())
+        except Exception as e:
+            print(f"Backtest job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            # Closing the generator stops any predictions still in flight
+            events.close()
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    def _row_to_job(self, row) -> dict:
+        job_id, status, params, created_at, started_at, finished_at, total_markets, scored, summary, error = row
+        return {
+            "jobId": job_id,
+            "status": status,
+            "params": json.loads(params),
+            "createdAt": int(created_at * 1000),
+            "startedAt": int(started_at * 1000) if started_at else None,
+            "finishedAt": int(finished_at * 1000) if finished_at else None,
+            "progress": {"scored": scored, "totalMarkets": total_markets},
+            "summary": json.loads(summary) if summary else None,
+            "error": error,
+        }
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, status, params, created_at, started_at, finished_at, total_markets, scored, summary, error "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, status, params, created_at, started_at, finished_at, total_markets, scored, summary, error "
+                "FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[dict]:
+        """Trade records written so far (partial while the job is running)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT record FROM job_results WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, offset, limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"maxWorkers": self.max_workers, "statusCounts": counts}
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class CompletionCache:
+    """Two-level cache for LLM completions: an in-memory LRU in front of SQLite.
+
+    Entries are keyed on model, temperature and a hash of the assembled prompt,
+    expire after `ttl_seconds` and the disk store is trimmed to `max_entries`
+    (least recently used first). Pass path=None for a memory-only cache.
+    """
+
+    def __init__(self, path: Optional[str], ttl_seconds: float = 86400,
+                 max_entries: int = 10000, memory_entries: int = 512):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    completion TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions(last_access)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages) -> str:
+        """Stable cache key for a chat completion request"""
+        prompt_hash = hashlib.sha256(
+            json.dumps(messages, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        return f"{model}|{temperature}|{prompt_hash}"
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT completion, created_at FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        """Store a completion in memory and on disk"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.writes += 1
+            if self._db is None:
+                return
+            model = key.split("|", 1)[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, model, completion, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, value, now, now),
+            )
+            self._prune(now)
+            self._db.commit()
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now):
+        """Drop expired rows and trim the disk store to max_entries (LRU)"""
+        deleted = 0
+        if self.ttl_seconds:
+            deleted += self._db.execute(
+                "DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        if self.max_entries:
+            count = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            if count > self.max_entries:
+                deleted += self._db.execute(
+                    "DELETE FROM completions WHERE key IN "
+                    "(SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        self.evictions += max(deleted, 0)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM completions")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "memoryEntries": len(self._memory),
+                "diskEntries": disk_entries,
+                "ttlSeconds": self.ttl_seconds,
+                "maxEntries": self.max_entries,
+            }
+
+
+def cache_from_env() -> CompletionCache:
+    """Build the completion cache from LLM_CACHE_* environment variables"""
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite3")
+    path = os.getenv("LLM_CACHE_PATH", default_path)
+    if os.getenv("LLM_CACHE_DISK", "1") == "0":
+        path = None
+    return CompletionCache(
+        path or None,
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")),
+    )
@@ -0,0 +1,193 @@
+"""
+BM25 retrieval over resolved markets, for question-specific backtest context.
+
+Every resolved market in the local store is a document. Its terms are the
+canonical tokens from question_index.question_features, so aliases and amounts
+match the way they do for reused answers ("BTC above $100k" and
+"Bitcoin over 100,000" share bitcoin/above/100000). Postings are numpy arrays of
+document rows, and each row's BM25 length weight is computed once per refresh.
+
+A search scores the query terms rarest first (highest IDF) into one score
+array. After each term it checks the time budget, so a query made of very
+common terms stops early with the most informative terms already counted (the
+rarest one always is). The
+top k rows come from argpartition. Scores are also reported as a similarity
+in [0, 1], relative to a document that contains every query term. Terms that
+no market uses count against that, so a question on an unseen topic that
+shares only "reach" with past markets does not pull them in.
+"""
+
+import math
+import time
+import threading
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from question_index import question_features
+
+
+class ResolvedMarketIndex:
+    """Inverted index over resolved markets loaded from `load_markets()`.
+
+    `refresh()` indexes markets it has not seen yet (by questionId); it runs
+    after each market sync that brought new resolutions. A search before the
+    first refresh starts one in the background and returns nothing instead of
+    blocking the request. `search(question, k)` returns up to k (market,
+    similarity) pairs with similarity >= `min_similarity` and distinct question
+    texts, best first, scored within `budget_ms`.
+    """
+
+    def __init__(self, load_markets: Callable[[], List[dict]], k1: float = 1.2, b: float = 0.75,
+                 budget_ms: float = 10.0, min_similarity: float = 0.3):
+        self.load_markets = load_markets
+        self.k1 = k1
+        self.b = b
+        self.budget_ms = budget_ms
+        self.min_similarity = min_similarity
+        self._markets: List[dict] = []
+        self._terms: List[Tuple[str, ...]] = []
+        self._known = set()
+        # Read-only snapshot swapped in by refresh: (postings, idf, weights)
+        self._postings: Dict[str, np.ndarray] = {}
+        self._idf: Dict[str, float] = {}
+        self._weights = np.zeros(0)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self.loaded = False
+        self.last_refresh = None
+        self.last_error = None
+        self.searches = 0
+        self.matched = 0
+        self.truncated = 0
+        self.not_ready = 0
+        self.search_seconds = 0.0
+
+    def refresh(self) -> dict:
+        """Index markets not seen yet and rebuild the postings (one refresh at a time)"""
+        with self._refresh_lock:
+            started = time.time()
+            added = 0
+            for market in self.load_markets():
+                question_id = str(market["questionId"])
+                if question_id in self._known:
+                    continue
+                self._known.add(question_id)
+                self._markets.append({
+                    "questionId": question_id,
+                    "question": market["question"],
+                    "winningOutcome": market["winningOutcome"],
+                    "winningOutcomeName": market.get("winningOutcomeName", ""),
+                    "endTime": market.get("endTime"),
+                })
+                self._terms.append(tuple(question_features(market["question"]).tokens))
+                added += 1
+            if added or not self.loaded:
+                self._rebuild()
+            self.loaded = True
+            self.last_refresh = {
+                "added": added,
+                "documents": len(self._markets),
+                "durationMs": int((time.time() - started) * 1000),
+            }
+            return self.last_refresh
+
+    def _rebuild(self):
+        rows: Dict[str, List[int]] = {}
+        for row, terms in enumerate(self._terms):
+            for term in terms:
+                rows.setdefault(term, []).append(row)
+        count = len(self._terms)
+        lengths = np.fromiter((len(t) for t in self._terms), dtype=np.float64, count=count)
+        average = lengths.mean() if count else 1.0
+        # Terms are a set per question, so tf is 1 and only the length normalization varies
+        weights = (self.k1 + 1) / (1 + self.k1 * (1 - self.b + self.b * lengths / max(average, 1.0)))
+        postings = {term: np.asarray(ids, dtype=np.int64) for term, ids in rows.items()}
+        idf = {term: math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5)) for term, ids in rows.items()}
+        with self._lock:
+            self._postings, self._idf, self._weights = postings, idf, weights
+
+    def refresh_in_background(self):
+        """Start a refresh on a daemon thread unless one is already running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._refresh_safely, name="market-index", daemon=True)
+            self._thread.start()
+
+    def _refresh_safely(self):
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error indexing resolved markets: {e}")
+
+    def search(self, question: str, k: int = 5) -> List[Tuple[dict, float]]:
+        if not self.loaded:
+            self.not_ready += 1
+            self.refresh_in_background()
+            return []
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000
+        with self._lock:
+            postings, idf, weights = self._postings, self._idf, self._weights
+            markets = self._markets[:len(weights)]
+
+        terms = question_features(question).tokens
+        count = len(markets)
+        if not terms or not count:
+            return []
+        # A term no market uses weighs as much as one used once
+        unseen_idf = math.log(1 + (count - 0.5) / 1.5)
+        # An average-length market containing every query term scores `ideal` (weight 1 per term)
+        ideal = sum(idf.get(term, unseen_idf) for term in terms)
+        scores = np.zeros(count)
+        truncated = False
+        ranked = sorted((t for t in terms if t in postings), key=lambda t: -idf[t])
+        for i, term in enumerate(ranked):
+            rows = postings[term]
+            scores[rows] += idf[term] * weights[rows]
+            if i + 1 < len(ranked) and time.perf_counter() > deadline:
+                truncated = True
+                break
+
+        # Recurring markets repeat a question word for word; extra candidates leave room to skip repeats
+        candidates = min(k * 4, count)
+        top = np.argpartition(-scores, candidates - 1)[:candidates] if candidates > 0 else []
+        results = []
+        seen = set()
+        for row in sorted(top, key=lambda r: -scores[r]):
+            similarity = float(scores[row] / ideal)
+            if len(results) >= k or similarity < self.min_similarity:
+                break
+            market = markets[row]
+            if market["question"] in seen:
+                continue
+            seen.add(market["question"])
+            results.append((market, round(min(similarity, 1.0), 3)))
+
+        with self._lock:
+            self.searches += 1
+            self.matched += bool(results)
+            self.truncated += truncated
+            self.search_seconds += time.perf_counter() - started
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "documents": len(self._weights),
+                "terms": len(self._postings),
+                "budgetMs": self.budget_ms,
+                "minSimilarity": self.min_similarity,
+                "searches": self.searches,
+                "matched": self.matched,
+                "truncated": self.truncated,
+                "notReady": self.not_ready,
+                "avgSearchMs": round(self.search_seconds * 1000 / self.searches, 3) if self.searches else 0.0,
+                "lastRefresh": self.last_refresh,
+                "lastError": self.last_error,
+            }
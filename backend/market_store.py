@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+
+
+QUESTIONS_PAGE_QUERY = """
+query SyncQuestions {
+  ParimutuelPredictionMarket_QuestionAdded(
+    where: {questionId: {_gt: "%(cursor)s"}}
+    order_by: {questionId: asc}
+    limit: %(limit)d
+  ) {
+    id
+    questionId
+    question
+    outcomeNames
+    endTime
+  }
+}
+"""
+
+RESOLUTIONS_QUERY = """
+query SyncResolutions {
+  ParimutuelPredictionMarket_MarketResolved(
+    where: {questionId: {_in: %(question_ids)s}}
+    order_by: {questionId: asc}
+  ) {
+    id
+    questionId
+    winningOutcome
+  }
+}
+"""
+
+
+class MarketStore:
+    """Local SQLite mirror of the Envio QuestionAdded / MarketResolved entities.
+
+    Questions are paged with a questionId cursor (the contract assigns ids from a
+    counter, so the watermark only moves forward). Resolutions are only looked up
+    for locally known questions that have ended but are not resolved yet, so a sync
+    costs O(new questions + open markets) instead of O(history).
+    """
+
+    def __init__(self, path: str, query_fn: Callable[[str], Optional[dict]], page_size: int = 500,
+                 resolution_chunk: int = 200):
+        self.path = path
+        self.query_fn = query_fn
+        self.page_size = page_size
+        self.resolution_chunk = resolution_chunk
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.last_attempt_at = 0.0
+        self.last_sync_at = 0.0
+        self.last_sync_stats = None
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                question_id INTEGER PRIMARY KEY,
+                event_id TEXT,
+                question TEXT NOT NULL,
+                outcome_names TEXT NOT NULL,
+                end_time INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_questions_end_time ON questions(end_time);
+            CREATE TABLE IF NOT EXISTS resolutions (
+                question_id INTEGER PRIMARY KEY,
+                event_id TEXT,
+                winning_outcome INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at REAL
+            );
+            """
+        )
+        self._db.commit()
+
+    # --- sync state ---
+
+    def _get_state(self, name, default=None):
+        row = self._db.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, name, value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO sync_state (name, value, updated_at) VALUES (?, ?, ?)",
+            (name, str(value), time.time()),
+        )
+
+    def watermarks(self) -> dict:
+        with self._lock:
+            return {
+                "questionId": int(self._get_state("questions.cursor", -1)),
+                "lastQuestionEventId": self._get_state("questions.last_event_id"),
+                "lastEndTime": int(self._get_state("questions.last_end_time", 0)),
+                "lastResolutionEventId": self._get_state("resolutions.last_event_id"),
+            }
+
+    # --- sync engine ---
+
+    def sync(self, full: bool = False) -> dict:
+        """Pull new questions and resolutions from Envio; raises if the endpoint fails"""
+        with self._sync_lock:
+            started = self.last_attempt_at = time.time()
+            if full:
+                with self._lock:
+                    self._db.execute("DELETE FROM sync_state")
+                    self._db.commit()
+
+            new_questions = self._sync_questions()
+            new_resolutions = self._sync_resolutions()
+
+            self.last_sync_at = time.time()
+            self.last_sync_stats = {
+                "newQuestions": new_questions,
+                "newResolutions": new_resolutions,
+                "durationMs": int((self.last_sync_at - started) * 1000),
+                "watermarks": self.watermarks(),
+            }
+            return self.last_sync_stats
+
+    def _query(self, query):
+        data = self.query_fn(query)
+        if data is None:
+            raise RuntimeError("Envio query failed")
+        return data
+
+    def _sync_questions(self) -> int:
+        with self._lock:
+            cursor = int(self._get_state("questions.cursor", -1))
+        inserted = 0
+        while True:
+            data = self._query(QUESTIONS_PAGE_QUERY % {"cursor": cursor, "limit": self.page_size})
+            rows = data.get("ParimutuelPredictionMarket_QuestionAdded", [])
+            if not rows:
+                break
+
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO questions (question_id, event_id, question, outcome_names, end_time) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (int(r["questionId"]), r["id"], r["question"], json.dumps(r["outcomeNames"]), int(r["endTime"]))
+                        for r in rows
+                    ],
+                )
+                last = rows[-1]
+                cursor = int(last["questionId"])
+                self._set_state("questions.cursor", cursor)
+                self._set_state("questions.last_event_id", last["id"])
+                self._set_state("questions.last_end_time", max(int(r["endTime"]) for r in rows))
+                self._db.commit()
+
+            inserted += len(rows)
+            if len(rows) < self.page_size:
+                break
+        return inserted
+
+    def _sync_resolutions(self) -> int:
+        # Resolution is only possible after endTime, so skip markets still open
+        # (with an hour of slack for clock skew between us and the chain)
+        with self._lock:
+            pending = [
+                row[0] for row in self._db.execute(
+                    "SELECT q.question_id FROM questions q LEFT JOIN resolutions r ON r.question_id = q.question_id "
+                    "WHERE r.question_id IS NULL AND q.end_time <= ? ORDER BY q.question_id",
+                    (int(time.time()) + 3600,),
+                )
+            ]
+
+        inserted = 0
+        for i in range(0, len(pending), self.resolution_chunk):
+            chunk = pending[i:i + self.resolution_chunk]
+            data = self._query(RESOLUTIONS_QUERY % {"question_ids": json.dumps([str(q) for q in chunk])})
+            rows = data.get("ParimutuelPredictionMarket_MarketResolved", [])
+            if not rows:
+                continue
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO resolutions (question_id, event_id, winning_outcome) VALUES (?, ?, ?)",
+                    [(int(r["questionId"]), r["id"], int(r["winningOutcome"])) for r in rows],
+                )
+                self._set_state("resolutions.last_event_id", rows[-1]["id"])
+                self._db.commit()
+            inserted += len(rows)
+        return inserted
+
+    # --- local queries ---
+
+    def resolved_markets(self, limit: Optional[int] = None) -> List[dict]:
+        """Resolved markets, newest endTime first (same shape as the old GraphQL join)"""
+        sql = (
+            "SELECT q.question_id, q.question, q.outcome_names, q.end_time, r.winning_outcome "
+            "FROM questions q JOIN resolutions r ON r.question_id = q.question_id "
+            "ORDER BY q.end_time DESC"
+        )
+        params = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        markets = []
+        for question_id, question, outcome_names, end_time, winning_outcome in rows:
+            outcome_names = json.loads(outcome_names)
+            markets.append({
+                "questionId": str(question_id),
+                "question": question,
+                "outcomeNames": outcome_names,
+                "winningOutcome": winning_outcome,
+                "winningOutcomeName": outcome_names[winning_outcome] if winning_outcome < len(outcome_names) else "Unknown",
+                "endTime": end_time,
+                "isResolved": True
+            })
+        return markets
+
+    def open_markets(self, limit: Optional[int] = None, now: Optional[float] = None) -> List[dict]:
+        """Unresolved markets whose endTime is still ahead, soonest endTime first"""
+        sql = (
+            "SELECT q.question_id, q.question, q.outcome_names, q.end_time "
+            "FROM questions q LEFT JOIN resolutions r ON r.question_id = q.question_id "
+            "WHERE r.question_id IS NULL AND q.end_time > ? "
+            "ORDER BY q.end_time ASC, q.question_id ASC"
+        )
+        params = (int(now if now is not None else time.time()),)
+        if limit:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        return [
+            {
+                "questionId": str(question_id),
+                "question": question,
+                "outcomeNames": json.loads(outcome_names),
+                "endTime": end_time,
+                "isResolved": False
+            }
+            for question_id, question, outcome_names, end_time in rows
+        ]
+
+    def counts(self) -> dict:
+        with self._lock:
+            questions = self._db.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            resolved = self._db.execute("SELECT COUNT(*) FROM resolutions").fetchone()[0]
+        return {"questions": questions, "resolved": resolved}
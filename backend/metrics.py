@@ -0,0 +1,219 @@
+"""
+Process-wide latency and call metrics in Prometheus text format.
+
+Counters and histograms are updated in place (thread-safe); callback metrics
+read their values from existing stats (caches, pools) when /api/metrics is
+rendered. `timed(stage)` times a block of code into STAGE_SECONDS and
+`outbound(service)` times an upstream call into OUTBOUND_SECONDS, counting
+successes and errors. Both work inside async code as well.
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans cache hits (sub-millisecond) to slow LLM calls and backtests
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(series[-1], 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose samples come from `collect()` at render time: {label values tuple: value}"""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[tuple, float]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            samples = self.collect()
+        except Exception as e:
+            print(f"Metric {self.name} collection failed: {e}")
+            return lines
+        for key, value in sorted(samples.items()):
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not isinstance(metric, CallbackMetric):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, kind, labelnames, collect) -> CallbackMetric:
+        """Register (or replace) a metric read from `collect` at render time"""
+        return self._register(CallbackMetric(name, help, kind, labelnames, collect))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "betai_stage_duration_seconds", "Time spent in each processing stage", ["stage"])
+STAGE_ERRORS = registry.counter(
+    "betai_stage_errors_total", "Stages that ended with an exception", ["stage"])
+OUTBOUND_SECONDS = registry.histogram(
+    "betai_outbound_request_duration_seconds", "Latency of calls to upstream services", ["service"])
+OUTBOUND_REQUESTS = registry.counter(
+    "betai_outbound_requests_total", "Calls to upstream services by outcome", ["service", "outcome"])
+FALLBACK_SIGNALS = registry.counter(
+    "betai_fallback_signals_total", "Neutral HOLD signals returned because the LLM call failed")
+
+
+class _Timer:
+    """Context manager timing a block into a histogram; exceptions are counted and re-raised"""
+
+    def __init__(self, on_done: Callable[[float, bool], None]):
+        self.on_done = on_done
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.on_done(time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+
+def timed(stage: str) -> _Timer:
+    """`with timed("signal.news"): ...` records the block's duration under that stage"""
+    def done(seconds, failed):
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        if failed:
+            STAGE_ERRORS.inc(stage=stage)
+    return _Timer(done)
+
+
+def outbound(service: str) -> _Timer:
+    """`with outbound("envio"): ...` records an upstream call's latency and outcome"""
+    def done(seconds, failed):
+        OUTBOUND_SECONDS.observe(seconds, service=service)
+        OUTBOUND_REQUESTS.inc(service=service, outcome="error" if failed else "ok")
+    return _Timer(done)
+
+
+def record_outbound(service: str, seconds: float, ok: bool):
+    """For calls that report failure by return value instead of raising"""
+    OUTBOUND_SECONDS.observe(seconds, service=service)
+    OUTBOUND_REQUESTS.inc(service=service, outcome="ok" if ok else "error")
+
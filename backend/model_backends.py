@@ -0,0 +1,555 @@
+"""
+Model backends for signal completions and a router that combines them.
+
+A backend turns chat messages into the model's raw answer text. ModelRouter
+sends each request to its backends in one of three modes:
+
+- single:   the first backend only
+- hedged:   the first backend; if it has not answered within its recent latency
+            percentile (or fails), the next backend is raced against it and the
+            first successful answer wins
+- ensemble: every backend at once; yes_probability is averaged over the answers
+            that arrive before the deadline
+
+StubBackend answers locally with configurable latency and error rate, so every
+mode can be exercised without network access.
+"""
+
+import json
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence, Union
+
+from groq import AsyncGroq, Groq
+
+from metrics import record_outbound
+from signal_parser import SignalStreamParser, as_probability, parse_signal_text
+
+ROUTER_MODES = ("single", "hedged", "ensemble")
+# Successful latencies kept per backend for the hedge percentile
+LATENCY_WINDOW = 200
+# Samples needed before the percentile replaces the configured initial hedge delay
+MIN_LATENCY_SAMPLES = 20
+
+
+class StreamedUsage:
+    """Usage of a stream closed before its usage block: roughly one token per content delta"""
+
+    def __init__(self, completion_tokens):
+        self.prompt_tokens = None
+        self.completion_tokens = completion_tokens
+
+
+def stream_usage(chunk):
+    """Usage block of a streamed chunk (Groq sends it with the last chunk, under x_groq)"""
+    usage = getattr(chunk, "usage", None)
+    if usage is None and getattr(chunk, "x_groq", None) is not None:
+        usage = getattr(chunk.x_groq, "usage", None)
+    return usage
+
+
+class ModelBackend:
+    """One model endpoint; subclasses implement _complete / _acomplete.
+
+    Records call/error counts and the latency of successful calls.
+    """
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.errors = 0
+
+    def complete(self, messages: List[dict], estimated_tokens: Optional[int] = None) -> str:
+        started = time.perf_counter()
+        try:
+            raw_output = self._complete(messages, estimated_tokens)
+        except Exception:
+            self._observe(time.perf_counter() - started, ok=False)
+            raise
+        self._observe(time.perf_counter() - started)
+        return raw_output
+
+    async def acomplete(self, messages: List[dict], estimated_tokens: Optional[int] = None) -> str:
+        started = time.perf_counter()
+        try:
+            raw_output = await self._acomplete(messages, estimated_tokens)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._observe(time.perf_counter() - started, ok=False)
+            raise
+        self._observe(time.perf_counter() - started)
+        return raw_output
+
+    def _complete(self, messages, estimated_tokens):
+        raise NotImplementedError
+
+    async def _acomplete(self, messages, estimated_tokens):
+        raise NotImplementedError
+
+    def _observe(self, seconds: float, ok: bool = True):
+        record_outbound(f"llm:{self.name}", seconds, ok)
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            else:
+                self._latencies.append(seconds)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Latency (seconds) below which `percentile`% of recent successful calls finished"""
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+    def stats(self) -> dict:
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        with self._lock:
+            return {
+                "name": self.name,
+                "model": self.model,
+                "calls": self.calls,
+                "errors": self.errors,
+                "p50Ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95Ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+
+    async def aclose(self):
+        pass
+
+
+class GroqBackend(ModelBackend):
+    """Groq (or any Groq/OpenAI-compatible base_url) chat completions.
+
+    With stream=True the completion is read through SignalStreamParser and the
+    stream is closed as soon as yes_probability and reason are parsed; otherwise
+    the whole answer is awaited, in JSON response mode when json_mode is set.
+    With a GroqGuard every attempt goes through its rate limiter, retry policy
+    and this backend's circuit breaker (the SDK's own retries are then off).
+    With a transport (http_pool.HostTransport) its pooled httpx clients are used.
+    """
+
+    def __init__(self, name: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 temperature: float = 0.1, max_tokens: int = 200, stream: bool = True, json_mode: bool = True,
+                 token_usage=None, client: Optional[Groq] = None, guard=None, timeout: float = 60.0,
+                 transport=None):
+        super().__init__(name, model)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.stream = stream
+        self.json_mode = json_mode
+        self.token_usage = token_usage
+        self.guard = guard
+        self.timeout = timeout
+        self.transport = transport
+        self.client = client or Groq(**self.client_options(),
+                                     **({"http_client": transport.client} if transport else {}))
+        self._async_client: Optional[AsyncGroq] = None
+
+    def client_options(self) -> dict:
+        options = {"api_key": self.api_key, "base_url": self.base_url, "timeout": self.timeout}
+        if self.guard is not None:
+            options["max_retries"] = 0
+        return options
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        # Created on first use so it binds to the serving event loop
+        if self._async_client is None:
+            self._async_client = AsyncGroq(**self.client_options(),
+                                           **({"http_client": self.transport.async_client} if self.transport else {}))
+        return self._async_client
+
+    def request_options(self, stream=False) -> dict:
+        options = {"model": self.model, "temperature": self.temperature, "max_tokens": self.max_tokens}
+        if stream:
+            options["stream"] = True
+        elif self.json_mode:
+            # Groq's JSON mode guarantees a parseable object but cannot be combined with streaming
+            options["response_format"] = {"type": "json_object"}
+        return options
+
+    def reserved_tokens(self, estimated_tokens: Optional[int]) -> int:
+        """Tokens taken from the guard's per-minute budget before a call: prompt estimate + max completion"""
+        return (estimated_tokens or 0) + self.max_tokens
+
+    def _record(self, usage, estimated_tokens, started, permit=None, stopped_early=False):
+        if self.token_usage is not None:
+            self.token_usage.record(usage, estimated_tokens, (time.perf_counter() - started) * 1000,
+                                    stopped_early=stopped_early)
+        if permit is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            if prompt_tokens is None:
+                prompt_tokens = estimated_tokens or 0
+            permit.settle(prompt_tokens + (getattr(usage, "completion_tokens", None) or 0))
+
+    def _complete(self, messages, estimated_tokens):
+        if self.guard is None:
+            return self._complete_once(messages, estimated_tokens)
+        return self.guard.call(self.name, lambda permit: self._complete_once(messages, estimated_tokens, permit),
+                               self.reserved_tokens(estimated_tokens))
+
+    async def _acomplete(self, messages, estimated_tokens):
+        if self.guard is None:
+            return await self._acomplete_once(messages, estimated_tokens)
+        return await self.guard.acall(self.name,
+                                      lambda permit: self._acomplete_once(messages, estimated_tokens, permit),
+                                      self.reserved_tokens(estimated_tokens))
+
+    def _complete_once(self, messages, estimated_tokens, permit=None):
+        started = time.perf_counter()
+        if not self.stream:
+            response = self.client.chat.completions.create(messages=messages, **self.request_options())
+            self._record(response.usage, estimated_tokens, started, permit)
+            return response.choices[0].message.content.strip()
+
+        parser = SignalStreamParser()
+        usage = None
+        deltas = 0
+        stream = self.client.chat.completions.create(messages=messages, **self.request_options(stream=True))
+        try:
+            for chunk in stream:
+                usage = stream_usage(chunk) or usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                deltas += 1
+                if parser.feed(chunk.choices[0].delta.content):
+                    break
+        finally:
+            # Closing the response tells Groq to stop generating the remaining tokens
+            stream.close()
+        self._record(usage or StreamedUsage(deltas), estimated_tokens, started, permit, stopped_early=usage is None)
+        return parser.text().strip()
+
+    async def _acomplete_once(self, messages, estimated_tokens, permit=None):
+        started = time.perf_counter()
+        if not self.stream:
+            response = await self.async_client.chat.completions.create(messages=messages, **self.request_options())
+            self._record(response.usage, estimated_tokens, started, permit)
+            return response.choices[0].message.content.strip()
+
+        parser = SignalStreamParser()
+        usage = None
+        deltas = 0
+        stream = await self.async_client.chat.completions.create(messages=messages,
+                                                                 **self.request_options(stream=True))
+        try:
+            async for chunk in stream:
+                usage = stream_usage(chunk) or usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                deltas += 1
+                if parser.feed(chunk.choices[0].delta.content):
+                    break
+        finally:
+            await stream.close()
+        self._record(usage or StreamedUsage(deltas), estimated_tokens, started, permit, stopped_early=usage is None)
+        return parser.text().strip()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            # A pooled transport is shared with other backends and closed by its owner
+            if self.transport is None:
+                await self._async_client.close()
+            self._async_client = None
+
+
+class StubBackend(ModelBackend):
+    """Local stand-in: answers after `latency` (+ up to `jitter`) seconds, failing with probability error_rate.
+
+    `answer` is the raw text to return, or a callable taking the messages.
+    """
+
+    def __init__(self, name: str, answer: Union[str, Callable[[List[dict]], str]] = None, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(name, f"stub:{name}")
+        self.answer = answer or json.dumps({"yes_probability": 0.5, "reason": f"Stub answer from {name}"})
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def _draw(self):
+        with self._lock:
+            delay = self.latency + self._random.random() * self.jitter
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+    def _answer(self, messages, fail):
+        if fail:
+            raise RuntimeError(f"Stub backend {self.name} failed")
+        return self.answer(messages) if callable(self.answer) else self.answer
+
+    def _complete(self, messages, estimated_tokens):
+        delay, fail = self._draw()
+        time.sleep(delay)
+        return self._answer(messages, fail)
+
+    async def _acomplete(self, messages, estimated_tokens):
+        delay, fail = self._draw()
+        await asyncio.sleep(delay)
+        return self._answer(messages, fail)
+
+
+def ensemble_answer(answers: Sequence[tuple]) -> str:
+    """Average yes_probability over (backend name, raw answer) pairs; the first usable reason is kept"""
+    probabilities = []
+    reason = None
+    names = []
+    for name, raw_output in answers:
+        parsed = parse_signal_text(raw_output)
+        probability = as_probability(parsed.get("yes_probability"))
+        if probability is None or not 0 <= probability <= 1:
+            continue
+        probabilities.append(probability)
+        names.append(name)
+        reason = reason or parsed.get("reason")
+    if not probabilities:
+        raise ValueError("No backend returned a usable yes_probability")
+    return json.dumps({
+        "yes_probability": round(sum(probabilities) / len(probabilities), 4),
+        "reason": reason or "Ensemble average",
+        "models": names,
+    })
+
+
+class ModelRouter:
+    """Sends completions to one or more backends (see the module docstring for the modes)"""
+
+    def __init__(self, backends: Sequence[ModelBackend], mode: str = "single", hedge_percentile: float = 95,
+                 hedge_delay: float = 2.0, hedge_min_delay: float = 0.25, ensemble_deadline: float = 8.0,
+                 max_workers: int = 16):
+        if not backends:
+            raise ValueError("At least one model backend is required")
+        if mode not in ROUTER_MODES:
+            raise ValueError(f"Unknown model router mode {mode!r}; expected one of {', '.join(ROUTER_MODES)}")
+        if mode != "single" and len(backends) < 2:
+            mode = "single"  # Nothing to hedge or average with
+        self.backends = list(backends)
+        self.mode = mode
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay_initial = hedge_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.ensemble_deadline = ensemble_deadline
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.ensemble_partial = 0
+        self.failures = 0
+
+    @property
+    def cache_models(self) -> List[str]:
+        """Model names to look an answer up under in the LLM cache, preferred first.
+
+        Answers are stored under the model that produced them (see complete_with_model),
+        so a hedge won by the second backend is not passed off as the first one's. In
+        hedged mode any backend's answer is acceptable; an ensemble is its own model.
+        """
+        if self.mode == "ensemble":
+            return ["ensemble:" + ",".join(b.model for b in self.backends)]
+        if self.mode == "hedged":
+            return [b.model for b in self.backends]
+        return [self.backends[0].model]
+
+    def hedge_delay(self, backend: ModelBackend) -> float:
+        observed = backend.latency_percentile(self.hedge_percentile)
+        if observed is None:
+            return self.hedge_delay_initial
+        return max(self.hedge_min_delay, observed)
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-router")
+            return self._executor
+
+    def _submit(self, backend: ModelBackend, messages, estimated_tokens):
+        # Run in a copy of the caller's context so GroqGuard.background() still applies in the pool thread
+        context = contextvars.copy_context()
+        return self._get_executor().submit(context.run, backend.complete, messages, estimated_tokens)
+
+    # --- blocking ---
+
+    def complete(self, messages: List[dict], estimated_tokens: Optional[int] = None) -> str:
+        return self.complete_with_model(messages, estimated_tokens)[0]
+
+    def complete_with_model(self, messages: List[dict], estimated_tokens: Optional[int] = None) -> tuple:
+        """(raw answer, model that produced it): the hedge winner's model, or the ensemble's name"""
+        self._count(requests=1)
+        try:
+            if self.mode == "hedged":
+                return self._hedged(messages, estimated_tokens)
+            if self.mode == "ensemble":
+                return self._ensemble(messages, estimated_tokens), self.cache_models[0]
+            return self.backends[0].complete(messages, estimated_tokens), self.backends[0].model
+        except Exception:
+            self._count(failures=1)
+            raise
+
+    def _hedged(self, messages, estimated_tokens):
+        # A thread cannot be interrupted: a losing call that has started runs to completion in the
+        # pool (its answer is dropped, its tokens are still spent); one that has not started is cancelled
+        waiting = list(self.backends)
+        running = {}
+        error = None
+        next_hedge = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                if waiting and (not running or now >= next_hedge):
+                    backend = waiting.pop(0)
+                    if backend is not self.backends[0]:
+                        self._count(hedges=1)
+                    running[self._submit(backend, messages, estimated_tokens)] = backend
+                    next_hedge = now + self.hedge_delay(backend)
+                if not running:
+                    raise error
+                timeout = max(0.0, next_hedge - time.monotonic()) if waiting else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = running.pop(future)
+                    if future.exception() is None:
+                        if backend is not self.backends[0]:
+                            self._count(hedge_wins=1)
+                        return future.result(), backend.model
+                    error = future.exception()
+                    next_hedge = time.monotonic()  # Failed: bring the next backend in now
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _ensemble(self, messages, estimated_tokens):
+        futures = {self._submit(b, messages, estimated_tokens): b for b in self.backends}
+        done, pending = wait(futures, timeout=self.ensemble_deadline)
+        for future in pending:
+            future.cancel()  # Only stops calls still queued; started ones finish in the pool
+        answers = [(futures[f].name, f.result()) for f in futures if f in done and f.exception() is None]
+        if not answers:
+            errors = [f.exception() for f in done if f.exception() is not None]
+            raise errors[0] if errors else TimeoutError("No model answered before the ensemble deadline")
+        if len(answers) < len(self.backends):
+            self._count(ensemble_partial=1)
+        return ensemble_answer(answers)
+
+    # --- async ---
+
+    async def acomplete(self, messages: List[dict], estimated_tokens: Optional[int] = None) -> str:
+        return (await self.acomplete_with_model(messages, estimated_tokens))[0]
+
+    async def acomplete_with_model(self, messages: List[dict], estimated_tokens: Optional[int] = None) -> tuple:
+        self._count(requests=1)
+        try:
+            if self.mode == "hedged":
+                return await self._ahedged(messages, estimated_tokens)
+            if self.mode == "ensemble":
+                return await self._aensemble(messages, estimated_tokens), self.cache_models[0]
+            return await self.backends[0].acomplete(messages, estimated_tokens), self.backends[0].model
+        except Exception:
+            self._count(failures=1)
+            raise
+
+    async def _ahedged(self, messages, estimated_tokens):
+        waiting = list(self.backends)
+        running = {}
+        error = None
+        next_hedge = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                if waiting and (not running or now >= next_hedge):
+                    backend = waiting.pop(0)
+                    if backend is not self.backends[0]:
+                        self._count(hedges=1)
+                    running[asyncio.ensure_future(backend.acomplete(messages, estimated_tokens))] = backend
+                    next_hedge = now + self.hedge_delay(backend)
+                if not running:
+                    raise error
+                timeout = max(0.0, next_hedge - time.monotonic()) if waiting else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend = running.pop(task)
+                    if task.exception() is None:
+                        if backend is not self.backends[0]:
+                            self._count(hedge_wins=1)
+                        return task.result(), backend.model
+                    error = task.exception()
+                    next_hedge = time.monotonic()  # Failed: bring the next backend in now
+        finally:
+            # The slower requests are abandoned (their streams closed)
+            for task in running:
+                task.cancel()
+
+    async def _aensemble(self, messages, estimated_tokens):
+        tasks = {asyncio.ensure_future(b.acomplete(messages, estimated_tokens)): b for b in self.backends}
+        done, pending = await asyncio.wait(tasks, timeout=self.ensemble_deadline)
+        for task in pending:
+            task.cancel()
+        answers = [(tasks[t].name, t.result()) for t in tasks if t in done and t.exception() is None]
+        if not answers:
+            errors = [t.exception() for t in done if t.exception() is not None]
+            raise errors[0] if errors else TimeoutError("No model answered before the ensemble deadline")
+        if len(answers) < len(self.backends):
+            self._count(ensemble_partial=1)
+        return ensemble_answer(answers)
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.aclose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {
+                "mode": self.mode,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedgeWins": self.hedge_wins,
+                "ensemblePartial": self.ensemble_partial,
+                "failures": self.failures,
+            }
+        if self.mode == "hedged":
+            counters["hedgeDelayMs"] = round(self.hedge_delay(self.backends[0]) * 1000, 1)
+        counters["backends"] = [backend.stats() for backend in self.backends]
+        return counters
+
+
+def parse_backend_spec(spec: str) -> List[tuple]:
+    """Comma-separated `model`, `model@base_url` or `model@base_url|API_KEY_ENV` entries
+    -> [(name, model, base_url, api_key_env)].
+
+    Groq's own endpoint (no base_url) reads GROQ_API_KEY unless another variable is named;
+    other endpoints only get the key from their own variable, never Groq's.
+    """
+    entries = []
+    for item in (spec or "").split(","):
+        item, _, api_key_env = item.partition("|")
+        item = item.strip()
+        if not item:
+            continue
+        model, _, base_url = item.partition("@")
+        name = model if base_url == "" else f"{model}@{base_url}"
+        base_url = base_url.strip() or None
+        api_key_env = api_key_env.strip() or ("GROQ_API_KEY" if base_url is None else None)
+        entries.append((name, model.strip(), base_url, api_key_env))
+    return entries
@@ -1,35 +1,207 @@
 import os
-from typing import List
-from newsapi import NewsApiClient
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import httpx
+from newsapi import NewsApiClient, const as newsapi_const
+from http_pool import transports
+from metrics import outbound
 
-def get_news_lines(query: str, max_items: int = 6) -> List[str]:
-    """Return concise news lines for a query using NewsAPI.
+# Cache tuning: entries are fresh for NEWS_CACHE_TTL seconds, then served stale
+# (while a background refresh runs) for another NEWS_CACHE_STALE seconds
+NEWS_CACHE_TTL = float(os.getenv('NEWS_CACHE_TTL', '300'))
+NEWS_CACHE_STALE = float(os.getenv('NEWS_CACHE_STALE', '900'))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv('NEWS_CACHE_MAX_ENTRIES', '1000'))
 
-    Each line is formatted like: "Title - Source | Description"
-    """
-    api_key = os.getenv('NEWS_API_KEY') or '0c17b412e22846c6b1ce4cd63d5d9fb4'
-    try:
-        client = NewsApiClient(api_key=api_key)
-        q = (query or 'crypto OR bitcoin OR ethereum').strip()
-        res = client.get_everything(
+DEFAULT_QUERY = 'crypto OR bitcoin OR ethereum'
+NEWS_API_URL = os.getenv('NEWS_API_URL', 'https://newsapi.org/v2/everything')
+
+_client: Optional[NewsApiClient] = None
+_client_lock = threading.Lock()
+
+# normalized query -> (fetched_at, max_items fetched, lines)
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+_refreshing = set()
+_stats: Dict[str, int] = {'hits': 0, 'staleHits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0, 'evictions': 0}
+
+
+def _count(name: str):
+    with _cache_lock:
+        _stats[name] += 1
+
+
+def _api_key() -> str:
+    return os.getenv('NEWS_API_KEY') or '0c17b412e22846c6b1ce4cd63d5d9fb4'
+
+
+def get_client() -> NewsApiClient:
+    """Module-level NewsApiClient shared by every request, on the pooled keep-alive newsapi session"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # NewsApiClient has no base URL option; it reads the endpoint from its const module
+                newsapi_const.EVERYTHING_URL = NEWS_API_URL
+                _client = NewsApiClient(api_key=_api_key(), session=transports.get('newsapi').session)
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled httpx client used by the async (ASGI) serving mode"""
+    return transports.get('newsapi').async_client
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop trailing punctuation and collapse whitespace so repeats share a cache key"""
+    q = (query or DEFAULT_QUERY).strip().lower()
+    q = re.sub(r'[?!.]+$', '', q)
+    return re.sub(r'\s+', ' ', q).strip() or DEFAULT_QUERY.lower()
+
+
+def _format_articles(articles: List[dict], max_items: int) -> List[str]:
+    lines: List[str] = []
+    for a in articles[:max_items]:
+        title = a.get('title') or ''
+        src = (a.get('source') or {}).get('name') or ''
+        desc = a.get('description') or ''
+        parts = [p for p in [f"{title} - {src}".strip(' -'), desc] if p]
+        lines.append(" | ".join(parts)[:300])
+    return lines
+
+
+def _fetch_news_lines(query: str, max_items: int) -> List[str]:
+    q = (query or DEFAULT_QUERY).strip()
+    with outbound('newsapi'):
+        res = get_client().get_everything(
             q=q,
             language='en',
             sort_by='publishedAt',
             page_size=max_items,
         )
-        articles = (res or {}).get('articles', [])
-        lines: List[str] = []
-        for a in articles[:max_items]:
-            title = a.get('title') or ''
-            src = (a.get('source') or {}).get('name') or ''
-            desc = a.get('description') or ''
-            parts = [p for p in [f"{title} - {src}".strip(' -'), desc] if p]
-            lines.append(" | ".join(parts)[:300])
+    return _format_articles((res or {}).get('articles', []), max_items)
+
+
+async def _afetch_news_lines(query: str, max_items: int) -> List[str]:
+    q = (query or DEFAULT_QUERY).strip()
+    with outbound('newsapi'):
+        response = await get_async_client().get(NEWS_API_URL, params={
+            'q': q,
+            'language': 'en',
+            'sortBy': 'publishedAt',
+            'pageSize': max_items,
+        }, headers={'X-Api-Key': _api_key()})
+        response.raise_for_status()
+    return _format_articles(response.json().get('articles', []), max_items)
+
+
+def _store(key: str, max_items: int, lines: List[str]):
+    with _cache_lock:
+        _cache[key] = (time.time(), max_items, lines)
+        _cache.move_to_end(key)
+        while len(_cache) > NEWS_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def _refresh_in_background(key: str, query: str, max_items: int):
+    with _cache_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            _store(key, max_items, _fetch_news_lines(query, max_items))
+            _count('refreshes')
+        except Exception as e:
+            _count('errors')
+            print(f"NewsAPI refresh error: {e}")
+        finally:
+            with _cache_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name='news-refresh', daemon=True).start()
+
+
+def _cached_lines(key: str, query: str, max_items: int) -> Optional[List[str]]:
+    """Serve from cache (kicking off a refresh for stale entries) or None on a miss"""
+    now = time.time()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+
+    if entry is not None:
+        fetched_at, fetched_items, lines = entry
+        # A larger cached page (or a short, exhausted result) can answer smaller requests
+        if fetched_items >= max_items or len(lines) < fetched_items:
+            age = now - fetched_at
+            if age < NEWS_CACHE_TTL:
+                _count('hits')
+                return lines[:max_items]
+            if age < NEWS_CACHE_TTL + NEWS_CACHE_STALE:
+                _count('staleHits')
+                _refresh_in_background(key, query, fetched_items)
+                return lines[:max_items]
+
+    _count('misses')
+    return None
+
+
+def get_news_lines(query: str, max_items: int = 6) -> List[str]:
+    """Return concise news lines for a query using NewsAPI.
+
+    Each line is formatted like: "Title - Source | Description"
+    Results are cached per normalized query; stale entries are served while a
+    background refresh fetches new ones.
+    """
+    key = normalize_query(query)
+    lines = _cached_lines(key, query, max_items)
+    if lines is not None:
+        return lines
+
+    try:
+        lines = _fetch_news_lines(query, max_items)
+        _store(key, max_items, lines)
         return lines
     except Exception as e:
+        _count('errors')
         print(f"NewsAPI error: {e}")
         return []
 
+
+async def aget_news_lines(query: str, max_items: int = 6) -> List[str]:
+    """Async variant of get_news_lines sharing the same cache"""
+    key = normalize_query(query)
+    lines = _cached_lines(key, query, max_items)
+    if lines is not None:
+        return lines
+
+    try:
+        lines = await _afetch_news_lines(query, max_items)
+        _store(key, max_items, lines)
+        return lines
+    except Exception as e:
+        _count('errors')
+        print(f"NewsAPI error: {e}")
+        return []
+
+
+def get_news_cache_stats() -> Dict[str, float]:
+    """Counters for the news cache (hits, stale hits, misses, refreshes, errors)"""
+    with _cache_lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_cache)
+    lookups = stats['hits'] + stats['staleHits'] + stats['misses']
+    stats['hitRatio'] = round((stats['hits'] + stats['staleHits']) / lookups, 4) if lookups else 0.0
+    stats['ttlSeconds'] = NEWS_CACHE_TTL
+    stats['staleSeconds'] = NEWS_CACHE_STALE
+    return stats
+
+
 if __name__ == '__main__':
     # Simple manual test runner that prints JSON only
     import json as _json
@@ -0,0 +1,256 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+# Event ids (`${chainId}_${block}_${logIndex}`) sort as text, so pages follow the numeric
+# (blockNumber, logIndex) order instead; `offset` skips the bets of the cursor block already read
+BETS_PAGE_QUERY = """
+query SyncBets {
+  ParimutuelPredictionMarket_BetPlaced(
+    where: {blockNumber: {_gte: %(block)d}}
+    order_by: [{blockNumber: asc}, {logIndex: asc}]
+    limit: %(limit)d
+    offset: %(offset)d
+  ) {
+    id
+    questionId
+    outcomeIndex
+    amount
+    blockNumber
+    logIndex
+  }
+}
+"""
+
+
+def event_block(event_id: str) -> int:
+    """Block number from an Envio event id (`${chainId}_${block}_${logIndex}`)"""
+    try:
+        return int(event_id.split("_")[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def next_cursor(block: int, offset: int, rows: List[dict]) -> tuple:
+    """(block, bets of that block already read) after a page sorted by (blockNumber, logIndex)"""
+    last = int(rows[-1]["blockNumber"])
+    same = sum(1 for row in rows if int(row["blockNumber"]) == last)
+    # A page that never left the cursor block continues after what was read of it before
+    return last, offset + same if last == block else same
+
+
+def parimutuel_multiple(pools: Optional[List[float]], bet_on_yes: bool, stake: float = 0.0) -> Optional[float]:
+    """Gross payout per unit staked on YES (outcome 0) or NO (the other outcomes).
+
+    Winners split the whole pool in proportion to their stake, so this is total pool
+    / winning side's pool; with stake > 0 our own bet is added to both first, as
+    the contract would. Returns None when there is nothing to compute it from.
+    """
+    if not pools:
+        return None
+    pool_total = sum(pools)
+    side = pools[0] if bet_on_yes else pool_total - pools[0]
+    if side + stake <= 0:
+        return None
+    return (pool_total + stake) / (side + stake)
+
+
+def implied_prices(pools: Optional[List[float]]) -> Optional[List[float]]:
+    """Each outcome's share of the pool, i.e. the crowd's implied probability"""
+    if not pools:
+        return None
+    total = sum(pools)
+    if total <= 0:
+        return None
+    return [round(p / total, 6) for p in pools]
+
+
+class PoolStore:
+    """Running parimutuel pool totals built from Envio BetPlaced events.
+
+    Events are paged in (blockNumber, logIndex) order with a (block, offset)
+    cursor and applied exactly once (ids are recorded, so a resync is idempotent). Each new bet increments the
+    per-(questionId, outcomeIndex) total and, when bucket_blocks > 0, the total of
+    its block bucket, so "pool as of block N" is a small indexed sum. Backtests read
+    the totals only and never rescan bet events.
+
+    The cursor is numeric because Envio ids compare as strings ("296_5000_0" <
+    "296_500_9"). `sync(full=True)` re-reads everything without double counting.
+    """
+
+    def __init__(self, path: str, query_fn: Callable[[str], Optional[dict]], page_size: int = 1000,
+                 bucket_blocks: int = 1000, amount_decimals: int = 8):
+        self.path = path
+        self.query_fn = query_fn
+        self.page_size = page_size
+        self.bucket_blocks = bucket_blocks
+        # Bet amounts are stored as emitted (tinybars on Hedera) and scaled on read
+        self.amount_scale = 10 ** amount_decimals
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.last_sync_stats = None
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bets (
+                event_id TEXT PRIMARY KEY,
+                question_id INTEGER NOT NULL,
+                outcome_index INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                block INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bets_question_block ON bets(question_id, block);
+            CREATE TABLE IF NOT EXISTS pool_totals (
+                question_id INTEGER NOT NULL,
+                outcome_index INTEGER NOT NULL,
+                total REAL NOT NULL,
+                bets INTEGER NOT NULL,
+                PRIMARY KEY (question_id, outcome_index)
+            );
+            CREATE TABLE IF NOT EXISTS pool_buckets (
+                question_id INTEGER NOT NULL,
+                outcome_index INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                PRIMARY KEY (question_id, bucket, outcome_index)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at REAL
+            );
+            """
+        )
+        self._db.commit()
+
+    def _get_state(self, name, default=None):
+        row = self._db.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, name, value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO sync_state (name, value, updated_at) VALUES (?, ?, ?)",
+            (name, str(value), time.time()),
+        )
+
+    # --- ingestion ---
+
+    def sync(self, full: bool = False) -> dict:
+        """Apply BetPlaced events newer than the cursor; raises if the endpoint fails"""
+        with self._sync_lock:
+            started = time.time()
+            with self._lock:
+                block = 0 if full else int(self._get_state("bets.block", 0))
+                offset = 0 if full else int(self._get_state("bets.block_offset", 0))
+
+            pages = 0
+            new_bets = 0
+            while True:
+                data = self.query_fn(BETS_PAGE_QUERY % {"block": block, "offset": offset, "limit": self.page_size})
+                if data is None:
+                    raise RuntimeError("Envio query failed")
+                rows = data.get("ParimutuelPredictionMarket_BetPlaced", [])
+                if not rows:
+                    break
+                pages += 1
+                new_bets += self.apply(rows)
+                block, offset = next_cursor(block, offset, rows)
+                with self._lock:
+                    self._set_state("bets.block", block)
+                    self._set_state("bets.block_offset", offset)
+                    self._db.commit()
+                if len(rows) < self.page_size:
+                    break
+
+            self.last_sync_stats = {
+                "newBets": new_bets,
+                "pages": pages,
+                "cursor": {"block": block, "offset": offset},
+                "durationMs": int((time.time() - started) * 1000),
+            }
+            return self.last_sync_stats
+
+    def apply(self, events: Iterable[dict]) -> int:
+        """Fold BetPlaced events into the running totals; already-seen events are ignored"""
+        applied = 0
+        with self._lock:
+            for event in events:
+                question_id = int(event["questionId"])
+                outcome_index = int(event["outcomeIndex"])
+                amount = float(event["amount"])
+                block = int(event["blockNumber"]) if event.get("blockNumber") is not None else event_block(event["id"])
+                inserted = self._db.execute(
+                    "INSERT OR IGNORE INTO bets (event_id, question_id, outcome_index, amount, block) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (event["id"], question_id, outcome_index, amount, block),
+                ).rowcount
+                if not inserted:
+                    continue
+                self._db.execute(
+                    "INSERT INTO pool_totals (question_id, outcome_index, total, bets) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT(question_id, outcome_index) DO UPDATE SET total = total + excluded.total, bets = bets + 1",
+                    (question_id, outcome_index, amount),
+                )
+                if self.bucket_blocks > 0:
+                    self._db.execute(
+                        "INSERT INTO pool_buckets (question_id, outcome_index, bucket, amount) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(question_id, bucket, outcome_index) DO UPDATE SET amount = amount + excluded.amount",
+                        (question_id, outcome_index, block // self.bucket_blocks, amount),
+                    )
+                applied += 1
+            self._db.commit()
+        return applied
+
+    # --- queries ---
+
+    def pools(self, question_ids: Iterable) -> Dict[str, List[float]]:
+        """Final pool per outcome (in whole units) for each question id that has bets: {questionId: [pool0, ...]}"""
+        ids = [int(q) for q in question_ids]
+        result: Dict[str, List[float]] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                rows = self._db.execute(
+                    "SELECT question_id, outcome_index, total FROM pool_totals WHERE question_id IN (%s)"
+                    % ",".join("?" * len(chunk)),
+                    chunk,
+                ).fetchall()
+                for question_id, outcome_index, total in rows:
+                    pools = result.setdefault(str(question_id), [])
+                    pools.extend([0.0] * (outcome_index + 1 - len(pools)))
+                    pools[outcome_index] = total / self.amount_scale
+        return result
+
+    def pool_at(self, question_id, block: int) -> List[float]:
+        """Pool per outcome from bets before `block` (bucket-granular when bucketing is on)"""
+        with self._lock:
+            if self.bucket_blocks > 0:
+                rows = self._db.execute(
+                    "SELECT outcome_index, SUM(amount) FROM pool_buckets WHERE question_id = ? AND bucket < ? "
+                    "GROUP BY outcome_index",
+                    (int(question_id), block // self.bucket_blocks),
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT outcome_index, SUM(amount) FROM bets WHERE question_id = ? AND block < ? "
+                    "GROUP BY outcome_index",
+                    (int(question_id), block),
+                ).fetchall()
+        pools: List[float] = []
+        for outcome_index, total in rows:
+            pools.extend([0.0] * (outcome_index + 1 - len(pools)))
+            pools[outcome_index] = total / self.amount_scale
+        return pools
+
+    def counts(self) -> dict:
+        with self._lock:
+            bets = self._db.execute("SELECT COUNT(*) FROM bets").fetchone()[0]
+            markets = self._db.execute("SELECT COUNT(DISTINCT question_id) FROM pool_totals").fetchone()[0]
+        return {"bets": bets, "marketsWithBets": markets}
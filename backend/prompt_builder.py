@@ -0,0 +1,162 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+# Chat formatting tokens each message costs on top of its content
+MESSAGE_OVERHEAD = 4
+
+
+def count_tokens(text: str) -> int:
+    """Approximate Llama 3 token count: about 4 ASCII characters per token, one per other character.
+
+    Good enough to budget with; the exact counts come back in each completion's usage
+    and TokenUsage reports how far off the estimate was.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // 4) + (len(text) - ascii_chars)
+
+
+class PromptSection:
+    """Optional prompt block: a header, lines that are dropped from the end first, and a footer.
+
+    Lower priority numbers are filled first. The header and footer are only
+    included when at least one line fits.
+    """
+
+    def __init__(self, name: str, lines: Sequence[str], priority: int = 0, header: str = "", footer: str = ""):
+        self.name = name
+        self.lines = list(lines)
+        self.priority = priority
+        self.header = header
+        self.footer = footer
+        self.line_tokens = [count_tokens(line) + 1 for line in self.lines]  # +1 for the newline
+        self.frame_tokens = count_tokens(header) + count_tokens(footer) + 2
+
+    def render(self, count: int) -> str:
+        parts = ([self.header] if self.header else []) + self.lines[:count]
+        text = "\n".join(parts)
+        return f"{text}\n\n{self.footer}" if self.footer else text
+
+
+class Prompt:
+    """Assembled chat messages plus the estimated token count of each part"""
+
+    def __init__(self, messages: List[dict], tokens: int, sections: Dict[str, int], dropped: Dict[str, int]):
+        self.messages = messages
+        self.tokens = tokens
+        self.sections = sections
+        self.dropped = dropped
+
+    def stats(self) -> dict:
+        return {"estimatedTokens": self.tokens, "sections": self.sections, "droppedLines": self.dropped}
+
+
+class PromptBuilder:
+    """Builds chat prompts as: static prefix, question, optional sections, static suffix.
+
+    The system message, prefix and suffix are the same for every request, so they
+    are counted once here; per request only the question and the variable sections
+    are measured. Sections are added by priority, line by line, while the total
+    stays within `budget` tokens (the question is always kept).
+    """
+
+    def __init__(self, system: str, prefix: str, suffix: str, budget: int):
+        self.system = system
+        self.prefix = prefix
+        self.suffix = suffix
+        self.budget = budget
+        self.static_tokens = (count_tokens(system) + count_tokens(prefix) + count_tokens(suffix)
+                              + 2 * MESSAGE_OVERHEAD)
+
+    def build(self, question: str, sections: Sequence[PromptSection] = ()) -> Prompt:
+        question_text = f"Question: {question}"
+        counts = {"static": self.static_tokens, "question": count_tokens(question_text) + 2}
+        used = counts["static"] + counts["question"]
+        rendered = {}
+        dropped = {}
+
+        for section in sorted(sections, key=lambda s: s.priority):
+            cost = section.frame_tokens
+            kept = 0
+            for tokens in section.line_tokens:
+                if used + cost + tokens > self.budget:
+                    break
+                cost += tokens
+                kept += 1
+            if kept:
+                used += cost
+                counts[section.name] = cost
+                rendered[section.name] = section.render(kept)
+            if kept < len(section.lines):
+                dropped[section.name] = len(section.lines) - kept
+
+        # Sections keep the order they were given in, whatever their priority
+        body = [self.prefix, question_text] + [rendered[s.name] for s in sections if s.name in rendered]
+        body.append(self.suffix)
+        messages = [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": "\n\n".join(body)},
+        ]
+        return Prompt(messages, used, counts, dropped)
+
+
+class TokenUsage:
+    """Running prompt/completion token totals from LLM responses, plus the most recent requests"""
+
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_prompt_tokens = 0
+        self.estimated_requests_prompt_tokens = 0
+        self.early_stops = 0
+
+    def record(self, usage, estimated_prompt_tokens: Optional[int] = None, duration_ms: Optional[float] = None,
+               stopped_early: bool = False):
+        """Add one completion's `usage` (anything with prompt_tokens / completion_tokens).
+
+        A stream closed early never receives the usage block; pass an object whose
+        prompt_tokens is None and the estimate is counted instead.
+        """
+        measured = getattr(usage, "prompt_tokens", None) is not None
+        prompt_tokens = int(usage.prompt_tokens) if measured else int(estimated_prompt_tokens or 0)
+        completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.early_stops += stopped_early
+            if estimated_prompt_tokens and measured:
+                # Only requests with both numbers count towards the estimate's accuracy
+                self.estimated_prompt_tokens += estimated_prompt_tokens
+                self.estimated_requests_prompt_tokens += prompt_tokens
+            self._recent.append({
+                "promptTokens": prompt_tokens,
+                "completionTokens": completion_tokens,
+                "estimatedPromptTokens": estimated_prompt_tokens,
+                "stoppedEarly": stopped_early,
+                "durationMs": round(duration_ms, 1) if duration_ms is not None else None,
+                "timestamp": int(time.time() * 1000),
+            })
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.requests
+            return {
+                "requests": requests,
+                "promptTokens": self.prompt_tokens,
+                "completionTokens": self.completion_tokens,
+                "totalTokens": self.prompt_tokens + self.completion_tokens,
+                "avgPromptTokens": round(self.prompt_tokens / requests, 1) if requests else 0.0,
+                "avgCompletionTokens": round(self.completion_tokens / requests, 1) if requests else 0.0,
+                "earlyStops": self.early_stops,
+                # Actual / estimated prompt tokens; 1.0 means count_tokens is spot on
+                "estimateRatio": (round(self.estimated_requests_prompt_tokens / self.estimated_prompt_tokens, 3)
+                                  if self.estimated_prompt_tokens else None),
+                "recent": list(self._recent),
+            }
@@ -0,0 +1,187 @@
+"""
+Reuse of recent LLM answers for reworded copies of a question.
+
+Questions are canonicalized first. That means lowercasing, mapping aliases
+(btc -> bitcoin, hit/reach/surpass -> reach), rewriting amounts ($100k, 100,000
+-> 100000) and year-end deadlines ("by end of 2024" -> "before 2025"), and
+dropping filler words. An answer is only reused when the canonical content
+tokens of both questions are the same, in the same order, with the same numbers,
+negations, assets and direction words. Any differing entity, verb or date
+("cut" vs "raise", "Friday" vs "Monday", "Apple" vs "Google") or swapped sides
+("Celtics beat Lakers" vs "Lakers beat Celtics") means a fresh evaluation.
+The canonical form is the dictionary key, so a lookup is a single hash probe.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, List, Optional, Tuple
+
+ASSET_ALIASES = {
+    "btc": "bitcoin", "bitcoin": "bitcoin", "xbt": "bitcoin",
+    "eth": "ethereum", "ether": "ethereum", "ethereum": "ethereum",
+    "sol": "solana", "solana": "solana",
+    "doge": "dogecoin", "dogecoin": "dogecoin",
+    "xrp": "xrp", "ripple": "xrp",
+    "hbar": "hedera", "hedera": "hedera",
+    "bnb": "bnb", "ada": "cardano", "cardano": "cardano",
+    "us": "usa", "usa": "usa", "america": "usa",
+    "uk": "uk", "britain": "uk",
+    "fed": "fed", "fomc": "fed",
+}
+WORD_ALIASES = {
+    "hit": "reach", "hits": "reach", "reach": "reach", "reaches": "reach", "touch": "reach",
+    "touches": "reach", "surpass": "reach", "surpasses": "reach", "exceed": "reach", "exceeds": "reach",
+    "cross": "reach", "crosses": "reach", "top": "reach", "tops": "reach", "break": "reach", "breaks": "reach",
+    "above": "above", "over": "above", "higher": "above",
+    "below": "below", "under": "below", "lower": "below",
+    "before": "before", "until": "before", "prior": "before",
+    "after": "after", "later": "after", "since": "after",
+    "beat": "beat", "beats": "beat", "defeat": "beat", "defeats": "beat", "outperform": "beat",
+    "outperforms": "beat", "flip": "beat", "flips": "beat",
+    "lose": "lose", "loses": "lose", "losing": "lose", "lost": "lose", "underperform": "lose",
+    "underperforms": "lose",
+    "win": "win", "wins": "win", "winning": "win",
+    "price": "price", "prices": "price", "priced": "price",
+}
+# Canonical words that set which side of a comparison a question is on
+DIRECTIONS = {"above", "below", "before", "after", "beat", "lose", "win"}
+NEGATIONS = {"not", "no", "never", "fail", "fails", "without"}
+STOPWORDS = {
+    "will", "would", "the", "a", "an", "of", "by", "in", "on", "to", "be", "is", "at", "for", "and",
+    "or", "does", "do", "its", "it", "this", "that", "than", "then", "there", "any", "time",
+    "value", "usd", "dollar", "dollars", "mark", "level",
+}
+
+_MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "m": 1_000_000, "mm": 1_000_000, "million": 1_000_000,
+                "b": 1_000_000_000, "bn": 1_000_000_000, "billion": 1_000_000_000}
+_AMOUNT = re.compile(r"\$?\s*(\d+(?:,\d{3})*(?:\.\d+)?)\s*(k|thousand|mm|m|million|bn|b|billion)?\b")
+_YEAR_END = re.compile(r"\b(?:by|before|at)?\s*(?:the\s+)?end\s+of\s+(?:the\s+year\s+)?(\d{4})\b"
+                       r"|\bby\s+dec(?:ember)?\.?\s+31(?:st)?,?\s+(\d{4})\b")
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def _amount(match) -> str:
+    number = float(match.group(1).replace(",", ""))
+    if match.group(2):
+        number *= _MULTIPLIERS[match.group(2)]
+    return f" {int(number) if number.is_integer() else number} "
+
+
+def _year_end(match) -> str:
+    return f" before {int(match.group(1) or match.group(2)) + 1} "
+
+
+class QuestionFeatures:
+    """Canonical token set, the tokens in first-seen order, and the exact-match guard
+    (numbers, negations, assets in order, direction words)"""
+
+    __slots__ = ("tokens", "sequence", "guard")
+
+    def __init__(self, tokens: FrozenSet[str], sequence: Tuple[str, ...], guard: tuple):
+        self.tokens = tokens
+        self.sequence = sequence
+        self.guard = guard
+
+
+def question_features(question: str) -> QuestionFeatures:
+    text = (question or "").lower()
+    text = _YEAR_END.sub(_year_end, text)
+    # Years stay as they are (no multiplier); "$100k" and "100,000" both become 100000
+    text = _AMOUNT.sub(_amount, text)
+
+    sequence: List[str] = []
+    numbers = set()
+    negations = 0
+    assets: List[str] = []
+    for word in _TOKEN.findall(text):
+        if word in NEGATIONS:
+            negations += 1
+            sequence.append("not")
+            continue
+        if word in ASSET_ALIASES:
+            asset = ASSET_ALIASES[word]
+            if not assets or assets[-1] != asset:
+                assets.append(asset)
+            sequence.append(asset)
+            continue
+        if word[0].isdigit():
+            numbers.add(word)
+            sequence.append(word)
+            continue
+        if word in STOPWORDS:
+            continue
+        word = WORD_ALIASES.get(word, word)
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        sequence.append(word)
+    sequence = tuple(dict.fromkeys(sequence))
+    directions = frozenset(w for w in sequence if w in DIRECTIONS)
+    return QuestionFeatures(frozenset(sequence), sequence,
+                            (frozenset(numbers), negations % 2, tuple(assets), directions))
+
+
+class SimilarQuestionIndex:
+    """Recent (question -> result) pairs, looked up by canonical wording.
+
+    `add(question, result, scope)` stores a result and `find(question, scope)`
+    returns the stored entry whose canonical form equals the question's, stored
+    within `max_age` seconds and under the same `scope` (e.g. the backtest
+    context fingerprint). At most `max_entries` are kept, oldest evicted first.
+    """
+
+    def __init__(self, max_age: float = 1800, max_entries: int = 100_000):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(question: str, scope) -> Optional[tuple]:
+        features = question_features(question)
+        if not features.tokens:
+            return None
+        return scope, features.sequence, features.guard
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, oldest = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - oldest["storedAt"] < self.max_age:
+                break
+            del self._entries[key]
+
+    def add(self, question: str, result, scope=None):
+        key = self._key(question, scope)
+        if key is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {"question": question, "result": result, "storedAt": now}
+            self._evict(now)
+
+    def find(self, question: str, scope=None) -> Optional[Tuple[dict, float]]:
+        """(stored entry, similarity) for a fresh copy of the question, or None.
+        Similarity is always 1.0: only identical canonical forms match."""
+        key = self._key(question, scope)
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or time.time() - entry["storedAt"] >= self.max_age:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry, 1.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxAgeSeconds": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,194 @@
+import re
+import json
+from typing import Dict, Iterable, Optional
+
+SIGNAL_FIELDS = ("yes_probability", "reason")
+
+# Parser states
+_SEEK, _KEY, _KEY_STRING, _COLON, _VALUE, _STRING, _SCALAR, _NESTED, _AFTER_VALUE, _DONE = range(10)
+
+# Only used when the model answered in prose instead of JSON
+_PERCENT_PATTERN = re.compile(r'(\d+\.?\d*)\s*(?:%|percent)')
+_DECIMAL_PATTERN = re.compile(r'(\d+\.\d+)')
+
+
+class SignalStreamParser:
+    """Incremental, tolerant parser for the model's flat JSON answer.
+
+    feed() takes completion text as it streams in and walks it one character at a
+    time through a small state machine, so the total cost is linear in the text
+    length however it is chunked. Text before the first `{` is skipped, nested
+    values are skipped over, and each top-level key/value is recorded as soon as
+    its value is complete. feed() returns True once every wanted field is known,
+    at which point the caller can stop reading the stream.
+    """
+
+    def __init__(self, fields: Iterable[str] = SIGNAL_FIELDS):
+        self.fields = tuple(fields)
+        self.values: Dict[str, object] = {}
+        self.chars = 0
+        self._raw = []
+        self._state = _SEEK
+        self._buf = []
+        self._key = None
+        self._escaped = False
+        self._depth = 0
+        self._nested_string = False
+
+    @property
+    def complete(self) -> bool:
+        return all(field in self.values for field in self.fields)
+
+    def feed(self, chunk: str) -> bool:
+        self._raw.append(chunk)
+        self.chars += len(chunk)
+        for ch in chunk:
+            if self._state == _DONE:
+                break
+            self._step(ch)
+        return self.complete
+
+    def _step(self, ch):
+        state = self._state
+        if state in (_KEY_STRING, _STRING):
+            if self._escaped:
+                self._escaped = False
+                self._buf.append(ch)
+            elif ch == "\\":
+                self._escaped = True
+                self._buf.append(ch)
+            elif ch == '"':
+                text = self._decode_string("".join(self._buf))
+                self._buf = []
+                if state == _KEY_STRING:
+                    self._key = text
+                    self._state = _COLON
+                else:
+                    self._store(text)
+                    self._state = _AFTER_VALUE
+            else:
+                self._buf.append(ch)
+        elif state == _SEEK:
+            if ch == "{":
+                self._state = _KEY
+        elif state == _KEY:
+            if ch == '"':
+                self._state = _KEY_STRING
+            elif ch == "}":
+                self._state = _DONE
+        elif state == _COLON:
+            if ch == ":":
+                self._state = _VALUE
+        elif state == _VALUE:
+            if ch == '"':
+                self._state = _STRING
+            elif ch in "{[":
+                self._depth = 1
+                self._state = _NESTED
+            elif not ch.isspace():
+                self._buf = [ch]
+                self._state = _SCALAR
+        elif state == _SCALAR:
+            if ch in ",}" or ch.isspace():
+                self._store(self._decode_scalar("".join(self._buf)))
+                self._buf = []
+                self._state = _DONE if ch == "}" else (_KEY if ch == "," else _AFTER_VALUE)
+            else:
+                self._buf.append(ch)
+        elif state == _NESTED:
+            self._skip_nested(ch)
+        elif state == _AFTER_VALUE:
+            if ch == ",":
+                self._state = _KEY
+            elif ch == "}":
+                self._state = _DONE
+
+    def _skip_nested(self, ch):
+        if self._nested_string:
+            if self._escaped:
+                self._escaped = False
+            elif ch == "\\":
+                self._escaped = True
+            elif ch == '"':
+                self._nested_string = False
+        elif ch == '"':
+            self._nested_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if not self._depth:
+                self._state = _AFTER_VALUE
+
+    def _store(self, value):
+        if self._key is not None and self._key not in self.values:
+            self.values[self._key] = value
+        self._key = None
+
+    @staticmethod
+    def _decode_string(raw: str) -> str:
+        if "\\" not in raw:
+            return raw
+        try:
+            return json.loads(f'"{raw}"')
+        except ValueError:
+            return raw
+
+    @staticmethod
+    def _decode_scalar(raw: str):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return raw
+
+    def text(self) -> str:
+        """Canonical JSON of the wanted fields once complete, else the raw text received"""
+        if self.complete:
+            return json.dumps({field: self.values[field] for field in self.fields})
+        return "".join(self._raw)
+
+
+def parse_signal_text(text: str) -> Dict[str, object]:
+    """Fields found in a complete answer, parsed with the same state machine"""
+    parser = SignalStreamParser()
+    parser.feed(text or "")
+    return parser.values
+
+
+def extract_signal_fields(text: str) -> Dict[str, object]:
+    """Best-effort yes_probability / reason from a prose answer"""
+    yes_prob = 0.5  # Default neutral
+    prob_match = _PERCENT_PATTERN.search(text.lower())
+    if prob_match:
+        yes_prob = float(prob_match.group(1)) / 100
+    else:
+        decimal_match = _DECIMAL_PATTERN.search(text)
+        if decimal_match:
+            val = float(decimal_match.group(1))
+            if val <= 1.0:
+                yes_prob = val
+            elif val <= 100:
+                yes_prob = val / 100
+
+    # First sentence as the reason
+    reason = text.split('.')[0].strip() or "Unable to parse AI response, using neutral stance."
+    if len(reason) > 100:
+        reason = reason[:100] + "..."
+    return {"yes_probability": yes_prob, "reason": reason}
+
+
+def as_probability(value) -> Optional[float]:
+    """yes_probability as a float (accepts "0.7" and "70%"), None when it is not a number"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.endswith("%"):
+            try:
+                return float(value[:-1]) / 100
+            except ValueError:
+                return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,200 @@
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class SignalStore:
+    """Signals precomputed in the background for markets that are still open.
+
+    A daemon thread reads the open markets (`load_markets()`, QuestionAdded with
+    endTime in the future, soonest first) every `poll_interval` seconds and
+    evaluates the ones that are due. It evaluates once per backtest context from
+    `contexts()`, and at most `max_per_cycle` evaluations run per pass, so
+    upstream calls are spread out instead of arriving in bursts.
+
+    A market is refreshed every `refresh_interval(endTime)` seconds. That is
+    `base_interval` far from the end, shrinking to `horizon_fraction` of the
+    remaining time and never below `min_interval`. Entries are re-evaluated
+    slightly before they expire, and the request path only serves an entry that
+    is no older than its interval.
+
+    `evaluate(question, context)` returns (yes_probability, reason).
+    `decide(yes_probability, reason, risk_level, market_price)` turns that into a
+    signal; it is stored for each of `risk_levels` at the market's implied price.
+    """
+
+    # Entries are re-evaluated once this share of their interval has passed
+    REFRESH_AHEAD = 0.8
+
+    def __init__(self, load_markets: Callable[[], List[dict]], evaluate: Callable[[str, Optional[dict]], tuple],
+                 decide: Callable[..., dict], key_fn: Callable[[str, Optional[dict]], tuple],
+                 contexts: Callable[[], Sequence[Optional[dict]]] = lambda: [None],
+                 risk_levels: Sequence[str] = ("low", "medium", "high"), base_interval: float = 900,
+                 min_interval: float = 60, horizon_fraction: float = 0.1, poll_interval: float = 30,
+                 max_markets: int = 200, max_per_cycle: int = 20):
+        self.load_markets = load_markets
+        self.evaluate = evaluate
+        self.decide = decide
+        self.key_fn = key_fn
+        self.contexts = contexts
+        self.risk_levels = tuple(risk_levels)
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.horizon_fraction = horizon_fraction
+        self.poll_interval = poll_interval
+        self.max_markets = max_markets
+        self.max_per_cycle = max_per_cycle
+        self._entries: Dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self.last_cycle = None
+        self.hits = 0
+        self.misses = 0
+        self.evaluations = 0
+        self.errors = 0
+
+    def refresh_interval(self, end_time: float, now: Optional[float] = None) -> float:
+        remaining = max(0.0, end_time - (now or time.time()))
+        return max(self.min_interval, min(self.base_interval, remaining * self.horizon_fraction))
+
+    def _is_fresh(self, entry: dict, now: float, share: float = 1.0) -> bool:
+        return now < entry["endTime"] and now - entry["computedAt"] < share * self.refresh_interval(entry["endTime"], now)
+
+    def lookup(self, question: str, context: Optional[dict] = None) -> Optional[dict]:
+        """The stored entry for this question and backtest context if it is still fresh, else None"""
+        key = self.key_fn(question, context)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry, now):
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return None
+
+    @staticmethod
+    def describe(entry: dict) -> dict:
+        """What the request path adds to a response served from the store"""
+        return {
+            "questionId": entry["questionId"],
+            "computedAt": int(entry["computedAt"] * 1000),
+            "ageSeconds": round(time.time() - entry["computedAt"], 1),
+        }
+
+    def _due(self, markets: List[dict], contexts: Sequence[Optional[dict]], now: float) -> List[Tuple[dict, Optional[dict]]]:
+        due = []
+        with self._lock:
+            for market in markets:
+                for context in contexts:
+                    entry = self._entries.get(self.key_fn(market["question"], context))
+                    if entry is None or not self._is_fresh(entry, now, self.REFRESH_AHEAD):
+                        due.append((market, context))
+        return due
+
+    def _store(self, market: dict, context: Optional[dict], yes_probability: float, reason: str):
+        prices = market.get("impliedPrices")
+        market_price = prices[0] if prices else 0.5
+        entry = {
+            "questionId": str(market["questionId"]),
+            "question": market["question"],
+            "endTime": market["endTime"],
+            "withBacktest": context is not None,
+            "yesProbability": yes_probability,
+            "reason": reason,
+            "marketPrice": market_price,
+            "computedAt": time.time(),
+            "signals": {
+                risk: self.decide(yes_probability, reason, risk, market_price)["signal"] for risk in self.risk_levels
+            },
+        }
+        with self._lock:
+            self._entries[self.key_fn(market["question"], context)] = entry
+
+    def refresh(self) -> dict:
+        """One scheduler pass: evaluate the open markets that are due (soonest endTime first)"""
+        started = time.time()
+        markets = self.load_markets()[:self.max_markets]
+        contexts = list(self.contexts())
+
+        keep = {self.key_fn(m["question"], c) for m in markets for c in contexts}
+        with self._lock:
+            for key in [k for k in self._entries if k not in keep]:
+                del self._entries[key]
+
+        due = self._due(markets, contexts, started)
+        evaluated = errors = 0
+        for market, context in due[:self.max_per_cycle]:
+            try:
+                yes_probability, reason = self.evaluate(market["question"], context)
+            except Exception as e:
+                # Keep serving the previous entry until it expires
+                errors += 1
+                print(f"Error precomputing signal for market {market.get('questionId')}: {e}")
+                continue
+            self._store(market, context, yes_probability, reason)
+            evaluated += 1
+
+        with self._lock:
+            self.evaluations += evaluated
+            self.errors += errors
+        self.last_cycle = {
+            "openMarkets": len(markets),
+            "due": len(due),
+            "evaluated": evaluated,
+            "errors": errors,
+            "durationMs": int((time.time() - started) * 1000),
+        }
+        return self.last_cycle
+
+    def request_refresh(self):
+        """Ask the background thread to re-check now (non-blocking)"""
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background scheduler once; safe to call from every request"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="signal-precompute", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                cycle = self.refresh()
+                self.last_error = None
+                # Work left over from a capped pass continues right away (unless upstream is failing)
+                backlog = not cycle["errors"] and cycle["due"] > cycle["evaluated"]
+            except Exception as e:
+                self.last_error = str(e)
+                backlog = False
+                print(f"Error precomputing signals: {e}")
+            if not backlog:
+                self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def entries(self) -> List[dict]:
+        """Stored entries, soonest endTime first"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return sorted(entries, key=lambda e: (e["endTime"], e["questionId"], e["withBacktest"]))
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.values())
+            counters = {
+                "running": bool(self._thread and self._thread.is_alive()),
+                "entries": len(entries),
+                "fresh": sum(1 for e in entries if self._is_fresh(e, now)),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evaluations": self.evaluations,
+                "errors": self.errors,
+            }
+        counters["lastCycle"] = self.last_cycle
+        counters["lastError"] = self.last_error
+        return counters
@@ -0,0 +1,374 @@
+import os
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class PredictionMatrix:
+    """LLM predictions for resolved markets, gathered once and re-simulated many times.
+
+    One row per market: the model's YES confidence (NaN when the market could not
+    be scored), its direction, the market's actual winning outcome and its final
+    pool sizes, plus the question metadata needed to render trade records.
+    """
+
+    FIELDS = ("question_id", "question", "end_time", "confidence", "direction", "winning_outcome", "winning_name",
+              "yes_pool", "total_pool")
+
+    def __init__(self, question_id, question, end_time, confidence, direction, winning_outcome, winning_name,
+                 yes_pool=None, total_pool=None):
+        self.question_id = np.asarray(question_id, dtype=str)
+        self.question = np.asarray(question, dtype=str)
+        self.end_time = np.asarray(end_time, dtype=np.int64)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.direction = np.asarray(direction, dtype=str)
+        self.winning_outcome = np.asarray(winning_outcome, dtype=np.int64)
+        self.winning_name = np.asarray(winning_name, dtype=str)
+        # Final parimutuel pools (outcome 0 and all outcomes), NaN when nobody bet
+        blank = np.full(len(self.question_id), np.nan)
+        self.yes_pool = blank if yes_pool is None else np.asarray(yes_pool, dtype=np.float64)
+        self.total_pool = blank.copy() if total_pool is None else np.asarray(total_pool, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "PredictionMatrix":
+        return cls(*([[]] * len(cls.FIELDS)))
+
+    @classmethod
+    def from_predictions(cls, markets: List[dict], predictions: Iterable[Optional[dict]]) -> "PredictionMatrix":
+        """Build a matrix from markets and their generate_signal results (None = not scored).
+        Degraded fallback signals count as not scored."""
+        columns = {name: [] for name in cls.FIELDS}
+        for market, prediction in zip(markets, predictions):
+            scored = bool(prediction and prediction.get("success") and not prediction.get("degraded"))
+            signal = prediction["signal"] if scored else {}
+            columns["question_id"].append(str(market["questionId"]))
+            columns["question"].append(market.get("question", ""))
+            columns["end_time"].append(int(market.get("endTime") or 0))
+            columns["confidence"].append(signal.get("confidence", np.nan) if scored else np.nan)
+            columns["direction"].append(signal.get("direction", ""))
+            columns["winning_outcome"].append(int(market["winningOutcome"]))
+            columns["winning_name"].append(market.get("winningOutcomeName", ""))
+            pools = market.get("outcomePools")
+            columns["yes_pool"].append(pools[0] if pools else np.nan)
+            columns["total_pool"].append(sum(pools) if pools else np.nan)
+        return cls(**columns)
+
+    def __len__(self) -> int:
+        return len(self.question_id)
+
+    @property
+    def scored(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.confidence)))
+
+    def take(self, rows) -> "PredictionMatrix":
+        return PredictionMatrix(**{name: getattr(self, name)[rows] for name in self.FIELDS})
+
+    def select(self, question_ids: Iterable) -> "PredictionMatrix":
+        """Rows for the given question ids, in that order (unknown ids are skipped)"""
+        positions = {qid: row for row, qid in enumerate(self.question_id.tolist())}
+        rows = [positions[str(qid)] for qid in question_ids if str(qid) in positions]
+        return self.take(np.asarray(rows, dtype=np.int64))
+
+    def merge(self, other: "PredictionMatrix") -> "PredictionMatrix":
+        """Union of both matrices (rows from `other` win), newest market first"""
+        # Unscored rows in `other` must not erase an earlier successful prediction
+        known = np.isin(other.question_id, self.question_id)
+        other = other.take(np.flatnonzero(~np.isnan(other.confidence) | ~known))
+        keep = ~np.isin(self.question_id, other.question_id)
+        merged = PredictionMatrix(**{
+            name: np.concatenate([getattr(self, name)[keep], getattr(other, name)]) for name in self.FIELDS
+        })
+        return merged.take(np.argsort(-merged.end_time, kind="stable"))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **{name: getattr(self, name) for name in self.FIELDS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PredictionMatrix":
+        if not os.path.exists(path):
+            return cls.empty()
+        with np.load(path, allow_pickle=False) as data:
+            # Files written before a column existed load it as missing
+            return cls(**{name: data[name] for name in cls.FIELDS if name in data.files})
+
+
+class PredictionStore:
+    """Thread-safe, file-backed PredictionMatrix that accumulates rows across backtests"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._confidences = None
+
+    def get(self) -> PredictionMatrix:
+        with self._lock:
+            if self._matrix is None:
+                try:
+                    self._matrix = PredictionMatrix.load(self.path)
+                except Exception as e:
+                    print(f"Could not load saved predictions: {e}")
+                    self._matrix = PredictionMatrix.empty()
+            return self._matrix
+
+    def confidences(self) -> Dict[str, float]:
+        """questionId -> saved YES confidence for every scored market (rebuilt after each add)"""
+        matrix = self.get()
+        with self._lock:
+            if self._confidences is None or self._confidences[0] is not matrix:
+                scored = ~np.isnan(matrix.confidence)
+                self._confidences = (matrix, dict(zip(matrix.question_id[scored].tolist(),
+                                                      matrix.confidence[scored].tolist())))
+            return self._confidences[1]
+
+    def add(self, matrix: PredictionMatrix):
+        current = self.get()
+        with self._lock:
+            self._matrix = current.merge(matrix)
+            try:
+                self._matrix.save(self.path)
+            except Exception as e:
+                print(f"Could not save predictions: {e}")
+
+
+def _iter_settle(capital: float, steps):
+    """Compound trades one by one, yielding the capital after each step.
+
+    `steps` yields (fraction, net, settle, total, side); it may be lazy, so a stream
+    settles each trade as soon as its step arrives. The stake is capital * fraction,
+    at least 1. A winning parimutuel stake s pays (T + s) / (W + s), so capital after
+    the trade is a rational function of capital before it, and the minimum stake makes
+    it piecewise. Compositions of those have no fixed-size closed form, so unlike the
+    fixed-odds path this cannot become a cumulative product. Only the capital is
+    yielded; stakes and returns follow from it (see _settle_steps).
+    """
+    for fraction, net, settle, total, side in steps:
+        stake = capital * fraction
+        if stake < 1:
+            stake = 1
+        if settle:
+            net = (total + stake) / (side + stake) - 1.0
+        capital += stake * net
+        yield capital
+
+
+def _settle_steps(capital: float, fractions, returns, settle_pool, totals, sides) -> tuple:
+    """_iter_settle over arrays: (net returns, stakes, capital after each)"""
+    steps = zip(fractions.tolist(), returns.tolist(), settle_pool.tolist(), totals.tolist(), sides.tolist())
+    after = np.fromiter(_iter_settle(capital, steps), dtype=np.float64, count=len(fractions))
+    before = np.concatenate(([capital], after[:-1]))
+    stakes = np.maximum(before * fractions, 1.0)
+    return (after - before) / stakes, stakes, after
+
+
+def _plan(matrix: PredictionMatrix, bet_size_percent, payout, buy_threshold, sell_threshold, kelly_fraction,
+          payout_model) -> dict:
+    """The trades a strategy takes over the matrix, before compounding.
+
+    The strategy bets YES when confidence > buy_threshold, NO when confidence <=
+    sell_threshold and skips the market otherwise. `fraction` is the share of capital
+    staked, `returns` the net return per unit at the pre-bet odds, and `settle` marks
+    winning pooled bets whose return depends on the stake (see _iter_settle).
+    """
+    scored = np.flatnonzero(~np.isnan(matrix.confidence))
+    confidence = matrix.confidence[scored]
+    bet_on_yes = confidence > buy_threshold
+    taken = bet_on_yes | (confidence <= sell_threshold)
+
+    # Pools on the side we would bet (NaN when unknown)
+    total_pool = matrix.total_pool[scored]
+    side_pool = np.where(bet_on_yes, matrix.yes_pool[scored], total_pool - matrix.yes_pool[scored])
+    if payout_model == "parimutuel":
+        pooled = ~np.isnan(total_pool) & (total_pool > 0)
+    else:
+        pooled = np.zeros(len(scored), dtype=bool)
+    # Net odds before our own stake, used for Kelly sizing (fixed odds when our side is empty)
+    odds = np.full(len(scored), payout - 1.0)
+    priced = pooled & (side_pool > 0)
+    odds[priced] = total_pool[priced] / side_pool[priced] - 1.0
+
+    cap = bet_size_percent / 100
+    if kelly_fraction:
+        # Kelly stake b*p - q over b, with p the model's probability for the side we bet
+        p = np.where(bet_on_yes, confidence, 1.0 - confidence)
+        safe_odds = np.where(odds > 0, odds, 1.0)
+        kelly = np.where(odds > 0, (odds * p - (1.0 - p)) / safe_odds, 0.0)
+        fraction = np.clip(kelly_fraction * kelly, 0.0, cap)
+        taken &= fraction > 0
+    else:
+        fraction = np.full(len(scored), cap)
+
+    rows = scored[taken]
+    bet_on_yes = bet_on_yes[taken]
+    pooled = pooled[taken]
+    winners = matrix.winning_outcome[rows]
+    correct = np.where(bet_on_yes, winners == 0, winners != 0)
+    return {
+        "rows": rows,
+        "betOnYes": bet_on_yes,
+        "correct": correct,
+        "pooled": pooled,
+        "fraction": fraction[taken],
+        "returns": np.where(correct, odds[taken], -1.0),
+        "settle": pooled & correct,
+        "totals": matrix.total_pool[rows],
+        "sides": side_pool[taken],
+    }
+
+
+def _summary(total_markets, initial_capital, bet_size_percent, payout_model, correct, profit, capital,
+             pooled) -> dict:
+    total_bets = len(capital)
+    peaks = np.maximum.accumulate(np.concatenate(([float(initial_capital)], capital)))[1:]
+    drawdown = np.where(peaks > 0, (peaks - capital) / np.where(peaks > 0, peaks, 1), 0.0)
+    winning_bets = int(np.count_nonzero(correct))
+    final_capital = float(capital[-1]) if total_bets else float(initial_capital)
+    accuracy = (winning_bets / total_bets * 100) if total_bets > 0 else 0
+    roi = ((final_capital - initial_capital) / initial_capital * 100) if initial_capital > 0 else 0
+    return {
+        "totalMarkets": total_markets,
+        "totalBets": total_bets,
+        "winningBets": winning_bets,
+        "accuracy": round(accuracy, 2),
+        "initialCapital": initial_capital,
+        "finalCapital": round(final_capital, 2),
+        "totalProfit": round(float(np.sum(profit)), 2),
+        "roi": round(roi, 2),
+        "maxDrawdown": round(float(drawdown.max()) * 100, 2) if total_bets else 0.0,
+        "betSizePercent": bet_size_percent,
+        "payoutModel": payout_model,
+        "pooledBets": int(np.count_nonzero(pooled)),
+    }
+
+
+def simulate(matrix: PredictionMatrix, initial_capital=1000, bet_size_percent=10, payout=2.0,
+             buy_threshold=0.5, sell_threshold=0.5, kelly_fraction=None, payout_model="fixed") -> dict:
+    """Compound a sizing strategy over the matrix rows in order.
+
+    The strategy bets YES when confidence > buy_threshold, NO when confidence <=
+    sell_threshold and skips the market otherwise. The stake is bet_size_percent of
+    current capital (minimum 1); with kelly_fraction it is that fraction of the
+    Kelly stake for the model's confidence, capped at bet_size_percent.
+
+    With payout_model="fixed" a correct bet returns `payout` times the stake. With
+    "parimutuel", markets that have pool data pay (total pool + stake) / (side pool
+    + stake) times the stake, as the contract would after our bet joins the pool;
+    markets without pool data fall back to `payout`. A wrong bet loses the stake.
+
+    Returns per-trade arrays (rows, betOnYes, correct, betAmount, profit, capital)
+    and a summary with accuracy, ROI and maximum drawdown.
+    """
+    plan = _plan(matrix, bet_size_percent, payout, buy_threshold, sell_threshold, kelly_fraction, payout_model)
+    fraction, returns = plan["fraction"], plan["returns"]
+    # Capital after each trade is initial_capital * prod(1 + fraction * return)
+    capital = initial_capital * np.cumprod(1.0 + fraction * returns)
+    capital_before = np.concatenate(([float(initial_capital)], capital[:-1]))
+    bet_amount = capital_before * fraction
+
+    # The minimum stake of 1 and stake-dependent parimutuel payouts break the
+    # geometric form; finish from the first such trade step by step
+    irregular = np.flatnonzero((bet_amount < 1) | plan["settle"])
+    if irregular.size:
+        start = int(irregular[0])
+        returns[start:], bet_amount[start:], capital[start:] = _settle_steps(
+            float(capital_before[start]), fraction[start:], returns[start:], plan["settle"][start:],
+            plan["totals"][start:], plan["sides"][start:],
+        )
+    profit = bet_amount * returns
+
+    return {
+        "rows": plan["rows"],
+        "betOnYes": plan["betOnYes"],
+        "correct": plan["correct"],
+        "betAmount": bet_amount,
+        "profit": profit,
+        "capital": capital,
+        "summary": _summary(len(matrix), initial_capital, bet_size_percent, payout_model, plan["correct"], profit,
+                            capital, plan["pooled"]),
+    }
+
+
+def iter_simulate(matrices: Iterable[PredictionMatrix], initial_capital=1000, bet_size_percent=10, payout=2.0,
+                  payout_model="parimutuel"):
+    """simulate() with the default thresholds over matrices that arrive one at a time.
+
+    Yields ("trade", record) as soon as each trade settles, then ("summary", summary).
+    Trades go through the same plan and settlement step as simulate(), so a stream and
+    a run over the same rows agree on every stake and on the final capital.
+    """
+    taken = deque()
+    markets = 0
+
+    def steps():
+        nonlocal markets
+        for matrix in matrices:
+            markets += len(matrix)
+            plan = _plan(matrix, bet_size_percent, payout, 0.5, 0.5, None, payout_model)
+            for i in range(len(plan["rows"])):
+                taken.append((matrix, plan, i))
+                yield plan["fraction"][i], plan["returns"][i], plan["settle"][i], plan["totals"][i], plan["sides"][i]
+
+    correct, profit, capital, pooled = [], [], [], []
+    capital_before = float(initial_capital)
+    for capital_after in _iter_settle(capital_before, steps()):
+        matrix, plan, i = taken.popleft()
+        trade = slice(i, i + 1)
+        stake = max(capital_before * plan["fraction"][i], 1.0)
+        correct.append(bool(plan["correct"][i]))
+        pooled.append(bool(plan["pooled"][i]))
+        profit.append(capital_after - capital_before)
+        capital.append(capital_after)
+        capital_before = capital_after
+        yield "trade", trade_records(matrix, {
+            "rows": plan["rows"][trade],
+            "betOnYes": plan["betOnYes"][trade],
+            "correct": plan["correct"][trade],
+            "betAmount": np.array([stake]),
+            "profit": np.array([profit[-1]]),
+            "capital": np.array([capital_after]),
+        })[0]
+    yield "summary", _summary(markets, initial_capital, bet_size_percent, payout_model, correct, profit,
+                              np.asarray(capital, dtype=np.float64), pooled)
+
+
+def trade_records(matrix: PredictionMatrix, simulation: dict) -> List[dict]:
+    """Per-trade dicts in the /api/backtest/run result format"""
+    rows = simulation["rows"]
+    columns = zip(
+        matrix.question_id[rows].tolist(),
+        matrix.question[rows].tolist(),
+        matrix.confidence[rows].tolist(),
+        matrix.direction[rows].tolist(),
+        simulation["betOnYes"].tolist(),
+        matrix.winning_outcome[rows].tolist(),
+        matrix.winning_name[rows].tolist(),
+        simulation["correct"].tolist(),
+        simulation["betAmount"].tolist(),
+        simulation["profit"].tolist(),
+        simulation["capital"].tolist(),
+        matrix.end_time[rows].tolist(),
+    )
+    return [
+        {
+            "questionId": question_id,
+            "question": question,
+            "aiConfidence": confidence,
+            "aiDirection": direction,
+            "betOnYes": bet_on_yes,
+            "actualWinner": winner,
+            "actualWinnerName": winner_name,
+            "aiCorrect": correct,
+            "betAmount": bet_amount,
+            "profit": profit,
+            "capitalAfter": capital,
+            "timestamp": end_time,
+        }
+        for (question_id, question, confidence, direction, bet_on_yes, winner, winner_name,
+             correct, bet_amount, profit, capital, end_time) in columns
+    ]
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one in-flight computation.
+
+    The first caller for a key runs fn; callers arriving while it is running block
+    and receive the same result (or the same exception). Nothing is cached once
+    the call finishes - that is the job of the caches around it.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"executions": self.executions, "coalesced": self.coalesced, "inFlight": in_flight}
+
+
+class AsyncSingleFlight:
+    """Event-loop counterpart of SingleFlight for coroutine functions"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # shield: one cancelled waiter must not cancel the shared computation
+            return await asyncio.shield(future)
+
+        self.executions += 1
+        future = self._calls[key] = asyncio.ensure_future(fn(*args, **kwargs))
+        future.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {"executions": self.executions, "coalesced": self.coalesced, "inFlight": len(self._calls)}
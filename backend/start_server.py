@@ -2,6 +2,8 @@
 """
 Simple script to start the backend server
 Make sure to install dependencies first: pip install -r requirements.txt
+
+Pass --asgi to run the async (ASGI) serving mode instead of the Flask dev server
 """
 
 import subprocess
@@ -9,12 +11,18 @@ import sys
 import os
 
 def main():
+    asgi_mode = "--asgi" in sys.argv[1:]
+    
     # Check if requirements are installed
     try:
         import flask
         import flask_cors
         import groq
         import dotenv
+        if asgi_mode:
+            import starlette
+            import uvicorn
+            import a2wsgi
     except ImportError as e:
         print(f"Missing dependency: {e}")
         print("Please install requirements: pip install -r requirements.txt")
@@ -25,7 +33,7 @@ def main():
         print("Warning: GROQ_API_KEY environment variable not set")
         print("Please set it in your .env file or environment")
     
-    print("Starting backend server...")
+    print(f"Starting backend server ({'async ASGI' if asgi_mode else 'Flask'} mode)...")
     print("Server will be available at: http://localhost:5000")
     print("API endpoint: http://localhost:5000/api/generate-signal")
     print("Health check: http://localhost:5000/api/health")
@@ -34,9 +42,9 @@ def main():
     # Start the server
     try:
         here = os.path.dirname(os.path.abspath(__file__))
-        index_path = os.path.join(here, "index.py")
-        # Run index.py from the backend folder to ensure relative imports/paths work
-        subprocess.run([sys.executable, index_path], check=True, cwd=here)
+        entry_path = os.path.join(here, "asgi.py" if asgi_mode else "index.py")
+        # Run from the backend folder to ensure relative imports/paths work
+        subprocess.run([sys.executable, entry_path], check=True, cwd=here)
     except KeyboardInterrupt:
         print("\nServer stopped by user")
     except subprocess.CalledProcessError as e:
@@ -0,0 +1,252 @@
+"""
+Grid search over backtest strategies using the saved prediction matrix.
+
+Every combination of bet size, buy/sell thresholds and Kelly fraction is simulated
+against the same cached predictions (no LLM calls), spread over a process pool,
+and returned as a table ranked by ROI, accuracy or drawdown.
+
+CLI:  python sweep.py --bet-size 2:20:2 --buy 0.5,0.6,0.7 --sell 0.3,0.4,0.5 --kelly 0,0.25,0.5
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from simulator import PredictionMatrix, simulate
+
+SWEEP_MAX_COMBINATIONS = int(os.getenv("SWEEP_MAX_COMBINATIONS", "20000"))
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", str(os.cpu_count() or 1)))
+# Below this many combinations the process start-up costs more than it saves
+SWEEP_PARALLEL_MIN = 200
+
+RANK_KEYS = {
+    # key: higher is better?
+    "roi": True,
+    "accuracy": True,
+    "finalCapital": True,
+    "maxDrawdown": False,
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def parse_range(value, limit: int = SWEEP_MAX_COMBINATIONS) -> List[float]:
+    """Accept a number, a list, "a,b,c", "start:stop:step" or {"start","stop","step"} (stop inclusive).
+
+    Raises ValueError for non-finite values, non-positive steps and ranges of more than `limit` values.
+    """
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        values = _arange(_number(value["start"]), _number(value["stop"]), _number(value.get("step", 1)), limit)
+    elif isinstance(value, str):
+        if ":" in value:
+            parts = [_number(p) for p in value.split(":")]
+            values = _arange(parts[0], parts[1], parts[2] if len(parts) > 2 else 1, limit)
+        else:
+            values = [_number(p) for p in value.split(",") if p.strip()]
+    elif isinstance(value, (list, tuple)):
+        values = [_number(v) for v in value]
+    else:
+        values = [_number(value)]
+    if len(values) > limit:
+        raise ValueError(f"Range has {len(values)} values; the limit is {limit}")
+    return values
+
+
+def _number(value) -> float:
+    # bool is an int subclass, but true/false in a range is a client mistake
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{value!r} is not a number")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+def _arange(start, stop, step, limit) -> List[float]:
+    if step <= 0:
+        raise ValueError("Range step must be positive")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count > limit:
+        raise ValueError(f"Range {start:g}:{stop:g}:{step:g} has {count} values; the limit is {limit}")
+    return [round(start + i * step, 10) for i in range(max(count, 0))]
+
+
+def grid_size(*ranges: Sequence[float]) -> int:
+    """Combinations before build_grid drops sell > buy (an upper bound, cheap to check first)"""
+    return math.prod(len(values) for values in ranges)
+
+
+def build_grid(bet_sizes: Sequence[float], buy_thresholds: Sequence[float], sell_thresholds: Sequence[float],
+               kelly_fractions: Sequence[float]) -> List[Dict[str, float]]:
+    """Every valid combination (sell threshold never above buy threshold)"""
+    return [
+        {"betSizePercent": bet, "buyThreshold": buy, "sellThreshold": sell, "kellyFraction": kelly}
+        for bet, buy, sell, kelly in itertools.product(bet_sizes, buy_thresholds, sell_thresholds, kelly_fractions)
+        if sell <= buy
+    ]
+
+
+def _evaluate(matrix: PredictionMatrix, combos: List[dict], initial_capital, payout, payout_model) -> List[dict]:
+    rows = []
+    for combo in combos:
+        summary = simulate(
+            matrix, initial_capital, combo["betSizePercent"], payout,
+            buy_threshold=combo["buyThreshold"],
+            sell_threshold=combo["sellThreshold"],
+            kelly_fraction=combo["kellyFraction"] or None,
+            payout_model=payout_model,
+        )["summary"]
+        rows.append({
+            **combo,
+            "roi": summary["roi"],
+            "accuracy": summary["accuracy"],
+            "maxDrawdown": summary["maxDrawdown"],
+            "finalCapital": summary["finalCapital"],
+            "totalBets": summary["totalBets"],
+            "winningBets": summary["winningBets"],
+        })
+    return rows
+
+
+def _evaluate_chunk(numeric, combos, initial_capital, payout, payout_model):
+    # Workers only need the numeric columns to simulate
+    blank = np.full(len(numeric["confidence"]), "")
+    matrix = PredictionMatrix(blank, blank, np.zeros(len(blank), dtype=np.int64), numeric["confidence"], blank,
+                              numeric["winning_outcome"], blank, numeric["yes_pool"], numeric["total_pool"])
+    return _evaluate(matrix, combos, initial_capital, payout, payout_model)
+
+
+@contextlib.contextmanager
+def _light_main():
+    """Launch spawned workers with this module standing in for __main__.
+
+    Spawned workers re-import the parent's __main__, which under `python index.py` is the
+    whole server (clients, stores, thread pools). Workers only need this module and the
+    simulator, so it stands in for __main__ while they are started.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool kept alive across sweeps so worker start-up is paid once"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # "spawn" avoids forking a server process that has threads running
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def run_sweep(matrix: PredictionMatrix, grid: List[dict], initial_capital=1000, payout=2.0,
+              rank_by="roi", top=20, workers=None, payout_model="parimutuel") -> dict:
+    """Simulate every grid combination and return them ranked by `rank_by`"""
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rankBy must be one of {', '.join(RANK_KEYS)}")
+    if len(grid) > SWEEP_MAX_COMBINATIONS:
+        raise ValueError(f"Too many combinations ({len(grid)}); the limit is {SWEEP_MAX_COMBINATIONS}")
+
+    started = time.perf_counter()
+    workers = max(1, min(workers or SWEEP_WORKERS, len(grid) or 1))
+    if workers == 1 or len(grid) < SWEEP_PARALLEL_MIN:
+        workers = 1
+        rows = _evaluate(matrix, grid, initial_capital, payout, payout_model)
+    else:
+        chunk_size = max(1, -(-len(grid) // (workers * 4)))
+        chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+        numeric = {name: getattr(matrix, name) for name in ("confidence", "winning_outcome", "yes_pool", "total_pool")}
+        executor = get_pool(workers)
+        # The pool starts its workers on demand inside submit()
+        with _pool_lock, _light_main():
+            futures = [executor.submit(_evaluate_chunk, numeric, chunk, initial_capital, payout, payout_model)
+                       for chunk in chunks]
+        rows = [row for future in futures for row in future.result()]
+
+    descending = RANK_KEYS[rank_by]
+    rows.sort(key=lambda row: row[rank_by], reverse=descending)
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+
+    return {
+        "combinations": len(grid),
+        "markets": len(matrix),
+        "scoredMarkets": matrix.scored,
+        "rankBy": rank_by,
+        "payoutModel": payout_model,
+        "workers": workers,
+        "durationMs": round((time.perf_counter() - started) * 1000, 1),
+        "results": rows[:top] if top else rows,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid-search backtest strategies over saved predictions")
+    parser.add_argument("--matrix", default=os.getenv("PREDICTION_MATRIX_PATH", os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), ".cache", "predictions.npz")), help="Saved prediction matrix (.npz)")
+    parser.add_argument("--bet-size", default="10", help="Bet size %% values: list 5,10 or range 2:20:2")
+    parser.add_argument("--buy", default="0.5", help="Buy (bet YES) confidence thresholds")
+    parser.add_argument("--sell", default="0.5", help="Sell (bet NO) confidence thresholds")
+    parser.add_argument("--kelly", default="0", help="Kelly fractions (0 = fixed bet size)")
+    parser.add_argument("--capital", type=float, default=1000)
+    parser.add_argument("--payout", type=float, default=2.0)
+    parser.add_argument("--payout-model", default="parimutuel", choices=["parimutuel", "fixed"],
+                        help="parimutuel: pay from recorded pools where known, else --payout")
+    parser.add_argument("--rank-by", default="roi", choices=list(RANK_KEYS))
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args(argv)
+
+    matrix = PredictionMatrix.load(args.matrix)
+    if not matrix.scored:
+        print(f"No saved predictions in {args.matrix}; run a backtest first")
+        return 1
+
+    try:
+        ranges = [parse_range(args.bet_size), parse_range(args.buy), parse_range(args.sell), parse_range(args.kelly)]
+    except ValueError as e:
+        parser.error(str(e))
+    if grid_size(*ranges) > SWEEP_MAX_COMBINATIONS:
+        parser.error(f"Too many combinations ({grid_size(*ranges)}); the limit is {SWEEP_MAX_COMBINATIONS}")
+    grid = build_grid(*ranges)
+    result = run_sweep(matrix, grid, args.capital, args.payout, args.rank_by, args.top, args.workers,
+                       args.payout_model)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"{result['combinations']} combinations over {result['scoredMarkets']} scored markets "
+          f"in {result['durationMs']} ms ({result['workers']} workers), ranked by {result['rankBy']}")
+    print(f"{'#':>4} {'bet%':>6} {'buy':>5} {'sell':>5} {'kelly':>6} {'roi%':>9} {'acc%':>7} {'maxDD%':>7} {'bets':>5}")
+    for row in result["results"]:
+        print(f"{row['rank']:>4} {row['betSizePercent']:>6g} {row['buyThreshold']:>5g} {row['sellThreshold']:>5g} "
+              f"{row['kellyFraction']:>6g} {row['roi']:>9.2f} {row['accuracy']:>7.2f} {row['maxDrawdown']:>7.2f} "
+              f"{row['totalBets']:>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend modules the way index.py does (flat, from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# index.py reads its settings at import time; keep every store in a scratch directory and
+# every background thread off so importing it touches no network and no real cache
+_scratch = tempfile.mkdtemp(prefix="betai-tests-")
+for key, value in {
+    "GROQ_API_KEY": "test",
+    "NEWS_API_KEY": "test",
+    "LLM_CACHE_DISK": "0",
+    "GROQ_RPM": "0",
+    "GROQ_TPM": "0",
+    "SIGNAL_PRECOMPUTE": "0",
+    "MARKET_DB_PATH": os.path.join(_scratch, "markets.sqlite3"),
+    "POOL_DB_PATH": os.path.join(_scratch, "pools.sqlite3"),
+    "PREDICTION_MATRIX_PATH": os.path.join(_scratch, "predictions.npz"),
+    "INSIGHTS_CACHE_PATH": os.path.join(_scratch, "insights.json"),
+    "BACKTEST_JOB_DB_PATH": os.path.join(_scratch, "backtest_jobs.sqlite3"),
+}.items():
+    os.environ.setdefault(key, value)
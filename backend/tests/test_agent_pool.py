@@ -0,0 +1,119 @@
+"""AgentPool crash handling with stand-in worker processes (no Node needed)"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from agent_pool import AgentError, AgentPool, AgentTimeout
+
+CRASHING_WORKER = [sys.executable, "-c", "import sys; sys.stderr.write('Cannot find module x\\n'); sys.exit(1)"]
+
+ECHO_WORKER = [sys.executable, "-c", """
+import json, sys
+print(json.dumps({"method": "ready"}), flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    result = {"echo": request["params"].get("prompt")} if request["method"] == "run" else "pong"
+    print(json.dumps({"id": request["id"], "result": result}), flush=True)
+"""]
+
+SILENT_WORKER = [sys.executable, "-c", """
+import json, sys, time
+print(json.dumps({"method": "ready"}), flush=True)
+for line in sys.stdin:
+    time.sleep(60)
+"""]
+
+
+def make_pool(cmd, **kwargs):
+    kwargs.setdefault("size", 1)
+    kwargs.setdefault("timeout", 10)
+    return AgentPool(cmd, cwd=os.getcwd(), env_factory=lambda: dict(os.environ), **kwargs)
+
+
+def test_worker_answers_requests():
+    pool = make_pool(ECHO_WORKER)
+    try:
+        assert pool.call("hello") == {"echo": "hello"}
+        assert pool.call("again") == {"echo": "again"}
+        assert pool.stats()["spawned"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_startup_crash_fails_queued_request_with_stderr():
+    pool = make_pool(CRASHING_WORKER, respawn_backoff=5)
+    try:
+        started = time.monotonic()
+        with pytest.raises(AgentError) as raised:
+            pool.call("hello")
+        assert time.monotonic() - started < 5
+        assert "startup" in str(raised.value)
+        assert "Cannot find module x" in raised.value.stderr
+        assert pool.stats()["startupFailures"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_backoff_fails_fast_without_respawning():
+    pool = make_pool(CRASHING_WORKER, respawn_backoff=5)
+    try:
+        with pytest.raises(AgentError):
+            pool.call("first")
+        for _ in range(5):
+            with pytest.raises(AgentError) as raised:
+                pool.call("again")
+            assert "Cannot find module x" in raised.value.stderr
+        stats = pool.stats()
+        assert stats["spawned"] == 1
+        assert stats["respawnInSeconds"] > 0
+    finally:
+        pool.shutdown()
+
+
+def test_backoff_doubles_per_failure_and_is_capped():
+    pool = make_pool(CRASHING_WORKER, respawn_backoff=0.5, max_respawn_backoff=2)
+    try:
+        delays = []
+        for _ in range(4):
+            pool._record_failure()
+            delays.append(pool._respawn_at - time.monotonic())
+        assert [round(d, 1) for d in delays] == [0.5, 1.0, 2.0, 2.0]
+    finally:
+        pool.shutdown()
+
+
+def test_ready_worker_resets_backoff():
+    pool = make_pool(ECHO_WORKER, respawn_backoff=5)
+    try:
+        pool._record_failure(AgentError("Agent process exited during startup", "boom"))
+        pool._respawn_at = 0.0  # backoff elapsed
+        assert pool.call("hello") == {"echo": "hello"}
+        assert pool._failures == 0
+        assert pool._startup_error is None
+    finally:
+        pool.shutdown()
+
+
+def test_call_raises_agent_timeout_when_the_result_never_arrives(monkeypatch):
+    pool = make_pool(SILENT_WORKER)
+    # A stuck monitor: only call()'s own wait can notice the deadline
+    monkeypatch.setattr(pool, "_start", lambda: None)
+    try:
+        started = time.monotonic()
+        with pytest.raises(AgentTimeout):
+            pool.call("hello", timeout=0.2)
+        assert time.monotonic() - started < 5
+    finally:
+        pool.shutdown()
+
+
+def test_call_without_any_timeout_waits_for_the_answer():
+    pool = make_pool(ECHO_WORKER, timeout=None)
+    try:
+        assert pool.call("hello") == {"echo": "hello"}
+        assert pool.call("again", timeout=None) == {"echo": "again"}
+    finally:
+        pool.shutdown()
@@ -0,0 +1,94 @@
+"""ASGI handlers: request validation, and blocking cache and store reads kept off the event loop"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+import asgi
+import index
+
+
+def test_llm_cache_is_read_and_written_off_the_loop(monkeypatch):
+    threads = []
+    stored = {}
+
+    def get(key):
+        threads.append(threading.current_thread())
+        return stored.get(key)
+
+    def put(key, value):
+        threads.append(threading.current_thread())
+        stored[key] = value
+
+    async def acomplete_with_model(messages, estimated_tokens=None):
+        return json.dumps({"yes_probability": 0.6, "reason": "stub"}), "stub:model"
+
+    monkeypatch.setattr(index.llm_cache, "get", get)
+    monkeypatch.setattr(index.llm_cache, "set", put)
+    monkeypatch.setattr(index.model_router, "acomplete_with_model", acomplete_with_model)
+
+    async def run():
+        loop_thread = threading.current_thread()
+        messages = [{"role": "user", "content": "Will it rain?"}]
+        first = await asgi.acomplete_cached(messages)
+        second = await asgi.acomplete_cached(messages)
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    assert first == second
+    assert threads and all(thread is not loop_thread for thread in threads)
+    assert list(stored) == [index.llm_cache.make_key("stub:model", index.LLM_TEMPERATURE,
+                                                     [{"role": "user", "content": "Will it rain?"}])]
+
+
+def test_signal_context_is_loaded_off_the_loop(monkeypatch):
+    threads = []
+
+    def load_backtest_context(include_backtest):
+        threads.append(threading.current_thread())
+        return None, None
+
+    def stored_signal(question, backtest_context=None):
+        threads.append(threading.current_thread())
+        return 0.7, "stored", {}
+
+    monkeypatch.setattr(index, "load_backtest_context", load_backtest_context)
+    monkeypatch.setattr(index, "stored_signal", stored_signal)
+
+    class Request:
+        async def json(self):
+            return {"question": "Will BTC close above $100k?", "includeBacktest": True}
+
+    async def run():
+        response = await asgi.api_generate_signal(Request())
+        return threading.current_thread(), response
+
+    loop_thread, response = asyncio.run(run())
+    assert response.status_code == 200
+    assert len(threads) == 2 and all(thread is not loop_thread for thread in threads)
+
+
+class RawRequest:
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        if self.body is None:
+            raise ValueError("Expecting value")
+        return self.body
+
+
+@pytest.mark.parametrize("body", [None, [], "question", 3])
+def test_generate_signal_rejects_a_body_that_is_not_an_object(body):
+    response = asyncio.run(asgi.api_generate_signal(RawRequest(body)))
+    assert response.status_code == 400
+    assert json.loads(response.body)["success"] is False
+
+
+@pytest.mark.parametrize("body", [b"", b"not json", b"[1, 2]"])
+def test_flask_generate_signal_rejects_a_body_that_is_not_an_object(body):
+    response = index.app.test_client().post("/api/generate-signal", data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
@@ -0,0 +1,36 @@
+import pytest
+
+import index
+
+
+@pytest.mark.parametrize("body", [
+    {"initialCapital": True},
+    {"initialCapital": "1000"},
+    {"initialCapital": None},
+    {"initialCapital": float("nan")},
+    {"betSizePercent": True},
+    {"betSizePercent": "10"},
+    {"betSizePercent": [10]},
+    {"maxWorkers": True},
+    {"maxWorkers": "4"},
+    {"maxRps": False},
+    {"maxRps": "5"},
+])
+def test_bool_and_non_numeric_params_are_rejected(body):
+    params, error = index.validate_backtest_params(body)
+    assert params is None and error
+
+    response = index.app.test_client().post("/api/backtest/jobs", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_non_object_body_is_rejected():
+    assert index.validate_backtest_params([1000])[0] is None
+
+
+def test_numeric_params_are_accepted():
+    params, error = index.validate_backtest_params({"initialCapital": 500, "betSizePercent": 2.5, "maxWorkers": 4,
+                                                    "maxRps": 0})
+    assert error is None
+    assert params == {"initial_capital": 500, "bet_size_percent": 2.5, "max_workers": 4, "max_rps": 0}
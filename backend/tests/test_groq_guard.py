@@ -0,0 +1,79 @@
+"""CircuitBreaker state transitions"""
+
+import time
+
+import pytest
+
+from groq_guard import CircuitBreaker, CircuitOpenError
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.allow()
+        breaker.record(False)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opens == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 1
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_successful_probe_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opens == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.allow()
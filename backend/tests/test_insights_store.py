@@ -0,0 +1,25 @@
+from insights import TopicMatcher
+from insights_store import InsightsStore
+
+
+def make_store(markets, scored):
+    def score(pending, initial_capital):
+        scored.append([m["questionId"] for m in pending])
+        # Only the first market trades; the rest had no usable prediction
+        return [{"questionId": pending[0]["questionId"], "question": pending[0]["question"], "aiConfidence": 0.8,
+                 "aiCorrect": True, "capitalAfter": initial_capital + 10}]
+
+    return InsightsStore(lambda: list(markets), score, TopicMatcher({"crypto": ["btc"]}), batch_limit=10)
+
+
+def test_untraded_markets_are_not_rescored_on_the_next_poll():
+    markets = [{"questionId": str(i), "question": f"Will BTC close above {i}?", "winningOutcome": 0} for i in range(3, 0, -1)]
+    scored = []
+    store = make_store(markets, scored)
+    assert store.refresh()
+    assert store.refresh() is False
+    assert len(scored) == 1
+
+    markets.insert(0, {"questionId": "4", "question": "Will BTC close above 4?", "winningOutcome": 0})
+    assert store.refresh()
+    assert scored[-1] == ["4"]
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+import index
+from jobs import JobManager
+
+PARAMS = {"initial_capital": 1000, "bet_size_percent": 10, "max_workers": 2, "max_rps": 0}
+
+
+def wait_for_status(manager, job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job stayed {manager.get(job_id)['status']}")
+
+
+@pytest.fixture
+def slow_predictions(monkeypatch):
+    """Markets whose predictions block until released (a long LLM phase)"""
+    release = threading.Event()
+    started = threading.Event()
+    markets = [{"questionId": str(i), "question": f"Q{i}?", "winningOutcome": 0, "winningOutcomeName": "Yes",
+                "endTime": i, "outcomePools": None} for i in range(4)]
+
+    def predict_market(market, limiter=None):
+        started.set()
+        release.wait(10)
+        return {"success": True, "signal": {"confidence": 0.8, "direction": "BUY"}}
+
+    monkeypatch.setattr(index, "get_resolved_markets", lambda: [dict(m) for m in markets])
+    monkeypatch.setattr(index, "predict_market", predict_market)
+    monkeypatch.setattr(index, "save_predictions", lambda markets, predictions: None)
+    monkeypatch.setattr(index, "CANCEL_POLL_SECONDS", 0.05)
+    yield started
+    release.set()
+
+
+def test_cancel_during_prediction_phase(slow_predictions):
+    manager = JobManager(":memory:", index.iter_backtest_run, max_workers=1)
+    job_id = manager.submit(PARAMS)
+    assert slow_predictions.wait(5)
+    wait_for_status(manager, job_id, ("running",))
+
+    cancelled_at = time.monotonic()
+    manager.cancel(job_id)
+    job = wait_for_status(manager, job_id, ("cancelled", "failed", "completed"))
+    assert job["status"] == "cancelled"
+    assert time.monotonic() - cancelled_at < 2
+    assert manager.results(job_id) == []
+
+
+def test_uncancelled_job_completes(monkeypatch):
+    monkeypatch.setattr(index, "get_resolved_markets", lambda: [
+        {"questionId": "1", "question": "Q?", "winningOutcome": 0, "winningOutcomeName": "Yes", "endTime": 1,
+         "outcomePools": None}])
+    monkeypatch.setattr(index, "predict_market", lambda market, limiter=None: {
+        "success": True, "signal": {"confidence": 0.8, "direction": "BUY"}})
+    monkeypatch.setattr(index, "save_predictions", lambda markets, predictions: None)
+    manager = JobManager(":memory:", index.iter_backtest_run, max_workers=1)
+    job_id = manager.submit(PARAMS)
+    job = wait_for_status(manager, job_id, ("completed", "failed"))
+    assert job["status"] == "completed"
+    assert len(manager.results(job_id)) == 1
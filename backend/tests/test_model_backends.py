@@ -0,0 +1,109 @@
+"""ModelRouter hedging and ensembles over local StubBackends"""
+
+import asyncio
+import json
+
+import pytest
+
+import index
+from groq_guard import GroqGuard, _background
+from model_backends import ModelBackend, ModelRouter, StubBackend, parse_backend_spec
+
+
+def answer(probability, reason="stub"):
+    return json.dumps({"yes_probability": probability, "reason": reason})
+
+
+class BackgroundProbe(ModelBackend):
+    """Answers with whether GroqGuard.background() was active in the thread that ran it"""
+
+    def __init__(self, name):
+        super().__init__(name, f"probe:{name}")
+
+    def _complete(self, messages, estimated_tokens):
+        return str(_background.get())
+
+
+def test_hedge_winner_model_is_reported():
+    slow = StubBackend("slow", answer(0.2), latency=0.5)
+    fast = StubBackend("fast", answer(0.8))
+    router = ModelRouter([slow, fast], mode="hedged", hedge_delay=0.05)
+    raw_output, model = router.complete_with_model([])
+    assert json.loads(raw_output)["yes_probability"] == 0.8
+    assert model == "stub:fast"
+    assert router.hedge_wins == 1
+
+
+def test_async_hedge_winner_model_is_reported():
+    slow = StubBackend("slow", answer(0.2), latency=0.5)
+    fast = StubBackend("fast", answer(0.8))
+    router = ModelRouter([slow, fast], mode="hedged", hedge_delay=0.05)
+    raw_output, model = asyncio.run(router.acomplete_with_model([]))
+    assert model == "stub:fast"
+
+
+def test_primary_answer_keeps_primary_model():
+    router = ModelRouter([StubBackend("a", answer(0.3)), StubBackend("b", answer(0.7))], mode="hedged",
+                         hedge_delay=1)
+    assert router.complete_with_model([])[1] == "stub:a"
+    assert router.hedges == 0
+
+
+def test_cache_models_per_mode():
+    backends = [StubBackend("a"), StubBackend("b")]
+    assert ModelRouter(backends).cache_models == ["stub:a"]
+    assert ModelRouter(backends, mode="hedged").cache_models == ["stub:a", "stub:b"]
+    assert ModelRouter(backends, mode="ensemble").cache_models == ["ensemble:stub:a,stub:b"]
+
+
+def test_ensemble_answer_is_keyed_on_ensemble():
+    router = ModelRouter([StubBackend("a", answer(0.2)), StubBackend("b", answer(0.6))], mode="ensemble")
+    raw_output, model = router.complete_with_model([])
+    assert json.loads(raw_output)["yes_probability"] == 0.4
+    assert model == router.cache_models[0]
+
+
+@pytest.mark.parametrize("mode", ["hedged", "ensemble"])
+def test_background_context_reaches_pool_threads(mode):
+    router = ModelRouter([BackgroundProbe("a"), BackgroundProbe("b")], mode=mode, hedge_delay=1)
+    router._submit(router.backends[0], [], None).result()  # pool threads exist before background() starts
+    with GroqGuard.background():
+        futures = [router._submit(backend, [], None) for backend in router.backends]
+        assert [f.result() for f in futures] == ["True", "True"]
+        if mode == "hedged":
+            assert router.complete([]) == "True"
+    assert router._submit(router.backends[0], [], None).result() == "False"
+
+
+def test_losing_hedge_not_started_is_cancelled():
+    backends = [StubBackend("a", answer(0.3), latency=0.3), StubBackend("b", answer(0.5), latency=0.1),
+                StubBackend("c", answer(0.7))]
+    router = ModelRouter(backends, mode="hedged", hedge_delay=0.05, max_workers=1)
+    # One pool thread: the hedges queue behind the primary; the one still queued when it answers is dropped
+    raw_output, model = router.complete_with_model([])
+    assert model == "stub:a"
+    router._get_executor().shutdown(wait=True)
+    assert backends[2].calls == 0
+
+
+def test_backend_spec_names_the_api_key_variable():
+    assert parse_backend_spec("a, b@http://local/v1, c@https://api.x.ai/v1|XAI_API_KEY, d|GROQ_KEY_2") == [
+        ("a", "a", None, "GROQ_API_KEY"),
+        ("b@http://local/v1", "b", "http://local/v1", None),
+        ("c@https://api.x.ai/v1", "c", "https://api.x.ai/v1", "XAI_API_KEY"),
+        ("d", "d", None, "GROQ_KEY_2"),
+    ]
+
+
+def test_other_endpoints_get_their_own_key_and_guard(monkeypatch):
+    monkeypatch.setenv("XAI_API_KEY", "xai-secret")
+    monkeypatch.setattr(index, "LLM_BACKENDS", "a,b@https://api.x.ai/v1|XAI_API_KEY,c@https://api.x.ai/v1,"
+                                               "d@http://local/v1")
+    monkeypatch.setattr(index, "endpoint_guards", {})
+    a, b, c, d = index.build_model_backends()
+    assert a.guard is index.groq_guard and a.client is index.client
+    assert b.api_key == "xai-secret" and b.client.api_key == "xai-secret"
+    assert c.api_key == "" and d.api_key == ""
+    assert b.guard is c.guard
+    assert len({id(index.groq_guard), id(b.guard), id(d.guard)}) == 3
+    assert set(index.endpoint_guards) == {"https://api.x.ai/v1", "http://local/v1"}
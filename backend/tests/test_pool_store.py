@@ -0,0 +1,61 @@
+import pytest
+
+from fake_services import FakeEnvio, _FIELD_PATTERN
+from pool_store import PoolStore, next_cursor
+
+
+def bet(block, log_index, question_id=1, outcome=0, amount=10 ** 8):
+    return {"id": f"296_{block}_{log_index}", "questionId": str(question_id), "outcomeIndex": str(outcome),
+            "amount": str(amount), "blockNumber": block, "logIndex": log_index}
+
+
+@pytest.fixture
+def envio():
+    service = FakeEnvio(markets=0)
+    service.entities["BetPlaced"] = []
+    yield service
+    service._server.server_close()
+
+
+def query_fn(service):
+    def query(text):
+        return {f"ParimutuelPredictionMarket_{entity}": service._select(entity, args)
+                for entity, args in _FIELD_PATTERN.findall(text)}
+    return query
+
+
+def test_paging_survives_block_digit_rollover(envio):
+    # As text, "296_1000_0" < "296_999_0" and "296_10000_0" < "296_9999_1"
+    envio.entities["BetPlaced"] = [bet(998, 0), bet(999, 0), bet(999, 1), bet(1000, 0), bet(1000, 1)]
+    store = PoolStore(":memory:", query_fn(envio), page_size=2, bucket_blocks=0)
+    assert store.sync()["newBets"] == 5
+
+    envio.entities["BetPlaced"] += [bet(9999, 0), bet(9999, 1), bet(10000, 0, outcome=1), bet(10001, 3, outcome=1)]
+    stats = store.sync()
+    assert stats["newBets"] == 4
+    assert stats["cursor"] == {"block": 10001, "offset": 1}
+    assert store.pools([1]) == {"1": [7.0, 2.0]}
+    assert store.sync()["newBets"] == 0
+
+
+def test_a_block_larger_than_a_page_is_read_completely(envio):
+    envio.entities["BetPlaced"] = [bet(500, i) for i in range(7)]
+    store = PoolStore(":memory:", query_fn(envio), page_size=3, bucket_blocks=0)
+    assert store.sync()["newBets"] == 7
+    # More bets land in the same block after the sync
+    envio.entities["BetPlaced"] += [bet(500, 7), bet(500, 8)]
+    assert store.sync()["newBets"] == 2
+    assert store.counts()["bets"] == 9
+
+
+def test_next_cursor():
+    assert next_cursor(0, 0, [bet(5, 0), bet(6, 0), bet(6, 1)]) == (6, 2)
+    assert next_cursor(6, 2, [bet(6, 2), bet(6, 3)]) == (6, 4)
+
+
+def test_full_resync_does_not_double_count(envio):
+    envio.entities["BetPlaced"] = [bet(10, 0), bet(11, 0)]
+    store = PoolStore(":memory:", query_fn(envio), page_size=1, bucket_blocks=0)
+    store.sync()
+    assert store.sync(full=True)["newBets"] == 0
+    assert store.pools([1]) == {"1": [2.0]}
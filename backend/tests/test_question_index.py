@@ -0,0 +1,60 @@
+import pytest
+
+import index
+from question_index import SimilarQuestionIndex, question_features
+
+
+def reused(stored, asked):
+    questions = SimilarQuestionIndex()
+    questions.add(stored, (0.8, "stored"))
+    return questions.find(asked) is not None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Will Bitcoin reach $100,000 by end of 2024?", "Will BTC hit $100k before 2025?"),
+    ("Will Bitcoin close above $90k on June 1 2025?", "Will BTC close over $90,000 on June 1 2025?"),
+])
+def test_paraphrases_share_an_answer(stored, asked):
+    assert reused(stored, asked)
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Will the Lakers beat the Celtics in the 2025 finals?", "Will the Celtics beat the Lakers in the 2025 finals?"),
+    ("Will Trump win the 2024 election against Harris?", "Will Harris win the 2024 election against Trump?"),
+    ("Will Bitcoin be above $100k on June 1 2025?", "Will Bitcoin be below $100k on June 1 2025?"),
+    ("Will ETH flip BTC in 2025?", "Will BTC flip ETH in 2025?"),
+    ("Will Bitcoin reach $100k before 2025?", "Will Bitcoin reach $120k before 2025?"),
+    ("Will Bitcoin reach $100k before 2025?", "Will Bitcoin not reach $100k before 2025?"),
+    ("Will Solana trade above $300 before July 2025?", "Will Solana trade above $300 after July 2025?"),
+    ("Will the Fed cut rates at the June 2025 FOMC meeting?", "Will the Fed raise rates at the June 2025 FOMC meeting?"),
+    ("Will the Lakers win the 2025 Western Conference finals?",
+     "Will the Celtics win the 2025 Western Conference finals?"),
+    ("Will Apple stock beat Microsoft in 2025?", "Will Google stock beat Microsoft in 2025?"),
+    ("Will BTC be above $100k on Friday?", "Will BTC be above $100k on Monday?"),
+    ("Will Bitcoin reach $100k before 2025?", "Will Bitcoin reach $100k before 2025 on Coinbase?"),
+])
+def test_opposite_questions_never_share_an_answer(stored, asked):
+    assert not reused(stored, asked)
+
+
+def test_direction_words_are_part_of_the_guard():
+    above = question_features("Bitcoin above $100k on June 1 2025")
+    below = question_features("Bitcoin below $100k on June 1 2025")
+    assert above.guard != below.guard
+
+
+def test_scope_separates_answers():
+    questions = SimilarQuestionIndex()
+    questions.add("Will Bitcoin reach $100k before 2025?", (0.8, "stored"), scope="a")
+    assert questions.find("Will BTC hit $100k before 2025?", scope="b") is None
+    assert questions.find("Will BTC hit $100k before 2025?", scope="a") is not None
+
+
+def test_stale_answers_are_not_reused():
+    questions = SimilarQuestionIndex(max_age=0)
+    questions.add("Will Bitcoin reach $100k before 2025?", (0.8, "stored"))
+    assert questions.find("Will BTC hit $100k before 2025?") is None
+
+
+def test_reuse_is_off_by_default():
+    assert index.SIMILAR_QUESTIONS is False
@@ -0,0 +1,75 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from model_backends import GroqBackend
+from signal_parser import SignalStreamParser, as_probability, extract_signal_fields, parse_signal_text
+
+ANSWER = '{"yes_probability": 0.72, "reason": "Polls say \\"likely\\", {not nested}", "extra": [1, {"a": "}"}]}'
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_fields_parse_the_same_however_the_stream_is_chunked(size):
+    parser = SignalStreamParser()
+    done = [parser.feed(chunk) for chunk in chunked(ANSWER, size)]
+    assert parser.values["yes_probability"] == 0.72
+    assert parser.values["reason"] == 'Polls say "likely", {not nested}'
+    assert done[-1] is True
+
+
+def test_stops_as_soon_as_both_fields_are_known():
+    parser = SignalStreamParser()
+    assert parser.feed('Sure! {"reason": "Strong lead", ') is False
+    assert parser.feed('"yes_probability": 0.8') is False  # a scalar ends at its delimiter
+    assert parser.feed(', "confidence_notes": "never read"') is True
+    assert json.loads(parser.text()) == {"yes_probability": 0.8, "reason": "Strong lead"}
+
+
+def test_nested_values_are_skipped():
+    values = parse_signal_text('{"meta": {"reason": "inner", "list": ["]"]}, "yes_probability": "70%", '
+                               '"reason": "outer"}')
+    assert values["reason"] == "outer"
+    assert as_probability(values["yes_probability"]) == 0.7
+
+
+def test_incomplete_answer_keeps_raw_text():
+    parser = SignalStreamParser()
+    assert parser.feed("The chance is about 65 percent.") is False
+    assert parser.text() == "The chance is about 65 percent."
+    assert extract_signal_fields(parser.text())["yes_probability"] == 0.65
+
+
+def test_first_value_of_a_repeated_key_wins():
+    assert parse_signal_text('{"yes_probability": 0.1, "yes_probability": 0.9}')["yes_probability"] == 0.1
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.read += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None,
+                                  x_groq=None)
+
+    def close(self):
+        self.closed = True
+
+
+def test_backend_closes_the_stream_once_the_fields_are_parsed():
+    pieces = ['{"yes_probability": 0.6, ', '"reason": "Ahead in polls"', ', "details": "', "x" * 50, '"}']
+    stream = FakeStream(pieces)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: stream)))
+    backend = GroqBackend("test", "model", client=client)
+    raw_output = backend.complete([{"role": "user", "content": "?"}])
+    assert json.loads(raw_output) == {"yes_probability": 0.6, "reason": "Ahead in polls"}
+    assert stream.closed
+    assert stream.read == 2
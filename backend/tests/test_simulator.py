@@ -0,0 +1,104 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+import index
+from simulator import PredictionMatrix, PredictionStore
+
+
+def random_case(rng):
+    markets, predictions = [], []
+    for i in range(rng.randint(1, 40)):
+        pools = [rng.uniform(0, 500), rng.uniform(0, 500)] if rng.random() < 0.6 else None
+        markets.append({
+            "questionId": str(i),
+            "question": f"Question {i}?",
+            "winningOutcome": rng.randint(0, 1),
+            "winningOutcomeName": "",
+            "endTime": 1_700_000_000 - i,
+            "outcomePools": pools,
+        })
+        roll = rng.random()
+        if roll < 0.1:
+            predictions.append(None)
+        elif roll < 0.2:
+            predictions.append(index.fallback_signal("down", "medium", 0.5))
+        else:
+            confidence = round(rng.random(), 2)
+            predictions.append({"success": True, "signal": {"confidence": confidence,
+                                                            "direction": "BUY" if confidence > 0.5 else "SELL"}})
+    return markets, predictions
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_simulate_matrix_matches_iter_backtest(seed):
+    rng = random.Random(seed)
+    markets, predictions = random_case(rng)
+    capital, percent = rng.choice([100, 1000, 5]), rng.choice([1, 10, 50])
+    events = list(index.iter_backtest(markets, predictions, capital, percent))
+    expected_trades = [payload for kind, payload in events if kind == "trade"]
+    expected_summary = events[-1][1]
+
+    result = index.simulate_matrix(PredictionMatrix.from_predictions(markets, predictions), capital, percent)
+
+    assert len(result["results"]) == len(expected_trades)
+    for actual, expected in zip(result["results"], expected_trades):
+        assert actual["questionId"] == expected["questionId"]
+        assert actual["aiCorrect"] == expected["aiCorrect"]
+        assert math.isclose(actual["profit"], expected["profit"], rel_tol=1e-9, abs_tol=1e-9)
+        assert math.isclose(actual["capitalAfter"], expected["capitalAfter"], rel_tol=1e-9, abs_tol=1e-9)
+    for key in ("totalBets", "winningBets", "accuracy", "finalCapital", "roi", "maxDrawdown", "pooledBets"):
+        assert result["summary"][key] == pytest.approx(expected_summary[key]), key
+
+
+def test_fallback_signals_are_saved_unscored(tmp_path):
+    markets = [{"questionId": "1", "question": "Q?", "winningOutcome": 0, "endTime": 1}]
+    store = PredictionStore(str(tmp_path / "predictions.npz"))
+    store.add(PredictionMatrix.from_predictions(markets, [{"success": True, "signal": {"confidence": 0.8}}]))
+    store.add(PredictionMatrix.from_predictions(markets, [index.fallback_signal("down", "medium", 0.5)]))
+    assert store.get().confidence.tolist() == [0.8]
+    assert np.isnan(PredictionMatrix.from_predictions(markets, [index.fallback_signal("x", "low", 0.5)]).confidence[0])
+
+
+def test_predict_market_drops_fallbacks(monkeypatch):
+    monkeypatch.setattr(index, "generate_signal", lambda **kwargs: index.fallback_signal("down", "medium", 0.5))
+    assert index.predict_market({"questionId": "1", "question": "Q?"}) is None
+
+
+def test_save_predictions_merges_into_store(monkeypatch, tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions.npz"))
+    monkeypatch.setattr(index, "prediction_store", store)
+    markets = [{"questionId": "7", "question": "Q?", "winningOutcome": 1, "endTime": 1}]
+    matrix = index.save_predictions(markets, [{"success": True, "signal": {"confidence": 0.3}}])
+    assert matrix.question_id.tolist() == ["7"]
+    assert PredictionStore(store.path).get().confidence.tolist() == [0.3]
+
+
+def test_stream_settles_each_trade_before_the_next_prediction():
+    markets = [{"questionId": str(i), "question": "Q?", "winningOutcome": 0, "endTime": i,
+                "outcomePools": [100.0, 300.0]} for i in range(3)]
+    requested = []
+
+    def predictions():
+        for i in range(3):
+            requested.append(i)
+            yield {"success": True, "signal": {"confidence": 0.9, "direction": "BUY"}}
+
+    stream = index.iter_backtest(markets, predictions(), 1000, 10)
+    kind, trade = next(stream)
+    assert kind == "trade" and requested == [0]
+    # Parimutuel: our 100 joins the 100 YES pool of a 400 pool
+    assert trade["profit"] == pytest.approx(100 * (500 / 200 - 1))
+
+
+def test_stream_and_run_agree_below_the_minimum_stake():
+    markets = [{"questionId": str(i), "question": "Q?", "winningOutcome": i % 2, "endTime": -i,
+                "outcomePools": [50.0, 50.0] if i % 3 else None} for i in range(30)]
+    predictions = [{"success": True, "signal": {"confidence": 0.7, "direction": "BUY"}} for _ in markets]
+    events = list(index.iter_backtest(markets, predictions, 5, 50))
+    result = index.simulate_matrix(PredictionMatrix.from_predictions(markets, predictions), 5, 50)
+    assert [t["betAmount"] for k, t in events if k == "trade"] == pytest.approx(
+        [t["betAmount"] for t in result["results"]])
+    assert events[-1][1] == result["summary"]
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import index
+from simulator import PredictionMatrix, PredictionStore
+from sweep import grid_size, parse_range
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions.npz"))
+    markets = [{"questionId": str(i), "question": f"Q{i}?", "winningOutcome": i % 2, "endTime": i} for i in range(6)]
+    predictions = [{"success": True, "signal": {"confidence": c}} for c in (0.9, 0.2, 0.7, 0.4, 0.6, 0.1)]
+    store.add(PredictionMatrix.from_predictions(markets, predictions))
+    monkeypatch.setattr(index, "prediction_store", store)
+    return index.app.test_client()
+
+
+def test_parse_range_forms():
+    assert parse_range(5) == [5.0]
+    assert parse_range([1, 2]) == [1.0, 2.0]
+    assert parse_range("0.3,0.5") == [0.3, 0.5]
+    assert parse_range("2:6:2") == [2.0, 4.0, 6.0]
+    assert parse_range({"start": 0, "stop": 1, "step": 0.5}) == [0.0, 0.5, 1.0]
+
+
+@pytest.mark.parametrize("value", [
+    "nan", [float("inf")], True, [None], {"start": 0, "stop": 1, "step": 0}, {"start": 0},
+    {"start": 0, "stop": 1e12, "step": 1}, "0:1e9", list(range(50)),
+])
+def test_parse_range_rejects(value):
+    with pytest.raises((ValueError, KeyError)):
+        parse_range(value, limit=40)
+
+
+def test_grid_size_is_checked_before_building():
+    assert grid_size([1, 2], [0.5], [0.3, 0.4, 0.5], [0, 0.5]) == 12
+
+
+def test_sweep_runs(client):
+    response = client.post("/api/backtest/sweep", json={"betSizePercent": [5, 10], "buyThreshold": [0.5, 0.6],
+                                                        "sellThreshold": 0.4, "top": 3})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body["combinations"] == 4
+    assert len(body["results"]) == 3
+
+
+def test_top_zero_returns_every_row(client):
+    response = client.post("/api/backtest/sweep", json={"betSizePercent": [5, 10], "top": 0})
+    assert len(response.get_json()["results"]) == 2
+
+
+@pytest.mark.parametrize("body", [
+    {"top": -1},
+    {"top": "5"},
+    {"top": 2.5},
+    {"top": True},
+    {"workers": 0},
+    {"workers": "4"},
+    {"rankBy": "luck"},
+    {"payoutModel": "odds"},
+    {"payout": "2"},
+    {"initialCapital": float("inf")},
+    {"betSizePercent": []},
+    {"betSizePercent": {"start": 1, "stop": 100, "step": 0}},
+    {"betSizePercent": {"start": 1, "stop": 1e9, "step": 1}},
+    {"betSizePercent": "1:1000000000"},
+    {"betSizePercent": [True]},
+    {"buyThreshold": [0.5, "x"]},
+    {"buyThreshold": 1.5},
+    {"kellyFraction": -0.5},
+    {"betSizePercent": "1:100:1", "buyThreshold": "0:1:0.01", "sellThreshold": "0:1:0.01"},
+])
+def test_invalid_sweep_params_are_rejected(client, body):
+    response = client.post("/api/backtest/sweep", json=body)
+    assert response.status_code == 400, response.get_json()
+    assert response.get_json()["success"] is False
+
+
+def test_workers_do_not_reimport_the_main_script(tmp_path):
+    """Under `python index.py` spawned workers must not start a second server each"""
+    log = tmp_path / "imports.log"
+    script = tmp_path / "server.py"
+    script.write_text(f"""
+import sys
+sys.path.insert(0, {BACKEND!r})
+with open({str(log)!r}, "a") as log:
+    log.write(__name__ + "\\n")
+
+from simulator import PredictionMatrix
+from sweep import build_grid, run_sweep
+
+if __name__ == "__main__":
+    markets = [{{"questionId": str(i), "winningOutcome": i % 2, "endTime": i}} for i in range(20)]
+    predictions = [{{"success": True, "signal": {{"confidence": (i % 10) / 10}}}} for i in range(20)]
+    matrix = PredictionMatrix.from_predictions(markets, predictions)
+    grid = build_grid(list(range(1, 21)), [0.5, 0.6, 0.7], [0.3, 0.4], [0, 0.5])
+    print(run_sweep(matrix, grid, workers=2)["workers"])
+""")
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "2"
+    assert log.read_text().split() == ["__main__"]
@@ -12,6 +12,9 @@ ParimutuelPredictionMarket.BetPlaced.handler(async ({event, context}) => {
     user: event.params.user,
     outcomeIndex: event.params.outcomeIndex,
     amount: event.params.amount,
+    // Numeric position for incremental readers (ids compare as text)
+    blockNumber: event.block.number,
+    logIndex: event.logIndex,
   };
 
   context.ParimutuelPredictionMarket_BetPlaced.set(entity);
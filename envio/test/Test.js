@@ -29,6 +29,8 @@ describe("ParimutuelPredictionMarket contract BetPlaced event tests", () => {
       user: event.params.user,
       outcomeIndex: event.params.outcomeIndex,
       amount: event.params.amount,
+      blockNumber: event.block.number,
+      logIndex: event.logIndex,
     };
     // Asserting that the entity in the mock database is the same as the expected entity
     assert.deepEqual(
@@ -41,32 +41,64 @@ const Backtesting = () => {
     }
   }
 
-  const runBacktest = async () => {
+  // Running summary while trades are still streaming in
+  const summarizeTrades = (trades, initialCapital) => {
+    const totalBets = trades.length
+    const winningBets = trades.filter((t) => t.aiCorrect).length
+    const finalCapital = totalBets ? trades[totalBets - 1].capitalAfter : initialCapital
+    return {
+      totalBets,
+      winningBets,
+      accuracy: totalBets ? (winningBets / totalBets) * 100 : 0,
+      initialCapital,
+      finalCapital,
+      totalProfit: finalCapital - initialCapital,
+      roi: initialCapital ? ((finalCapital - initialCapital) / initialCapital) * 100 : 0
+    }
+  }
+
+  const runBacktest = () => {
     setIsRunning(true)
     setError(null)
     setResults(null)
 
-    try {
-      const response = await fetch('http://localhost:5000/api/backtest/run', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(config)
+    // Stream trades over Server-Sent Events so results show up as each market is scored
+    const params = new URLSearchParams({
+      initialCapital: config.initialCapital,
+      betSizePercent: config.betSizePercent
+    })
+    const source = new EventSource(`http://localhost:5000/api/backtest/stream?${params}`)
+    const trades = []
+
+    const finish = () => {
+      source.close()
+      setIsRunning(false)
+    }
+
+    source.addEventListener('trade', (event) => {
+      trades.push(JSON.parse(event.data))
+      setResults({
+        success: true,
+        summary: summarizeTrades(trades, Number(config.initialCapital)),
+        results: [...trades]
       })
+    })
 
-      const data = await response.json()
-      
-      if (data.success) {
-        setResults(data)
+    source.addEventListener('summary', (event) => {
+      const data = JSON.parse(event.data)
+      setResults({ ...data, results: [...trades] })
+      finish()
+    })
+
+    source.addEventListener('error', (event) => {
+      // Server-sent "error" events carry a JSON body; bare ones are connection failures
+      if (event.data) {
+        setError(JSON.parse(event.data).error)
       } else {
-        setError(data.error)
+        setError('Failed to run backtest: connection to backend lost')
       }
-    } catch (err) {
-      setError('Failed to run backtest: ' + err.message)
-    } finally {
-      setIsRunning(false)
-    }
+      finish()
+    })
   }
 
   const formatCurrency = (amount) => {
@@ -1,5 +1,6 @@
 // hederaAgent.js
 import dotenv from 'dotenv';
+import readline from 'node:readline';
 dotenv.config();
 
 import { ChatPromptTemplate } from '@langchain/core/prompts';
@@ -32,10 +33,7 @@ const placeBetTool = new DynamicStructuredTool({
     required: ["contractId", "questionId", "outcomeIndex", "betAmount"]
   },
   async func({ contractId, questionId, outcomeIndex, betAmount }) {
-    const client = Client.forTestnet().setOperator(
-      process.env.HEDERA_ACCOUNT_ID,
-      PrivateKey.fromStringECDSA(process.env.HEDERA_PRIVATE_KEY)
-    );
+    const client = getHederaClient();
 
     const amountTinybars = Hbar.from(betAmount).toTinybars();
 
@@ -65,35 +63,59 @@ function createLLM() {
   throw new Error("Missing GROQ_API_KEY in environment variables.");
 }
 
-// Main reusable function
-export async function runHederaAgent(promptText) {
-  try {
-    const llm = createLLM();
+// Hedera client and agent executor are built once per process and reused
+let hederaClient = null;
+let executorPromise = null;
 
-    const client = Client.forTestnet().setOperator(
+function getHederaClient() {
+  if (!hederaClient) {
+    hederaClient = Client.forTestnet().setOperator(
       process.env.HEDERA_ACCOUNT_ID,
       PrivateKey.fromStringECDSA(process.env.HEDERA_PRIVATE_KEY)
     );
+  }
+  return hederaClient;
+}
 
-    // Initialize Hedera Toolkit
-    const toolkit = new HederaLangchainToolkit({
-      client,
-      configuration: {
-        plugins: [coreAccountPlugin, coreQueriesPlugin],
-      },
-    });
+async function buildExecutor() {
+  const llm = createLLM();
+  const client = getHederaClient();
+
+  // Initialize Hedera Toolkit
+  const toolkit = new HederaLangchainToolkit({
+    client,
+    configuration: {
+      plugins: [coreAccountPlugin, coreQueriesPlugin],
+    },
+  });
 
-    // Fixed prompt template with required agent_scratchpad
-    const prompt = ChatPromptTemplate.fromMessages([
-      ['system', 'You are a Hedera AI agent capable of performing blockchain operations and contract executions.'],
-      ['human', '{input}'],
-      ['placeholder', '{agent_scratchpad}'],
-    ]);
+  // Fixed prompt template with required agent_scratchpad
+  const prompt = ChatPromptTemplate.fromMessages([
+    ['system', 'You are a Hedera AI agent capable of performing blockchain operations and contract executions.'],
+    ['human', '{input}'],
+    ['placeholder', '{agent_scratchpad}'],
+  ]);
 
-    const tools = [...toolkit.getTools(), placeBetTool];
-    const agent = createToolCallingAgent({ llm, tools, prompt });
-    const executor = new AgentExecutor({ agent, tools });
+  const tools = [...toolkit.getTools(), placeBetTool];
+  const agent = createToolCallingAgent({ llm, tools, prompt });
+  return new AgentExecutor({ agent, tools });
+}
+
+function getExecutor() {
+  if (!executorPromise) {
+    // Retry initialization on the next request if it failed
+    executorPromise = buildExecutor().catch((error) => {
+      executorPromise = null;
+      throw error;
+    });
+  }
+  return executorPromise;
+}
 
+// Main reusable function
+export async function runHederaAgent(promptText) {
+  try {
+    const executor = await getExecutor();
     const response = await executor.invoke({ input: promptText });
 
     // Return structured response
@@ -111,10 +133,57 @@ export async function runHederaAgent(promptText) {
   }
 }
 
+// Long-lived worker mode used by the backend's agent pool (backend/agent_pool.py).
+// Speaks line-delimited JSON-RPC 2.0 on stdio and handles one request at a time:
+//   -> {"jsonrpc":"2.0","id":1,"method":"run","params":{"prompt":"..."}}
+//   <- {"jsonrpc":"2.0","id":1,"result":{...runHederaAgent output...}}
+// "ping" answers "pong"; a "ready" notification is sent once the agent is warmed up.
+async function serveWorker() {
+  const send = (message) => process.stdout.write(JSON.stringify({ jsonrpc: '2.0', ...message }) + '\n');
+  // stdout carries the protocol only; route library logging to stderr
+  console.log = (...args) => console.error(...args);
+  console.info = (...args) => console.error(...args);
+
+  let warmupError = null;
+  try {
+    await getExecutor();
+  } catch (error) {
+    warmupError = error.message;
+  }
+  send({ method: 'ready', params: { pid: process.pid, warmupError } });
+
+  const lines = readline.createInterface({ input: process.stdin });
+  for await (const line of lines) {
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch {
+      send({ id: null, error: { code: -32700, message: 'Parse error' } });
+      continue;
+    }
+
+    if (request.method === 'ping') {
+      send({ id: request.id, result: 'pong' });
+    } else if (request.method === 'run') {
+      const result = await runHederaAgent(String(request.params?.prompt ?? ''));
+      send({ id: request.id, result });
+    } else {
+      send({ id: request.id, error: { code: -32601, message: `Method not found: ${request.method}` } });
+    }
+  }
+}
+
 // Local dev test (run this file directly)
 if (import.meta.url === `file://${process.argv[1]}`) {
-  const input = process.argv.slice(2).join(" ") || "Place a bet of 10 HBAR on contract 0.0.7100616 for question 1, outcome 0";
-  runHederaAgent(input)
-    .then(res => console.log(JSON.stringify(res, null, 2)))
-    .catch(err => console.error("Error:", err));
+  if (process.argv[2] === '--worker') {
+    serveWorker().catch(err => {
+      console.error("Worker error:", err);
+      process.exit(1);
+    });
+  } else {
+    const input = process.argv.slice(2).join(" ") || "Place a bet of 10 HBAR on contract 0.0.7100616 for question 1, outcome 0";
+    runHederaAgent(input)
+      .then(res => console.log(JSON.stringify(res, null, 2)))
+      .catch(err => console.error("Error:", err));
+  }
 }